@@ -0,0 +1,79 @@
+# appback/batch.py
+"""
+Fetch many objects by primary key in one query.
+
+    GET  /api/products/?ids=3,1,2
+    POST /api/products/_batch/   {"ids": [3, 1, 2, ...]}
+
+Both answer {"results": [...], "missing": [...]}. Results follow the requested
+order (repeated ids are returned once); `missing` lists the ids with no row
+visible to the endpoint. Rows come from a single `pk IN (...)` query on the
+endpoint's queryset, so its select_related/prefetch_related still apply, and
+the list serializer (and ?fields=) shapes them.
+
+The GET form takes up to MAX_QUERY_IDS ids, enough for a page of foreign keys;
+larger sets go in the POST body, up to MAX_BATCH_IDS. A batch POST only reads,
+so it has the permissions of a GET.
+
+`BatchMixin` adds both to a ViewSet; function views use `parse_ids` and `fetch_by_ids`.
+"""
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import clone_request
+from rest_framework.response import Response
+
+MAX_QUERY_IDS = 100
+MAX_BATCH_IDS = 1000
+
+
+def parse_ids(value, limit=MAX_QUERY_IDS):
+    """'3,1,2' or [3, 1, 2] -> [3, 1, 2], without repeats."""
+    if isinstance(value, str):
+        value = [part for part in value.split(',') if part.strip()]
+    if not isinstance(value, (list, tuple)) or not value:
+        raise ValidationError({'error': 'ids must be a non-empty list of integer ids.'})
+    try:
+        if any(isinstance(pk, bool) for pk in value):
+            raise TypeError()
+        ids = [int(pk) for pk in value]
+    except (TypeError, ValueError):
+        raise ValidationError({'error': 'ids must be a non-empty list of integer ids.'})
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > limit:
+        raise ValidationError({'error': f"At most {limit} ids per request; POST larger sets to _batch/."})
+    return ids
+
+
+def fetch_by_ids(queryset, ids):
+    """Return (objects in the order of `ids`, ids with no matching row)."""
+    found = {obj.pk: obj for obj in queryset.filter(pk__in=ids).order_by()}
+    return [found[pk] for pk in ids if pk in found], [pk for pk in ids if pk not in found]
+
+
+class BatchMixin:
+    """
+    ViewSet mixin adding ?ids= to list and a POST _batch/ action.
+    Place it after CachedResponseMixin so ?ids= responses are cached like any list.
+    """
+
+    def get_batch_queryset(self):
+        return self.get_queryset()
+
+    def batch_response(self, ids):
+        objects, missing = fetch_by_ids(self.get_batch_queryset(), ids)
+        return Response({'results': self.get_serializer(objects, many=True).data, 'missing': missing})
+
+    def list(self, request, *args, **kwargs):
+        if 'ids' in request.query_params:
+            return self.batch_response(parse_ids(request.query_params['ids']))
+        return super().list(request, *args, **kwargs)
+
+    @action(detail=False, methods=['post'], url_path='_batch')
+    def batch(self, request, *args, **kwargs):
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        return self.batch_response(parse_ids(ids, limit=MAX_BATCH_IDS))
+
+    def check_permissions(self, request):
+        if self.action == 'batch':
+            request = clone_request(request, 'GET')
+        super().check_permissions(request)
@@ -0,0 +1,66 @@
+# appback/concurrency.py
+"""
+Independent ORM queries run concurrently from async views.
+
+Django's async ORM methods (acount, aaggregate, ...) all hop onto the one
+shared sync thread, so gathering them still runs the queries one after
+another. `gather_queries` runs each query callable in its own worker thread
+instead (sync_to_async with thread_sensitive=False). Every worker thread has
+its own database connection, so the queries overlap on the server. Worker
+connections obey CONN_MAX_AGE through close_old_connections, as request
+threads do.
+
+Dashboards describe their queries once, as a dict of name -> zero-argument
+callable. Sync views evaluate the dict with `run_queries`; their async variants
+await `gather_queries`. Both produce the same result dict. `run_in_worker`
+runs a single callable the same way.
+"""
+import asyncio
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.http import HttpResponse, HttpResponseNotAllowed
+from django.http.response import HttpResponseBase
+
+from .renderers import render_json
+
+
+def run_queries(queries):
+    """Evaluate {name: callable} one after another."""
+    return {name: query() for name, query in queries.items()}
+
+
+def _in_worker(query):
+    close_old_connections()
+    try:
+        return query()
+    finally:
+        close_old_connections()
+
+
+async def run_in_worker(query):
+    """Await a zero-argument callable run in its own worker thread (and connection)."""
+    return await sync_to_async(_in_worker, thread_sensitive=False)(query)
+
+
+async def gather_queries(queries):
+    """Evaluate {name: callable} concurrently, one worker thread (and connection) per query."""
+    results = await asyncio.gather(*(run_in_worker(query) for query in queries.values()))
+    return dict(zip(queries, results))
+
+
+def async_get_view(view):
+    """
+    Wrap an async view returning a dict: GET/HEAD only, and the dict is rendered
+    like the default DRF renderer so the output matches the sync DRF endpoint.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return HttpResponseNotAllowed(['GET', 'HEAD'])
+        result = await view(request, *args, **kwargs)
+        if isinstance(result, HttpResponseBase):
+            return result
+        return HttpResponse(render_json(result), content_type='application/json')
+    return wrapper
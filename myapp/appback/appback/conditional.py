@@ -0,0 +1,128 @@
+# appback/conditional.py
+"""
+Conditional GET support (ETag / Last-Modified) for read-mostly endpoints.
+
+- `conditional_on_versions(*labels)` derives validators from model version stamps
+  (appback/versioning.py) and answers If-None-Match / If-Modified-Since with 304
+  before the view body runs, so no queries or serializers are executed.
+- `ConditionalGetMixin` applies the same check to a ViewSet's list and retrieve.
+- `static_etag` is for endpoints whose payload never changes within a process
+  (choice lists, field metadata): the data is built once and rendered per request
+  by the negotiated renderer.
+"""
+import hashlib
+import math
+import time
+from functools import wraps
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .renderers import render_json
+from .versioning import get_versions, get_last_modified
+
+
+def _request_from_args(args):
+    # View methods receive (self, request, ...); function views receive (request, ...)
+    return args[1] if isinstance(args[0], APIView) else args[0]
+
+
+def _is_conditional_method(request):
+    return request.method in ('GET', 'HEAD')
+
+
+def _set_validators(response, etag, last_modified=None):
+    if response.status_code == 200:
+        response['ETag'] = quote_etag(etag)
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        # Let clients keep the body but revalidate it on every use
+        patch_cache_control(response, no_cache=True)
+    return response
+
+
+def versioned_validators(request, labels):
+    """
+    Return (etag, last_modified) for `request` given the model labels its response
+    depends on. The ETag covers the negotiated media type, so a JSON copy never
+    validates a msgpack request. Last-Modified has one-second resolution: it is
+    rounded up, and left out while the latest write is under a second old, since a
+    second write within that second would carry the same value.
+    """
+    versions = get_versions(*labels)
+    fingerprint = f"{request.get_full_path()}|{request.accepted_media_type}|{'|'.join(labels)}|{versions}"
+    etag = hashlib.md5(fingerprint.encode()).hexdigest()
+    last_modified = get_last_modified(*labels)
+    if last_modified is None or time.time() - last_modified < 1:
+        return etag, None
+    return etag, math.ceil(last_modified)
+
+
+def conditional_view(request, labels, view_method, *args, **kwargs):
+    """Run `view_method` unless the client's cached copy is still current for `labels`."""
+    if not _is_conditional_method(request):
+        return view_method(*args, **kwargs)
+
+    etag, last_modified = versioned_validators(request, labels)
+    not_modified = get_conditional_response(request, etag=quote_etag(etag), last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+    return _set_validators(view_method(*args, **kwargs), etag, last_modified)
+
+
+def conditional_on_versions(*labels):
+    """Decorator for function views and ViewSet actions whose output depends only on `labels`."""
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(*args, **kwargs):
+            request = _request_from_args(args)
+            return conditional_view(request, labels, view_method, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class ConditionalGetMixin:
+    """
+    ViewSet mixin adding ETag/Last-Modified handling to list and retrieve.
+    Set `etag_version_labels` to every model label the serialized output reads.
+    """
+    etag_version_labels = ()
+
+    def list(self, request, *args, **kwargs):
+        return conditional_view(request, self.etag_version_labels, super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return conditional_view(request, self.etag_version_labels, super().retrieve, request, *args, **kwargs)
+
+
+def static_etag(view_method):
+    """
+    Decorator for endpoints returning constant data. The first successful response's
+    data is kept; later requests are answered from it, or with a 304 when the client
+    already holds it. The body is rendered by the renderer DRF negotiated for the
+    request, and that media type is part of the ETag.
+    """
+    cached = {}
+
+    @wraps(view_method)
+    def wrapper(*args, **kwargs):
+        request = _request_from_args(args)
+        if not _is_conditional_method(request):
+            return view_method(*args, **kwargs)
+
+        if 'data' not in cached:
+            response = view_method(*args, **kwargs)
+            if response.status_code != 200:
+                return response
+            cached['data'] = response.data
+            cached['fingerprint'] = hashlib.md5(render_json(response.data)).hexdigest()
+
+        etag = hashlib.md5(f"{cached['fingerprint']}|{request.accepted_media_type}".encode()).hexdigest()
+        not_modified = get_conditional_response(request, etag=quote_etag(etag))
+        if not_modified is not None:
+            return not_modified
+        return _set_validators(Response(cached['data']), etag)
+
+    return wrapper
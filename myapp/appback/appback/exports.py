@@ -0,0 +1,106 @@
+# appback/exports.py
+"""
+Streaming CSV / NDJSON exports.
+
+`ExportMixin` adds an `export` list action to a ViewSet. Rows come straight
+from `queryset.values(...).iterator()` and are written to a
+StreamingHttpResponse as they are fetched, so memory stays flat and the first
+bytes go out before the query has finished. The ViewSet's filter backends
+(FilterSet, search, ordering) are applied exactly as for `list`; pagination
+and serializers are not used.
+
+    GET /api/job-items/export/?format=csv&artisan=3
+    GET /api/job-items/export/?format=ndjson
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.decorators import action
+from rest_framework.renderers import BaseRenderer
+
+from appback.replicas import replica_reads
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class _StreamRenderer(BaseRenderer):
+    """
+    Lets DRF's content negotiation accept ?format=csv / ?format=ndjson. Successful
+    exports bypass it with a StreamingHttpResponse; only error payloads are rendered here.
+    """
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return json.dumps(data, cls=DjangoJSONEncoder).encode(self.charset)
+
+
+class CSVRenderer(_StreamRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class NDJSONRenderer(_StreamRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+
+class _Echo:
+    """File-like object whose write() returns the line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_rows(headers, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(headers)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def _ndjson_rows(headers, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(headers, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+def stream_export(queryset, fields, export_format='csv', filename='export', chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Stream `queryset` as CSV or NDJSON.
+    `fields` is a list of (column_name, lookup) pairs, e.g. ('artisan', 'artisan__name').
+    """
+    headers = [column for column, _ in fields]
+    # Rows are fetched after the view has returned, so fix the database (see appback/replicas.py) now
+    queryset = queryset.using(queryset.db)
+    rows = queryset.values_list(*[lookup for _, lookup in fields]).iterator(chunk_size=chunk_size)
+
+    if export_format == 'ndjson':
+        content, content_type, extension = _ndjson_rows(headers, rows), NDJSONRenderer.media_type, 'ndjson'
+    else:
+        content, content_type, extension = _csv_rows(headers, rows), CSVRenderer.media_type, 'csv'
+
+    response = StreamingHttpResponse(content, content_type=content_type)
+    stamp = timezone.localtime().strftime('%Y%m%d-%H%M%S')
+    response['Content-Disposition'] = f'attachment; filename="{filename}-{stamp}.{extension}"'
+    return response
+
+
+class ExportMixin:
+    """
+    ViewSet mixin adding GET <list-url>/export/. Set `export_fields` to the
+    (column_name, lookup) pairs to write and `export_filename` to the file stem.
+    """
+    export_fields = []
+    export_filename = 'export'
+
+    @action(detail=False, methods=['get'], renderer_classes=[CSVRenderer, NDJSONRenderer])
+    @replica_reads
+    def export(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return stream_export(
+            queryset, self.export_fields, request.accepted_renderer.format, self.export_filename
+        )
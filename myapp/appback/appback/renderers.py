@@ -0,0 +1,76 @@
+# appback/renderers.py
+"""
+Fast response renderers.
+
+`ORJSONRenderer` replaces DRF's JSONRenderer as the default. It writes the same
+JSON, with UTC datetimes ending in 'Z' and lazy strings and querysets handled as
+DRF's encoder handles them, but encodes in C.
+
+Decimal values left in a payload are written as numbers, as DRF does. These are
+aggregates built in views, or every DecimalField when
+REST_FRAMEWORK['COERCE_DECIMAL_TO_STRING'] is False. Set
+RENDER_DECIMALS_AS_STRINGS to write them as exact strings instead. Serializer
+DecimalFields are strings by default and are untouched either way.
+
+`MessagePackRenderer` (?format=msgpack or Accept: application/msgpack) is for
+internal clients. It needs the optional msgpack package; settings.py only
+registers it when msgpack is installed.
+"""
+import decimal
+
+import orjson
+from django.conf import settings
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+_drf_encoder = JSONEncoder()
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+def _decimal_as_number(obj):
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    return _drf_encoder.default(obj)
+
+
+def _decimal_as_string(obj):
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    return _drf_encoder.default(obj)
+
+
+def _default():
+    # Looked up once per render rather than once per Decimal
+    return _decimal_as_string if getattr(settings, 'RENDER_DECIMALS_AS_STRINGS', False) else _decimal_as_number
+
+
+def render_json(data, indent=False):
+    """Encode `data` as DRF's JSONRenderer would, using orjson."""
+    content = orjson.dumps(data, default=_default(), option=_ORJSON_OPTIONS | (orjson.OPT_INDENT_2 if indent else 0))
+    # Keep the output valid JavaScript, as DRF does
+    return content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class ORJSONRenderer(JSONRenderer):
+    """Drop-in JSONRenderer built on orjson."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        return render_json(data, indent=bool(indent))
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        import msgpack  # Optional dependency, only needed when a client asks for msgpack
+
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_default(), use_bin_type=True)
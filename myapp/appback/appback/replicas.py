@@ -0,0 +1,117 @@
+# appback/replicas.py
+"""
+Optional read replica for reporting and list endpoints.
+
+When DATABASE_REPLICA_URL is set, settings.py adds a 'replica' database.
+`ReplicaRouter` sends reads there only while a designated view handles a safe
+request; everything else, including every write, uses 'default'.
+
+Designate a view with `@replica_reads`. This works on function views (outside
+@api_view) and on ViewSet action methods. Inherited ViewSet actions are listed
+in `replica_actions`, e.g. `replica_actions = ('list',)`.
+
+Read-your-writes: after a client's successful write, `ReplicaRoutingMiddleware`
+sets a short-lived cookie. While it is present that client's reads stay on the
+primary, so the replica has REPLICA_PIN_SECONDS to catch up.
+
+Views that cache results under version stamps (capacity plan, inventory cube,
+ConditionalGetMixin ETags) must stay on the primary. A lagging replica would
+store stale data under a fresh version.
+"""
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+REPLICA_DATABASE = 'replica'
+PIN_COOKIE = 'db_pin_primary'
+DEFAULT_PIN_SECONDS = 5
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_reads_from_replica = ContextVar('reads_from_replica', default=False)
+
+
+def replica_configured():
+    return REPLICA_DATABASE in connections
+
+
+def replica_reads(view):
+    """Mark a view (or ViewSet action) whose safe requests may read from the replica."""
+    view.reads_from_replica = True
+    return view
+
+
+def _designated(view_func, request):
+    if getattr(view_func, 'reads_from_replica', False):
+        return True
+    viewset = getattr(view_func, 'cls', None)
+    action = (getattr(view_func, 'actions', None) or {}).get(request.method.lower())
+    if viewset is None or action is None:
+        return False
+    return action in getattr(viewset, 'replica_actions', ()) or getattr(getattr(viewset, action, None), 'reads_from_replica', False)
+
+
+class ReplicaRouter:
+    """Reads go to the replica inside designated views; all writes go to default."""
+
+    def db_for_read(self, model, **hints):
+        if _reads_from_replica.get() and replica_configured():
+            return REPLICA_DATABASE
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # Both aliases hold the same data
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Switches designated safe requests onto the replica, unless the client wrote
+    within the last REPLICA_PIN_SECONDS. Works under WSGI and ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            self._leave(request)
+        return self._pin(request, response)
+
+    async def __acall__(self, request):
+        try:
+            response = await self.get_response(request)
+        finally:
+            self._leave(request)
+        return self._pin(request, response)
+
+    def _leave(self, request):
+        if getattr(request, '_reads_from_replica', False):
+            # set() rather than reset(): under ASGI process_view runs in a copied context
+            _reads_from_replica.set(False)
+
+    def _pin(self, request, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=getattr(settings, 'REPLICA_PIN_SECONDS', DEFAULT_PIN_SECONDS),
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (request.method in SAFE_METHODS and PIN_COOKIE not in request.COOKIES
+                and replica_configured() and _designated(view_func, request)):
+            request._reads_from_replica = True
+            _reads_from_replica.set(True)
+        return None
@@ -0,0 +1,172 @@
+# appback/response_cache.py
+"""
+Server-side cache of serialized API responses, invalidated by model version stamps.
+
+`cache_on_versions(*labels)` caches the data of a function view or ViewSet action
+under a key built from the host, path, sorted query parameters and the current
+version stamps of `labels` (appback/versioning.py). Saving or deleting a row of
+any tracked model bumps its stamp, so the next request misses and is rebuilt;
+superseded entries expire after RESPONSE_CACHE_TIMEOUT. `CachedResponseMixin`
+does the same for a ViewSet's list and retrieve.
+
+Only the `data` of 200 responses to GET/HEAD is stored. Rendering still happens
+per request, so content negotiation works as before. Versions are read before
+the view runs, and stamps are only bumped once the writing transaction commits
+(appback/versioning.py). A write racing with a miss can therefore only make the
+entry look older than it is, never newer: data read before the commit is stored
+under the stamp that the commit then supersedes.
+
+Requests routed to the read replica (appback/replicas.py) may be answered from
+the cache but never fill it: a lagging replica would store stale data under a
+fresh version.
+
+Hits and misses are counted per view in the cache itself, so the numbers cover
+every worker sharing it. `cache_stats()` returns them and `/api/cache-stats/`
+exposes them to staff.
+"""
+import hashlib
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from .conditional import _request_from_args
+from .versioning import get_versions
+
+RESPONSE_KEY_PREFIX = 'response:'
+STATS_KEY_PREFIX = 'response-stats:'
+DEFAULT_TIMEOUT = 600
+OUTCOMES = ('hits', 'misses')
+
+_MISSING = object()
+_cached_views = set()  # Names of every cached view, filled as view modules are imported
+
+
+def _view_name(view, action=None):
+    """Short stats name, e.g. 'customers.customer_list' or 'products.ProductViewSet.list'."""
+    name = f"{view.__module__.split('.')[0]}.{view.__qualname__}"
+    return f"{name}.{action}" if action else name
+
+
+def response_cache_key(request, view_name, labels):
+    """Cache key for `request` to `view_name`, whose output depends on model `labels`."""
+    query = urlencode(sorted((key, value) for key, values in request.GET.lists() for value in values))
+    fingerprint = f"{view_name}|{request.get_host()}|{request.path}|{query}|{'|'.join(labels)}|{get_versions(*labels)}"
+    return RESPONSE_KEY_PREFIX + hashlib.md5(fingerprint.encode()).hexdigest()
+
+
+def _stats_key(view_name, outcome):
+    return f"{STATS_KEY_PREFIX}{view_name}:{outcome}"
+
+
+def _count(view_name, outcome):
+    key = _stats_key(view_name, outcome)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def cached_view(request, view_name, labels, view_method, *args, **kwargs):
+    """Serve `view_method`'s data from the cache while the versions of `labels` are unchanged."""
+    if request.method not in ('GET', 'HEAD'):
+        return view_method(*args, **kwargs)
+
+    key = response_cache_key(request, view_name, labels)
+    data = cache.get(key, _MISSING)
+    if data is not _MISSING:
+        _count(view_name, 'hits')
+        return Response(data)
+
+    _count(view_name, 'misses')
+    response = view_method(*args, **kwargs)
+    if (isinstance(response, Response) and response.status_code == 200
+            and not getattr(request, '_reads_from_replica', False)):
+        cache.set(key, response.data, timeout=getattr(settings, 'RESPONSE_CACHE_TIMEOUT', DEFAULT_TIMEOUT))
+    return response
+
+
+def cache_on_versions(*labels):
+    """
+    Decorator for function views (inside @api_view) and ViewSet actions whose
+    output depends only on the request and the models in `labels`.
+    """
+    def decorator(view_method):
+        view_name = _view_name(view_method)
+        _cached_views.add(view_name)
+
+        @wraps(view_method)
+        def wrapper(*args, **kwargs):
+            request = _request_from_args(args)
+            return cached_view(request, view_name, labels, view_method, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class CachedResponseMixin:
+    """
+    ViewSet mixin caching list and retrieve responses.
+    Set `cache_version_labels` to every model label the serialized output reads;
+    it defaults to `etag_version_labels` when combined with ConditionalGetMixin.
+    Place it after ConditionalGetMixin so 304s are answered before the cache is read.
+    """
+    cache_version_labels = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for action in ('list', 'retrieve'):
+            _cached_views.add(_view_name(cls, action))
+
+    def _cache_labels(self):
+        return self.cache_version_labels or getattr(self, 'etag_version_labels', ())
+
+    def list(self, request, *args, **kwargs):
+        return cached_view(request, _view_name(type(self), 'list'), self._cache_labels(), super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return cached_view(request, _view_name(type(self), 'retrieve'), self._cache_labels(), super().retrieve, request, *args, **kwargs)
+
+
+def cache_stats():
+    """Return {view name: {'hits', 'misses', 'hit_rate'}} for every cached view."""
+    names = sorted(_cached_views)
+    found = cache.get_many([_stats_key(name, outcome) for name in names for outcome in OUTCOMES])
+    stats = {}
+    for name in names:
+        hits, misses = (found.get(_stats_key(name, outcome), 0) for outcome in OUTCOMES)
+        stats[name] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 3) if hits + misses else None,
+        }
+    return stats
+
+
+def reset_cache_stats():
+    cache.delete_many([_stats_key(name, outcome) for name in _cached_views for outcome in OUTCOMES])
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAdminUser])
+def response_cache_stats(request):
+    """
+    GET    /api/cache-stats/  hit/miss counters per cached view, plus totals
+    DELETE /api/cache-stats/  reset the counters
+    """
+    if request.method == 'DELETE':
+        reset_cache_stats()
+    stats = cache_stats()
+    hits = sum(view['hits'] for view in stats.values())
+    misses = sum(view['misses'] for view in stats.values())
+    return Response({
+        'backend': settings.CACHES['default']['BACKEND'],
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / (hits + misses), 3) if hits + misses else None,
+        'views': stats,
+    })
@@ -1,4 +1,5 @@
 # myapp_backend/settings.py
+import importlib.util
 import os
 from pathlib import Path
 import dotenv
@@ -37,6 +38,8 @@ INSTALLED_APPS = [
     'inventory',
     'orders',
     'payslips',
+    'search',
+    'sync',
 ]
 
 MIDDLEWARE = [
@@ -46,6 +49,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'appback.replicas.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -78,18 +82,57 @@ DATABASES = {
     )
 }
 
+# Optional read replica for reporting and list endpoints (see appback/replicas.py)
+if os.environ.get('DATABASE_REPLICA_URL'):
+    DATABASES['replica'] = dj_database_url.parse(
+        os.environ['DATABASE_REPLICA_URL'],
+        conn_max_age=600,
+        conn_health_checks=True,
+        ssl_require=True,
+    )
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}  # ReplicaDatabaseTest (appback/tests.py) brings its own
+
+DATABASE_ROUTERS = ['appback.replicas.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 5))  # Read-your-writes window after a client's write
+
+# Cache backing the model version stamps (appback/versioning.py) and cached API
+# responses (appback/response_cache.py). Unset: per-process local memory, fine for
+# runserver. With several workers set CACHE_URL to a shared cache
+# (redis://host:6379/0) or at least a shared directory (file:///var/tmp/appback-cache);
+# settings_production.py requires it and gunicorn.conf.py refuses to start without it.
+CACHE_URL = os.environ.get('CACHE_URL', '')
+if CACHE_URL.startswith(('redis://', 'rediss://')):
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': CACHE_URL}}
+elif CACHE_URL.startswith('file://'):
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': CACHE_URL[len('file://'):]}}
+else:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'appback'}}
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 600))  # Seconds; version bumps invalidate sooner
+# /api/events/ change feed (sync/feed.py)
+EVENTS_POLL_INTERVAL = float(os.environ.get('EVENTS_POLL_INTERVAL', 1.0))  # Seconds between change-log polls, per process
+SYNC_SAFETY_SECONDS = int(os.environ.get('SYNC_SAFETY_SECONDS', 60))  # Delta-sync cursors lag the clock by this (sync/filters.py)
+EVENTS_STREAM_SECONDS = int(os.environ.get('EVENTS_STREAM_SECONDS', 300))  # Streams end after this; clients reconnect with Last-Event-ID
+
 # REST Framework configuration
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',  # Change this for production
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'appback.renderers.ORJSONRenderer',  # Same output as DRF's JSONRenderer, encoded in C
+    ],
+    'DEFAULT_FILTER_BACKENDS': [
+        'sync.filters.UpdatedSinceFilter',  # ?updated_since= on every list endpoint
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 100,
 }
 
+# MessagePack responses for internal clients, when the optional msgpack package is installed
+if importlib.util.find_spec('msgpack'):
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append('appback.renderers.MessagePackRenderer')
+RENDER_DECIMALS_AS_STRINGS = False  # Raw Decimals in payloads render as numbers, as with DRF's encoder
+
 # CORS settings (for frontend connections)
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",  # React default
@@ -0,0 +1,65 @@
+# appback/settings_production.py
+"""
+Production profile. Select it with DJANGO_SETTINGS_MODULE=appback.settings_production
+(the Dockerfile does). Everything not overridden here comes from settings.py.
+
+Required environment: SECRET_KEY, DATABASE_URL, ALLOWED_HOSTS (comma separated),
+CACHE_URL (a cache shared by every worker, see settings.py).
+Optional: CORS_ALLOWED_ORIGINS (comma separated), DATABASE_REPLICA_URL.
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .settings import *  # noqa: F401,F403
+from .settings import CACHE_URL, INSTALLED_APPS, TEMPLATES
+
+
+def _csv_env(name, default=''):
+    return [value.strip() for value in os.environ.get(name, default).split(',') if value.strip()]
+
+
+DEBUG = os.environ.get('DEBUG', 'False').lower() in ('1', 'true', 'yes')
+
+SECRET_KEY = os.environ['SECRET_KEY']
+ALLOWED_HOSTS = _csv_env('ALLOWED_HOSTS')
+
+# Version stamps, ETags, the product catalog and cached responses all live in the
+# default cache. Per-process local memory would leave the other workers serving stale data.
+if not CACHE_URL:
+    raise ImproperlyConfigured(
+        "Set CACHE_URL to a cache shared by all workers (redis://host:6379/0 or file:///var/tmp/appback-cache)."
+    )
+
+# Development-only apps stay out of the production import graph
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app != 'django_extensions']
+
+# Templates (admin, DRF browsable errors) are compiled once per process
+TEMPLATES = [{
+    **TEMPLATES[0],
+    'APP_DIRS': False,
+    'OPTIONS': {
+        **TEMPLATES[0]['OPTIONS'],
+        'loaders': [
+            ('django.template.loaders.cached.Loader', [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ]),
+        ],
+    },
+}]
+
+CORS_ALLOW_ALL_ORIGINS = False
+CORS_ALLOWED_ORIGINS = _csv_env('CORS_ALLOWED_ORIGINS')
+
+# TLS terminates at the load balancer
+SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
+SESSION_COOKIE_SECURE = True
+CSRF_COOKIE_SECURE = True
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {'console': {'class': 'logging.StreamHandler'}},
+    'root': {'handlers': ['console'], 'level': os.environ.get('LOG_LEVEL', 'INFO')},
+}
@@ -0,0 +1,97 @@
+# appback/sparse.py
+"""
+Sparse fieldsets (?fields=) and on-demand expansion (?expand=) for read endpoints.
+
+    GET /api/artisans/?fields=id,name
+    GET /api/job-items/?expand=deliveries
+    GET /api/jobs/42/?expand=items.deliveries,items.service_rate_per_unit
+    GET /api/jobs/42/?fields=job_id,status,items.id,items.quantity_ordered
+
+`SparseFieldsMixin` (serializers):
+- `?fields=` keeps only the listed fields. Dotted names reach into nested serializers.
+- `expandable_fields` are expensive nested or computed fields. A GET leaves them out
+  unless `?expand=` names them; naming a field in `?expand=` also keeps it under `?fields=`.
+- `field_queryset_hints` maps a field to the select_related / prefetch_related /
+  annotate it needs. `shape_queryset(queryset, request)` applies the hints of the
+  fields that will actually be rendered, so unrequested data is never queried.
+  A prefetch given as (lookup, serializer_class, queryset) shapes the prefetched
+  queryset for that nested serializer too.
+
+Only GET/HEAD requests are pruned. Writes, and serializers used without a request
+in their context, render every field, expandable ones included.
+
+`SparseQuerysetMixin` (ViewSets) shapes `get_queryset()` for the action's serializer.
+"""
+from django.db.models import Prefetch
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+def _paths(request, param):
+    params = getattr(request, 'query_params', None) or request.GET
+    return [path.strip() for path in params.get(param, '').split(',') if path.strip()]
+
+
+def _level(paths, prefix):
+    """First name below `prefix` for each dotted path under it."""
+    return {path[len(prefix):].split('.')[0] for path in paths if path.startswith(prefix) and len(path) > len(prefix)}
+
+
+class SparseFieldsMixin:
+    expandable_fields = ()
+    field_queryset_hints = {}
+
+    @classmethod
+    def selected_fields(cls, names, request, prefix=''):
+        """Which of `names` to render for `request`, for a serializer nested at `prefix`."""
+        if request is None or request.method not in SAFE_METHODS:
+            return list(names)
+        fields = _level(_paths(request, 'fields'), prefix)
+        expand = _level(_paths(request, 'expand'), prefix)
+        selected = [name for name in names if name not in cls.expandable_fields or name in expand]
+        if fields:
+            selected = [name for name in selected if name in fields or name in expand]
+        return selected
+
+    @classmethod
+    def shape_queryset(cls, queryset, request, prefix=''):
+        """Apply the queryset hints of the fields `request` will render."""
+        for name in cls.selected_fields(cls.field_queryset_hints, request, prefix):
+            hint = cls.field_queryset_hints[name]
+            if hint.get('select'):
+                queryset = queryset.select_related(*hint['select'])
+            for lookup in hint.get('prefetch', ()):
+                if isinstance(lookup, tuple):
+                    lookup, serializer_class, nested_queryset = lookup
+                    lookup = Prefetch(lookup, queryset=serializer_class.shape_queryset(
+                        nested_queryset, request, prefix=f'{prefix}{name}.'
+                    ))
+                queryset = queryset.prefetch_related(lookup)
+            if hint.get('annotate'):
+                queryset = queryset.annotate(**hint['annotate'])
+        return queryset
+
+    def _field_prefix(self):
+        names = []
+        node = self
+        while node.parent is not None:
+            if node.field_name:  # A ListSerializer's child is bound without a name
+                names.append(node.field_name)
+            node = node.parent
+        return ''.join(f'{name}.' for name in reversed(names))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selected = set(self.selected_fields(fields, self.context.get('request'), self._field_prefix()))
+        return {name: field for name, field in fields.items() if name in selected}
+
+
+class SparseQuerysetMixin:
+    """ViewSet mixin: shape the queryset for the fields the action's serializer will render."""
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        serializer_class = self.get_serializer_class()
+        if issubclass(serializer_class, SparseFieldsMixin):
+            queryset = serializer_class.shape_queryset(queryset, self.request)
+        return queryset
@@ -0,0 +1,29 @@
+# appback/testing.py
+"""
+Shared test fixtures.
+
+`ProductionFixtures` builds the small production setup most API tests start from:
+one product with a CARVING service rate, an artisan, a CARVING job and one job
+item. TestCase classes get it once per class through setUpTestData;
+TransactionTestCase classes call `create_production_data()` from setUp.
+"""
+from artisans.models import Artisan
+from jobs.models import Job, JobItem, ServiceRate
+from products.models import Product
+
+
+class ProductionFixtures:
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.create_production_data()
+
+    @classmethod
+    def create_production_data(cls):
+        cls.product = Product.objects.create(
+            product_type='SITTING_ANIMAL', animal_type='Elephant', size_category='MEDIUM', base_price=10
+        )
+        cls.rate = ServiceRate.objects.create(product=cls.product, service_category='CARVING', rate_per_unit=5)
+        cls.artisan = Artisan.objects.create(name='Amani')
+        cls.job = Job.objects.create(created_by='planner', service_category='CARVING')
+        cls.item = JobItem.objects.create(job=cls.job, artisan=cls.artisan, product=cls.product, quantity_ordered=10)
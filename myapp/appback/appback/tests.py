@@ -0,0 +1,198 @@
+import datetime
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+
+from appback.renderers import ORJSONRenderer
+from appback.replicas import PIN_COOKIE, REPLICA_DATABASE, ReplicaRoutingMiddleware
+from appback.testing import ProductionFixtures
+from customers.models import Customer
+from jobs.models import Job, JobDelivery
+from jobs.views import JobItemViewSet, JobViewSet, production_rollups
+from products.views import ProductViewSet
+
+
+class ReplicaRoutingTest(TestCase):
+    """Routing decisions of appback/replicas.py; no second database needed."""
+
+    def route(self, view, method='GET', cookies=None):
+        seen = {}
+
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            seen['db'] = Job.objects.all().db
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        request = RequestFactory().generic(method, '/')
+        request.COOKIES.update(cookies or {})
+        with mock.patch('appback.replicas.replica_configured', return_value=True):
+            response = middleware(request)
+        return seen['db'], response
+
+    def test_designated_views_read_from_replica(self):
+        self.assertEqual(self.route(production_rollups)[0], 'replica')
+        self.assertEqual(self.route(JobViewSet.as_view({'get': 'list'}))[0], 'replica')
+        self.assertEqual(self.route(JobViewSet.as_view({'get': 'dashboard'}))[0], 'replica')
+        self.assertEqual(self.route(JobViewSet.as_view({'get': 'export'}))[0], 'replica')
+        self.assertEqual(self.route(JobViewSet.as_view({'get': 'retrieve'}))[0], 'default')
+        self.assertEqual(self.route(ProductViewSet.as_view({'get': 'list'}))[0], 'default')
+        # The switch ends with the request
+        self.assertEqual(Job.objects.all().db, 'default')
+
+    def test_writes_pin_the_client_to_the_primary(self):
+        db, response = self.route(JobViewSet.as_view({'post': 'create'}), method='POST')
+        self.assertEqual(db, 'default')
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+        db, _ = self.route(JobViewSet.as_view({'get': 'list'}), cookies={PIN_COOKIE: '1'})
+        self.assertEqual(db, 'default')
+
+
+def install_scratch_replica():
+    """
+    Point the replica alias at a fresh, migrated in-memory SQLite database, in place
+    of any replica (or TEST MIRROR) from settings. Returns what it replaced.
+    """
+    saved_settings = connections.settings.get(REPLICA_DATABASE)
+    saved_connection = None
+    if saved_settings is not None:
+        saved_connection = connections[REPLICA_DATABASE]
+        del connections[REPLICA_DATABASE]
+    connections.settings[REPLICA_DATABASE] = connections.configure_settings({
+        DEFAULT_DB_ALIAS: dict(connections.settings[DEFAULT_DB_ALIAS]),
+        REPLICA_DATABASE: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'},
+    })[REPLICA_DATABASE]
+    connections[REPLICA_DATABASE].creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    return saved_settings, saved_connection
+
+
+def restore_replica(saved_settings, saved_connection):
+    connections[REPLICA_DATABASE].creation.destroy_test_db(':memory:', verbosity=0)
+    del connections[REPLICA_DATABASE]
+    if saved_settings is None:
+        del connections.settings[REPLICA_DATABASE]
+    else:
+        connections.settings[REPLICA_DATABASE] = saved_settings
+        connections[REPLICA_DATABASE] = saved_connection
+
+
+class ReplicaDatabaseTest(TestCase):
+    """
+    End to end against two databases. The class gets its own SQLite replica,
+    which is migrated but never written, so it stays empty.
+    """
+    @classmethod
+    def setUpClass(cls):
+        # The runner only sets up aliases from settings, so the replica joins `databases` here
+        cls.addClassCleanup(restore_replica, *install_scratch_replica())
+        cls.databases = {DEFAULT_DB_ALIAS, REPLICA_DATABASE}
+        super().setUpClass()
+
+    def test_reports_read_replica_until_client_writes(self):
+        client = APIClient()
+        job = Job.objects.create(created_by='planner', service_category='CARVING')
+        self.assertEqual(client.get('/api/jobs/dashboard/').data['total_jobs'], 0)
+        self.assertEqual(client.get('/api/jobs/').data['count'], 0)
+
+        response = client.patch(f'/api/jobs/{job.job_id}/', {'notes': 'Rush'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(client.get('/api/jobs/dashboard/').data['total_jobs'], 1)
+
+
+class StartupTest(TestCase):
+    def test_cold_start_does_not_import_reportlab(self):
+        out = StringIO()
+        # An unknown path still loads the full URLconf, and with it every view module
+        call_command('benchmark_startup', '--runs', '1', '--path', '/no-such-page/', stdout=out)
+        self.assertIn('404 Not Found', out.getvalue())
+        self.assertIn('reportlab imported at start-up: no', out.getvalue())
+
+
+class RendererTest(TestCase):
+    def test_orjson_output_matches_drf(self):
+        data = {
+            'when': timezone.make_aware(datetime.datetime(2025, 7, 8, 9, 30)), 'day': datetime.date(2025, 7, 8),
+            'rate': Decimal('3.75'), 'label': gettext_lazy('Carving'), 'note': 'line\u2028break', 1: [None, True],
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_decimals_can_render_as_strings(self):
+        self.assertEqual(ORJSONRenderer().render({'rate': Decimal('3.10')}), b'{"rate":3.1}')
+        with override_settings(RENDER_DECIMALS_AS_STRINGS=True):
+            self.assertEqual(ORJSONRenderer().render({'rate': Decimal('3.10')}), b'{"rate":"3.10"}')
+
+    def test_api_responses_use_orjson(self):
+        response = self.client.get('/api/jobs/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.accepted_renderer, ORJSONRenderer)
+
+    def test_benchmark_command_reports_renderers(self):
+        out = StringIO()
+        call_command('benchmark_renderers', '--items', '5', '--iterations', '2', stdout=out)
+        self.assertIn('orjson output matches DRF: yes', out.getvalue())
+        self.assertFalse(Job.objects.exists())
+
+
+class SparseFieldsTest(ProductionFixtures, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        JobDelivery.objects.create(job_item=cls.item, quantity_received=2, quantity_accepted=2)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def list_items(self, **params):
+        # The router's job-items/ route sits behind <job_id>/ in jobs/urls.py, so call the ViewSet directly
+        response = JobItemViewSet.as_view({'get': 'list'})(APIRequestFactory().get('/api/jobs/job-items/', params))
+        return response.data['results']
+
+    def test_fields_prunes_and_expand_adds_expensive_fields(self):
+        items = self.list_items(fields='id,quantity_ordered')
+        self.assertEqual(set(items[0]), {'id', 'quantity_ordered'})
+
+        items = self.list_items()
+        self.assertNotIn('deliveries', items[0])
+        self.assertNotIn('service_rate_per_unit', items[0])
+
+        items = self.list_items(expand='deliveries,service_rate_per_unit')
+        self.assertEqual(len(items[0]['deliveries']), 1)
+        self.assertEqual(Decimal(str(items[0]['service_rate_per_unit'])), self.rate.rate_per_unit)
+
+    def test_nested_expand_on_job_detail(self):
+        job = self.client.get(f'/api/jobs/{self.job.job_id}/', {
+            'fields': 'job_id,items.id', 'expand': 'items.deliveries',
+        }).json()
+        self.assertEqual(set(job), {'job_id', 'items'})
+        self.assertEqual(set(job['items'][0]), {'id', 'deliveries'})
+
+    def test_writes_render_every_field(self):
+        response = self.client.patch(f'/api/jobs/{self.job.job_id}/', {'notes': 'rush'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_sparse_customer_list_skips_order_aggregates(self):
+        Customer.objects.create(name='Wanjiru', phone='+254700000001')
+        with CaptureQueriesContext(connection) as full:
+            self.client.get('/api/customers/')
+        with CaptureQueriesContext(connection) as sparse:
+            response = self.client.get('/api/customers/', {'fields': 'id,name'})
+        self.assertEqual(set(response.json()['results'][0]), {'id', 'name'})
+        self.assertNotIn('SUM(', ' '.join(query['sql'] for query in sparse.captured_queries).upper())
+        self.assertLessEqual(len(sparse.captured_queries), len(full.captured_queries))
+
+    def test_artisan_retrieve_expands_jobs(self):
+        artisan = self.client.get(f'/api/artisans/{self.artisan.id}/').json()
+        self.assertNotIn('jobs', artisan)
+        artisan = self.client.get(f'/api/artisans/{self.artisan.id}/', {'expand': 'jobs'}).json()
+        self.assertEqual(len(artisan['jobs']), 1)
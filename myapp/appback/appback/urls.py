@@ -21,6 +21,8 @@ from django.conf import settings
 from django.conf.urls.static import static
 from jobs.urls import standalone_router # Import the standalone_router
 from jobs.views import ServiceRateViewSet # Import ServiceRateViewSet
+from appback.response_cache import response_cache_stats
+from sync.views import change_events
 
 def api_root(request):
     return JsonResponse({
@@ -35,6 +37,9 @@ def api_root(request):
             "orders": "/api/orders/",
             "payslips": "/api/payslips/",
             "service-rates": "/api/service-rates/",
+            "search": "/api/search/",
+            "sync": "/api/sync/deleted/",
+            "events": "/api/events/",
         }
     })
 
@@ -48,7 +53,11 @@ urlpatterns = [
     path('api/inventory/', include('inventory.urls')),
     path('api/orders/', include('orders.urls')),
     path('api/payslips/', include('payslips.urls')),
+    path('api/search/', include('search.urls')),
+    path('api/sync/', include('sync.urls')),
+    path('api/events/', change_events, name='change-events'),  # Server-sent events; ASGI only
     path('api/service-rates/', ServiceRateViewSet.as_view({'get': 'list'}), name='service-rate-list'),
+    path('api/cache-stats/', response_cache_stats, name='response-cache-stats'),  # Staff only
 ]
 
 # Serve media files during development
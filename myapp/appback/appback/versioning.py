@@ -0,0 +1,97 @@
+# appback/versioning.py
+"""
+Per-model version stamps stored in the default cache.
+
+Every tracked model has a counter that is bumped on post_save/post_delete,
+once the writing transaction commits. Bumping earlier would let a concurrent
+reader pick up the new stamp while it still sees the old committed rows, and
+cache those under the new stamp. Readers compare the stamp they loaded with the current one to decide whether
+in-process data derived from that model is stale. The counters live in the
+default cache, so all workers must share a cache backend for invalidation to
+reach every process.
+
+Bulk queryset operations (`.update()`, `bulk_create`, `bulk_update`) do not send
+signals; code using them must call `bump_version()` itself.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+
+VERSION_KEY_PREFIX = 'model-version:'
+MODIFIED_KEY_PREFIX = 'model-modified:'
+
+
+def _key(label):
+    return f"{VERSION_KEY_PREFIX}{label}"
+
+
+def _modified_key(label):
+    return f"{MODIFIED_KEY_PREFIX}{label}"
+
+
+def _fresh_stamp():
+    # Seed from the clock so a counter lost to eviction never repeats a value
+    # a reader may still be holding.
+    return int(time.time() * 1000)
+
+
+def model_label(model):
+    """Version label for a model class or instance, e.g. 'products.product'."""
+    return model._meta.label_lower
+
+
+def get_version(label):
+    """Return the current version stamp for `label`, initialising it if needed."""
+    version = cache.get(_key(label))
+    if version is None:
+        cache.add(_key(label), _fresh_stamp(), timeout=None)
+        version = cache.get(_key(label))
+    return version
+
+
+def get_versions(*labels):
+    """Return a tuple of version stamps for several labels in one cache round trip."""
+    keys = [_key(label) for label in labels]
+    found = cache.get_many(keys)
+    return tuple(found[key] if key in found else get_version(label) for key, label in zip(keys, labels))
+
+
+def get_last_modified(*labels):
+    """
+    Return the latest modification time (a POSIX timestamp) recorded for any of
+    `labels`, or None if none of them has been modified since the cache was filled.
+    """
+    found = cache.get_many([_modified_key(label) for label in labels])
+    if len(found) != len(labels):
+        return None
+    return max(found.values())
+
+
+def _bump(label):
+    cache.set(_modified_key(label), time.time(), timeout=None)
+    try:
+        return cache.incr(_key(label))
+    except ValueError:
+        stamp = _fresh_stamp()
+        cache.set(_key(label), stamp, timeout=None)
+        return stamp
+
+
+def bump_version(label):
+    """Invalidate everything derived from `label` when the current transaction commits."""
+    # Outside an atomic block on_commit bumps immediately; after a rollback, never
+    transaction.on_commit(lambda: _bump(label))
+
+
+def _bump_on_change(sender, **kwargs):
+    bump_version(model_label(sender))
+
+
+def track_model_versions(*models):
+    """Bump each model's version stamp whenever one of its rows is saved or deleted."""
+    for model in models:
+        label = model_label(model)
+        post_save.connect(_bump_on_change, sender=model, dispatch_uid=f'version_save_{label}')
+        post_delete.connect(_bump_on_change, sender=model, dispatch_uid=f'version_delete_{label}')
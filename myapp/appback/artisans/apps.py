@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ArtisansConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'artisans'
+
+    def ready(self):
+        # Version stamps invalidate cached API responses (appback/response_cache.py)
+        from appback.versioning import track_model_versions
+        from .models import Artisan, JobRating
+        track_model_versions(Artisan, JobRating)
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artisans', '0002_jobrating'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artisan',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -3,12 +3,13 @@ from django.core.validators import RegexValidator
 from django.db import models
 import re
 
+from appback.sparse import SparseFieldsMixin
 from .models import Artisan
 from jobs.models import JobItem, Job
 from payslips.models import Payslip
 
 
-class ArtisanSerializer(serializers.ModelSerializer):
+class ArtisanSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Basic serializer for Artisan model.
     Used for list views and basic CRUD operations.
@@ -117,10 +118,10 @@ class PayslipSummarySerializer(serializers.ModelSerializer):
         fields = ['id', 'generated_date', 'total_payment', 'period_start', 'period_end']
 
 
-class ArtisanDetailSerializer(serializers.ModelSerializer):
+class ArtisanDetailSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Detailed serializer for Artisan model.
-    Includes related jobs and payslips when requested.
+    Includes recent jobs and payslips on ?expand=jobs,payslips.
     """
     
     jobs = serializers.SerializerMethodField()
@@ -146,6 +147,8 @@ class ArtisanDetailSerializer(serializers.ModelSerializer):
             'id', 'created_date', 'createdDate', 'totalJobs', 'totalEarnings', 
             'specialties', 'lastJobDate', 'pendingPayment', 'averageRating', 'jobs', 'payslips'
         ]
+
+    expandable_fields = ('jobs', 'payslips')
     
     def get_totalJobs(self, obj):
         return obj.total_jobs
@@ -167,21 +170,17 @@ class ArtisanDetailSerializer(serializers.ModelSerializer):
     
     def get_jobs(self, obj):
         """
-        Return job summary if requested, otherwise None.
+        Return up to ten job items. Only evaluated when the field is rendered.
         """
-        if hasattr(obj, 'prefetch_jobs') and obj.prefetch_jobs:
-            job_items = JobItem.objects.filter(artisan=obj).select_related('job')[:10]
-            return JobSummarySerializer(job_items, many=True).data
-        return None
+        job_items = JobItem.objects.filter(artisan=obj).select_related('job')[:10]
+        return JobSummarySerializer(job_items, many=True).data
     
     def get_payslips(self, obj):
         """
-        Return payslip summary if requested, otherwise None.
+        Return the ten most recent payslips. Only evaluated when the field is rendered.
         """
-        if hasattr(obj, 'prefetch_payslips') and obj.prefetch_payslips:
-            payslips = Payslip.objects.filter(artisan=obj).order_by('-generated_date')[:10]
-            return PayslipSummarySerializer(payslips, many=True).data
-        return None
+        payslips = Payslip.objects.filter(artisan=obj).order_by('-generated_date')[:10]
+        return PayslipSummarySerializer(payslips, many=True).data
 
 
 class JobItemSerializer(serializers.ModelSerializer):
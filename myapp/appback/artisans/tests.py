@@ -1,3 +1,18 @@
-from django.test import TestCase
+from django.test import TransactionTestCase
 
-# Create your tests here.
+from appback.testing import ProductionFixtures
+
+
+class AsyncStatsTest(ProductionFixtures, TransactionTestCase):
+    """The async stats variant returns the sync payload; its queries run on worker-thread connections."""
+
+    def setUp(self):
+        self.create_production_data()
+
+    def test_async_stats_match_sync_endpoint(self):
+        expected = self.client.get(f'/api/artisans/{self.artisan.pk}/stats/')
+        self.assertEqual(expected.status_code, 200)
+        response = self.client.get(f'/api/artisans/{self.artisan.pk}/stats/async/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), expected.json())
+        self.assertEqual(self.client.get('/api/artisans/999/stats/async/').status_code, 404)
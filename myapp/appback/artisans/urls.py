@@ -1,12 +1,15 @@
 # artisan/urls.py
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ArtisanViewSet # Import only the ViewSet now
+from .views import ArtisanViewSet, artisan_metadata, artisan_stats, artisan_stats_async
 
 router = DefaultRouter()
 router.register(r'', ArtisanViewSet, basename='artisan')
 
 urlpatterns = [
+    path('metadata/', artisan_metadata, name='artisan-metadata'),  # Before the router so it is not taken as a pk
+    path('<int:pk>/stats/', artisan_stats, name='artisan-stats'),
+    path('<int:pk>/stats/async/', artisan_stats_async, name='artisan-stats-async'),
     path('', include(router.urls)),
     # All custom actions are now nested under /api/artisans/{pk}/ or /api/artisans/
     # E.g., /api/artisans/{pk}/activate/
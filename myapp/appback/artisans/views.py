@@ -4,13 +4,20 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly, AllowAny
 from rest_framework.pagination import PageNumberPagination
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q
+from django.db.models import Q, Count, Sum
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
 from django.db import IntegrityError
 
 from jobs.models import JobItem
 from payslips.models import Payslip
 from .models import Artisan
+from appback.conditional import static_etag
+from appback.replicas import replica_reads
+from appback.response_cache import CachedResponseMixin
+from appback.batch import BatchMixin
+from appback.concurrency import run_queries, gather_queries, async_get_view
+from sync.filters import UpdatedSinceFilter
 from .serializers import (
     ArtisanSerializer, 
     ArtisanDetailSerializer,
@@ -37,7 +44,7 @@ class ArtisanListCreateView(generics.ListCreateAPIView):
     serializer_class = ArtisanSerializer
     pagination_class = ArtisanPagination
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter, UpdatedSinceFilter]
     filterset_fields = ['is_active']
     search_fields = ['name']
     ordering_fields = ['name', 'created_date']
@@ -84,19 +91,8 @@ class ArtisanDetailView(generics.RetrieveUpdateDestroyAPIView):
         return ArtisanSerializer
     
     def get_object(self):
-        """Get artisan object with optional related data"""
-        obj = get_object_or_404(Artisan, pk=self.kwargs['pk'])
-        
-        # Check if we should include related data
-        include_jobs = self.request.query_params.get('include_jobs', 'false').lower() == 'true'
-        include_payslips = self.request.query_params.get('include_payslips', 'false').lower() == 'true'
-        
-        if include_jobs:
-            obj.prefetch_jobs = True
-        if include_payslips:
-            obj.prefetch_payslips = True
-            
-        return obj
+        """Get artisan object; related jobs and payslips are added with ?expand=jobs,payslips"""
+        return get_object_or_404(Artisan, pk=self.kwargs['pk'])
     
     def destroy(self, request, *args, **kwargs):
         """
@@ -129,7 +125,7 @@ class ArtisanJobsView(generics.ListAPIView):
     serializer_class = JobItemSerializer
     pagination_class = ArtisanPagination
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, UpdatedSinceFilter]
     filterset_fields = ['job__status', 'job__service_category']
     ordering_fields = ['job__created_date', 'job__status']
     ordering = ['-job__created_date']
@@ -168,7 +164,7 @@ class ArtisanPayslipsView(generics.ListAPIView):
     serializer_class = PayslipSerializer
     pagination_class = ArtisanPagination
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, UpdatedSinceFilter]
     ordering_fields = ['generated_date', 'total_payment']
     ordering = ['-generated_date']  # Most recent first
 
@@ -246,6 +242,7 @@ def deactivate_artisan(request, pk):
 
 
 @api_view(['GET'])
+@static_etag
 def artisan_metadata(request):
     """
     GET /api/artisans/metadata/
@@ -266,6 +263,33 @@ def artisan_metadata(request):
     return Response(metadata, status=status.HTTP_200_OK)
 
 
+def _artisan_stats_queries(artisan):
+    """Independent queries behind artisan_stats (see appback/concurrency.py)."""
+    return {
+        'total_jobs': lambda: JobItem.objects.filter(artisan=artisan).count(),
+        'completed_jobs': lambda: JobItem.objects.filter(artisan=artisan, job__status='COMPLETED').count(),
+        'in_progress_jobs': lambda: JobItem.objects.filter(artisan=artisan, job__status='IN_PROGRESS').count(),
+        'payslips': lambda: Payslip.objects.filter(artisan=artisan).aggregate(
+            total_payslips=Count('id'), total_earnings=Sum('total_payment')
+        ),
+    }
+
+
+def _artisan_stats(artisan, results):
+    return {
+        "artisan_id": artisan.id,
+        "artisan_name": artisan.name,
+        "total_jobs": results['total_jobs'],
+        "completed_jobs": results['completed_jobs'],
+        "in_progress_jobs": results['in_progress_jobs'],
+        "total_payslips": results['payslips']['total_payslips'],
+        "total_earnings": results['payslips']['total_earnings'] or 0,
+        "is_active": artisan.is_active,
+        "member_since": artisan.created_date
+    }
+
+
+@replica_reads
 @api_view(['GET'])
 @permission_classes([IsAuthenticatedOrReadOnly])
 def artisan_stats(request, pk):
@@ -276,30 +300,7 @@ def artisan_stats(request, pk):
     """
     try:
         artisan = Artisan.objects.get(pk=pk)
-        
-        # Calculate stats
-        total_jobs = JobItem.objects.filter(artisan=artisan).count()
-        completed_jobs = JobItem.objects.filter(artisan=artisan, job__status='COMPLETED').count()
-        in_progress_jobs = JobItem.objects.filter(artisan=artisan, job__status='IN_PROGRESS').count()
-        total_payslips = Payslip.objects.filter(artisan=artisan).count()
-        
-        # Calculate total earnings
-        total_earnings = sum(
-            payslip.total_payment for payslip in Payslip.objects.filter(artisan=artisan)
-        )
-        
-        stats = {
-            "artisan_id": artisan.id,
-            "artisan_name": artisan.name,
-            "total_jobs": total_jobs,
-            "completed_jobs": completed_jobs,
-            "in_progress_jobs": in_progress_jobs,
-            "total_payslips": total_payslips,
-            "total_earnings": total_earnings,
-            "is_active": artisan.is_active,
-            "member_since": artisan.created_date
-        }
-        
+        stats = _artisan_stats(artisan, run_queries(_artisan_stats_queries(artisan)))
         return Response(stats, status=status.HTTP_200_OK)
     except Artisan.DoesNotExist:
         return Response(
@@ -308,12 +309,34 @@ def artisan_stats(request, pk):
         )
 
 
-class ArtisanViewSet(viewsets.ModelViewSet):
+@replica_reads
+@async_get_view
+async def artisan_stats_async(request, pk):
+    """
+    GET /api/artisans/{id}/stats/async/
+    Same payload as artisan_stats, with its counts run concurrently.
+    """
+    try:
+        artisan = await Artisan.objects.aget(pk=pk)
+    except Artisan.DoesNotExist:
+        return JsonResponse({"error": "Artisan not found"}, status=status.HTTP_404_NOT_FOUND)
+    return _artisan_stats(artisan, await gather_queries(_artisan_stats_queries(artisan)))
+
+
+class ArtisanViewSet(CachedResponseMixin, BatchMixin, viewsets.ModelViewSet):
     queryset = Artisan.objects.all().order_by('name')  # Added ordering
     serializer_class = ArtisanSerializer
     permission_classes = [AllowAny]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    # Computed totals read jobs, job items, ratings and payslips
+    cache_version_labels = ('artisans.artisan', 'artisans.jobrating', 'jobs.job', 'jobs.jobitem', 'payslips.payslip')
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter, UpdatedSinceFilter]
     filterset_fields = ['is_active']
     search_fields = ['name']
     ordering_fields = ['name', 'created_date']
-    ordering = ['name']  # Default ordering
\ No newline at end of file
+    ordering = ['name']  # Default ordering
+
+    def get_serializer_class(self):
+        # Same fields as the list, plus recent jobs and payslips on ?expand=jobs,payslips
+        if self.action == 'retrieve':
+            return ArtisanDetailSerializer
+        return ArtisanSerializer
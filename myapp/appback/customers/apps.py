@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class CustomersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'customers'
+
+    def ready(self):
+        # Version stamps invalidate cached API responses (appback/response_cache.py)
+        from appback.versioning import track_model_versions
+        from .models import Customer
+        track_model_versions(Customer)
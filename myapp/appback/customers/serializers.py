@@ -1,11 +1,14 @@
+from django.db.models import Count, Max, Sum
 from rest_framework import serializers
+from appback.sparse import SparseFieldsMixin
 from .models import Customer
 from orders.models import Order
 
 
-class CustomerSerializer(serializers.ModelSerializer):
+class CustomerSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
-    Serializer for Customer model with validation
+    Serializer for Customer model with validation.
+    The order stats come from annotations added by shape_queryset when they are rendered.
     """
     # Make created_date read-only
     created_date = serializers.DateTimeField(read_only=True)
@@ -22,13 +25,23 @@ class CustomerSerializer(serializers.ModelSerializer):
             'is_active', 'created_date', 'total_orders', 
             'total_spent', 'last_order_date'
         ]
+
+    field_queryset_hints = {
+        'total_orders': {'annotate': {'order_count': Count('order')}},
+        'total_spent': {'annotate': {'order_total': Sum('order__total_amount')}},
+        'last_order_date': {'annotate': {'last_order_at': Max('order__created_date')}},
+    }
         
     def get_total_orders(self, obj):
         """Get total number of orders for this customer"""
+        if hasattr(obj, 'order_count'):
+            return obj.order_count
         return obj.order_set.count() if hasattr(obj, 'order_set') else 0
     
     def get_total_spent(self, obj):
         """Get total amount spent by this customer"""
+        if hasattr(obj, 'order_total'):
+            return round(obj.order_total, 2) if obj.order_total else 0
         if hasattr(obj, 'order_set'):
             total = sum(
                 order.total_amount for order in obj.order_set.all() 
@@ -39,6 +52,8 @@ class CustomerSerializer(serializers.ModelSerializer):
     
     def get_last_order_date(self, obj):
         """Get the date of the customer's last order"""
+        if hasattr(obj, 'last_order_at'):
+            return obj.last_order_at.date() if obj.last_order_at else None
         if hasattr(obj, 'order_set'):
             last_order = obj.order_set.order_by('-created_date').first()
             if last_order and last_order.created_date:
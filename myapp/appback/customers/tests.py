@@ -1,3 +1,15 @@
-from django.test import TestCase
+from django.test import TransactionTestCase
 
-# Create your tests here.
+from customers.models import Customer
+
+
+class AsyncStatsTest(TransactionTestCase):
+    """The async stats variant returns the sync payload; its queries run on worker-thread connections."""
+
+    def test_async_stats_match_sync_endpoint(self):
+        Customer.objects.create(name='Wanjiru', email='wanjiru@example.com', phone='0700000000')
+        expected = self.client.get('/api/customers/stats/')
+        self.assertEqual(expected.status_code, 200)
+        response = self.client.get('/api/customers/stats/async/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), expected.json())
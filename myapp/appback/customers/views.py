@@ -4,10 +4,11 @@ from django.db.models import Q, Count, Sum
 from django.http import JsonResponse
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
 from django.core.paginator import Paginator
+from django.utils import timezone
 from django.utils.dateparse import parse_date
 from django.core.validators import validate_email
 from django.core.exceptions import ValidationError
@@ -17,8 +18,20 @@ from datetime import datetime
 from .models import Customer
 from orders.models import Order  # Adjust import based on your models location
 from .serializers import CustomerSerializer, OrderSerializer  # Adjust import based on your serializers location
+from search.indexing import index_queryset
+from appback.conditional import static_etag
+from appback.versioning import bump_version
+from appback.replicas import replica_reads
+from appback.response_cache import cache_on_versions
+from appback.batch import MAX_BATCH_IDS, fetch_by_ids, parse_ids
+from appback.concurrency import run_queries, gather_queries, async_get_view
+from sync.changes import record_changes
+from sync.filters import filter_updated_since
 
 
+# Everything the customer list, detail and order views read
+CUSTOMER_VERSION_LABELS = ('customers.customer', 'orders.order', 'orders.orderitem', 'products.product')
+
 class CustomerPagination(PageNumberPagination):
     page_size = 20
     page_size_query_param = 'page_size'
@@ -27,6 +40,7 @@ class CustomerPagination(PageNumberPagination):
 
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticatedOrReadOnly])
+@cache_on_versions(*CUSTOMER_VERSION_LABELS)
 def customer_list(request):
     """
     List all customers or create a new customer.
@@ -35,6 +49,9 @@ def customer_list(request):
     POST: Create a new customer (requires authentication)
     """
     if request.method == 'GET':
+        if 'ids' in request.GET:
+            return _customers_by_ids(request, parse_ids(request.GET['ids']))
+
         # Get all customers, filter by active status by default
         customers = Customer.objects.all()
         
@@ -44,6 +61,9 @@ def customer_list(request):
             customers = customers.filter(is_active=False)
         elif is_active != 'all':
             customers = customers.filter(is_active=True)
+
+        # Delta sync: only customers changed since ?updated_since=
+        customers = filter_updated_since(customers, request)
         
         # Search functionality
         search = request.GET.get('search', '')
@@ -59,11 +79,14 @@ def customer_list(request):
         else:
             customers = customers.order_by('-created_date')
         
+        # Annotate only the order stats that will be rendered (see ?fields=)
+        customers = CustomerSerializer.shape_queryset(customers, request)
+
         # Pagination
         paginator = CustomerPagination()
         paginated_customers = paginator.paginate_queryset(customers, request)
         
-        serializer = CustomerSerializer(paginated_customers, many=True)
+        serializer = CustomerSerializer(paginated_customers, many=True, context={'request': request})
         return paginator.get_paginated_response(serializer.data)
     
     elif request.method == 'POST':
@@ -86,8 +109,27 @@ def customer_list(request):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+def _customers_by_ids(request, ids):
+    """{'results', 'missing'} for `ids`, active or not, in the requested order (see appback/batch.py)."""
+    customers, missing = fetch_by_ids(CustomerSerializer.shape_queryset(Customer.objects.all(), request), ids)
+    serializer = CustomerSerializer(customers, many=True, context={'request': request})
+    return Response({'results': serializer.data, 'missing': missing})
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])  # Only reads, like GET /api/customers/?ids=
+def customer_batch(request):
+    """
+    POST /api/customers/_batch/ {"ids": [3, 1, 2, ...]}
+    Same answer as GET /api/customers/?ids=3,1,2, for sets too large for a query string.
+    """
+    ids = request.data.get('ids') if isinstance(request.data, dict) else None
+    return _customers_by_ids(request, parse_ids(ids, limit=MAX_BATCH_IDS))
+
+
 @api_view(['GET', 'PUT', 'PATCH', 'DELETE'])
 @permission_classes([IsAuthenticatedOrReadOnly])
+@cache_on_versions(*CUSTOMER_VERSION_LABELS)
 def customer_detail(request, customer_id):
     """
     Retrieve, update, or delete a specific customer.
@@ -96,13 +138,13 @@ def customer_detail(request, customer_id):
     PUT/PATCH: Update customer (requires authentication)
     DELETE: Soft delete customer (requires authentication)
     """
-    customer = get_object_or_404(Customer, id=customer_id)
+    customer = get_object_or_404(CustomerSerializer.shape_queryset(Customer.objects.all(), request), id=customer_id)
     
     if request.method == 'GET':
         # Check if orders should be included
         include_orders = request.GET.get('include_orders', 'false').lower() == 'true'
         
-        serializer = CustomerSerializer(customer)
+        serializer = CustomerSerializer(customer, context={'request': request})
         data = serializer.data
         
         if include_orders:
@@ -171,6 +213,7 @@ def customer_detail(request, customer_id):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticatedOrReadOnly])
+@cache_on_versions(*CUSTOMER_VERSION_LABELS)
 def customer_orders(request, customer_id):
     """
     Get all orders for a specific customer.
@@ -184,6 +227,8 @@ def customer_orders(request, customer_id):
     status_filter = request.GET.get('status')
     if status_filter:
         orders = orders.filter(status=status_filter)
+
+    orders = filter_updated_since(orders, request)
     
     # Filter by date range
     start_date = request.GET.get('start_date')
@@ -232,6 +277,7 @@ def customer_orders(request, customer_id):
 
 
 @api_view(['GET'])
+@static_etag
 def customer_metadata(request):
     """
     Get metadata for customer management (status choices, search fields, etc.)
@@ -249,45 +295,53 @@ def customer_metadata(request):
     return Response(metadata)
 
 
+def _month_start():
+    from django.utils import timezone
+    return timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+# Independent queries behind customer_stats (see appback/concurrency.py)
+CUSTOMER_STATS_QUERIES = {
+    'total_customers': lambda: Customer.objects.count(),
+    'active_customers': lambda: Customer.objects.filter(is_active=True).count(),
+    'orders': lambda: Order.objects.aggregate(total_revenue=Sum('total_amount'), total_orders=Count('pk')),
+    'new_customers_this_month': lambda: Customer.objects.filter(created_date__gte=_month_start()).count(),
+}
+
+
+def _customer_stats(results):
+    total_revenue = results['orders']['total_revenue'] or 0
+    total_orders = results['orders']['total_orders']
+    avg_order_value = total_revenue / total_orders if total_orders > 0 else 0
+    return {
+        'total_customers': results['total_customers'],
+        'active_customers': results['active_customers'],
+        'inactive_customers': results['total_customers'] - results['active_customers'],
+        'total_revenue': total_revenue,
+        'total_orders': total_orders,
+        'avg_order_value': round(avg_order_value, 2),
+        'new_customers_this_month': results['new_customers_this_month'],
+    }
+
+
+@replica_reads
 @api_view(['GET'])
 @permission_classes([IsAuthenticatedOrReadOnly])
 def customer_stats(request):
     """
     Get customer statistics for dashboard/analytics.
     """
-    # Total customers
-    total_customers = Customer.objects.count()
-    active_customers = Customer.objects.filter(is_active=True).count()
-    
-    # Customer with order statistics
-    customers_with_orders = Customer.objects.annotate(
-        total_orders=Count('order'),
-        total_spent=Sum('order__total_amount')  # Adjust field name based on your Order model
-    ).filter(total_orders__gt=0)
-    
-    # Calculate averages
-    total_revenue = sum(c.total_spent or 0 for c in customers_with_orders)
-    total_orders = sum(c.total_orders or 0 for c in customers_with_orders)
-    avg_order_value = total_revenue / total_orders if total_orders > 0 else 0
-    
-    # New customers this month
-    from django.utils import timezone
-    current_month = timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    new_customers_this_month = Customer.objects.filter(
-        created_date__gte=current_month
-    ).count()
-    
-    stats = {
-        'total_customers': total_customers,
-        'active_customers': active_customers,
-        'inactive_customers': total_customers - active_customers,
-        'total_revenue': total_revenue,
-        'total_orders': total_orders,
-        'avg_order_value': round(avg_order_value, 2),
-        'new_customers_this_month': new_customers_this_month
-    }
-    
-    return Response(stats)
+    return Response(_customer_stats(run_queries(CUSTOMER_STATS_QUERIES)))
+
+
+@replica_reads
+@async_get_view
+async def customer_stats_async(request):
+    """
+    GET /api/customers/stats/async/
+    Same payload as customer_stats, with its aggregates run concurrently.
+    """
+    return _customer_stats(await gather_queries(CUSTOMER_STATS_QUERIES))
 
 
 # Additional utility views
@@ -316,9 +370,14 @@ def bulk_update_customers(request):
     customers = Customer.objects.filter(id__in=customer_ids)
     
     if action == 'activate':
-        customers.update(is_active=True)
+        customers.update(is_active=True, updated_at=timezone.now())
     else:
-        customers.update(is_active=False)
+        customers.update(is_active=False, updated_at=timezone.now())
+    
+    # .update() bypasses post_save, so refresh the search index and version stamp explicitly
+    index_queryset('customer', customers)
+    bump_version('customers.customer')
+    record_changes('customer', customers.values_list('pk', flat=True))
     
     return Response({
         'message': f'Successfully {action}d {customers.count()} customers',
@@ -355,7 +414,7 @@ def search_customers(request):
     if phone:
         customers = customers.filter(phone__icontains=phone)
     
-    customers = customers.order_by('name')[:10]  # Limit to 10 results for search
+    customers = CustomerSerializer.shape_queryset(customers, request).order_by('name')[:10]  # Limit to 10 results for search
     
-    serializer = CustomerSerializer(customers, many=True)
+    serializer = CustomerSerializer(customers, many=True, context={'request': request})
     return Response(serializer.data)
\ No newline at end of file
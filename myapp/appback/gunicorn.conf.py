@@ -0,0 +1,64 @@
+# gunicorn.conf.py
+"""
+Gunicorn settings for production.
+
+WSGI (default):  gunicorn -c gunicorn.conf.py appback.wsgi:application
+ASGI:            GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker \
+                 gunicorn -c gunicorn.conf.py appback.asgi:application
+
+Every value can be overridden from the environment. Worker and thread counts
+default to the CPU count the container can actually use.
+"""
+import os
+
+
+def _cpu_count():
+    try:
+        return len(os.sched_getaffinity(0))  # Honours container CPU pinning
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.environ.get('WEB_CONCURRENCY', 2 * _cpu_count() + 1))
+# Threads only apply to gthread workers; requests mostly wait on the database
+threads = int(os.environ.get('GUNICORN_THREADS', 4 if worker_class == 'gthread' else 1))
+
+# Import Django and the URLconf once in the master; workers fork with it already loaded
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() in ('1', 'true', 'yes')
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = 30
+keepalive = 5
+# Recycle workers now and then so slow leaks cannot build up; jitter avoids simultaneous restarts
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = 200
+
+accesslog = '-'
+errorlog = '-'
+
+
+def on_starting(server):
+    # Version stamps, ETags and cached responses live in the default cache; with a
+    # per-process cache every other worker keeps serving data from before a write
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'appback.settings')
+    from django.conf import settings
+    if server.cfg.workers > 1 and settings.CACHES['default']['BACKEND'].endswith('.LocMemCache'):
+        raise RuntimeError(
+            f"{server.cfg.workers} workers need a shared cache: set CACHE_URL (see appback/settings.py) or WEB_CONCURRENCY=1."
+        )
+
+
+def post_fork(server, worker):
+    # Never share database connections opened in the master with forked workers
+    from django.db import connections
+    connections.close_all()
+
+
+def when_ready(server):
+    # Warm the URLconf (and through it every view module) before workers fork
+    if preload_app:
+        from django.urls import get_resolver
+        get_resolver().url_patterns
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class InventoryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'inventory'
+
+    def ready(self):
+        from appback.versioning import track_model_versions
+        from .models import Inventory, FinishedStock
+        track_model_versions(Inventory, FinishedStock)
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_alter_finishedstock_product_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='finishedstock',
+            name='last_updated',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='inventory',
+            name='last_updated',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -27,7 +27,7 @@ class Inventory(models.Model):
         validators=[MinValueValidator(0)],
         default=0.00 # Default to 0, will be set on creation/update
     )
-    last_updated = models.DateTimeField(auto_now=True)
+    last_updated = models.DateTimeField(auto_now=True, db_index=True)
     is_active = models.BooleanField(default=True)  # For soft deletion
     
     def __str__(self):
@@ -52,7 +52,7 @@ class FinishedStock(models.Model):
         decimal_places=2, 
         validators=[MinValueValidator(0)]
     )
-    last_updated = models.DateTimeField(auto_now=True)
+    last_updated = models.DateTimeField(auto_now=True, db_index=True)
     is_active = models.BooleanField(default=True)  # For soft deletion
     
     def __str__(self):
@@ -0,0 +1,224 @@
+# inventory/planning.py
+"""
+Production-chain capacity planning.
+
+Work in progress moves through the stages in PRODUCTION_CHAIN_MAP, ending in
+FINISHED. A unit sitting in Inventory at one stage can still be taken through
+every later stage, so the most a product can reach at a stage is the sum of
+its WIP at all upstream stages. The bottleneck is the stage whose immediate
+input buffer is smallest: it is the first to starve.
+
+The plan for all products is built from one Inventory query and cached until
+the Inventory or Product version stamp changes (see appback/versioning.py); the
+plan carries each product's type, animal and size.
+"""
+from django.core.cache import cache
+from django.db.models import Avg, CharField, Count, DurationField, ExpressionWrapper, F, Value
+
+from appback.versioning import get_versions
+from jobs.models import JobDelivery
+from orders.stock import with_availability
+from .models import Inventory, FinishedStock
+
+# Key: service category of a job item
+# Value: previous service categories it consumes from, in order of preference
+PRODUCTION_CHAIN_MAP = {
+    'SANDING': ['CARVING', 'CUTTING'],
+    'PAINTING': ['SANDING'],
+    'FINISHING': ['PAINTING'],
+    'FINISHED': ['FINISHING'],
+}
+
+STAGES = ['CARVING', 'CUTTING', 'SANDING', 'PAINTING', 'FINISHING', 'FINISHED']
+DOWNSTREAM_STAGES = [stage for stage in STAGES if stage in PRODUCTION_CHAIN_MAP]
+
+CAPACITY_CACHE_KEY = 'inventory-capacity:'
+CAPACITY_CACHE_TIMEOUT = 60 * 60 * 24  # Superseded keys simply expire
+INVENTORY_VERSION_LABEL = 'inventory.inventory'
+CAPACITY_VERSION_LABELS = (INVENTORY_VERSION_LABEL, 'products.product')
+
+
+def _upstream(stage):
+    stages = []
+    for previous in PRODUCTION_CHAIN_MAP.get(stage, []):
+        stages.extend(_upstream(previous))
+        stages.append(previous)
+    return list(dict.fromkeys(stages))
+
+
+# Every stage a unit can come from on its way to the key stage
+UPSTREAM_STAGES = {stage: _upstream(stage) for stage in DOWNSTREAM_STAGES}
+
+
+def _column_sum(columns, stages):
+    """Element-wise sum of the per-product quantity columns for `stages`."""
+    selected = [columns[stage] for stage in stages]
+    return [sum(values) for values in zip(*selected)]
+
+
+def build_capacity_plan():
+    """
+    Compute the capacity plan for every product with active Inventory.
+    Quantities are held as one column per stage, aligned on product order, so
+    each downstream stage is a single column-wise sum over all products.
+    """
+    rows = Inventory.active.values_list(
+        'product_id', 'product__product_type', 'product__animal_type', 'product__size_category',
+        'service_category', 'quantity',
+    ).order_by('product_id')
+
+    positions = {}
+    products = []
+    columns = {stage: [] for stage in STAGES}
+    for product_id, product_type, animal_type, size_category, service_category, quantity in rows:
+        if product_id not in positions:
+            positions[product_id] = len(products)
+            products.append({
+                'product_id': product_id,
+                'product_type': product_type,
+                'animal_type': animal_type,
+                'size_category': size_category,
+            })
+            for column in columns.values():
+                column.append(0)
+        if service_category in columns:
+            columns[service_category][positions[product_id]] = quantity
+
+    max_producible = {stage: _column_sum(columns, UPSTREAM_STAGES[stage]) for stage in DOWNSTREAM_STAGES}
+    ready = {stage: _column_sum(columns, PRODUCTION_CHAIN_MAP[stage]) for stage in DOWNSTREAM_STAGES}
+
+    plan = []
+    for index, product in enumerate(products):
+        ready_by_stage = {stage: ready[stage][index] for stage in DOWNSTREAM_STAGES}
+        has_wip = any(max_producible[stage][index] for stage in DOWNSTREAM_STAGES)
+        plan.append({
+            **product,
+            'on_hand': {stage: columns[stage][index] for stage in STAGES},
+            'ready': ready_by_stage,
+            'max_producible': {stage: max_producible[stage][index] for stage in DOWNSTREAM_STAGES},
+            # min() keeps the earliest stage on ties
+            'bottleneck': min(DOWNSTREAM_STAGES, key=ready_by_stage.get) if has_wip else None,
+        })
+    return plan
+
+
+def get_capacity_plan():
+    """Return the cached capacity plan, rebuilding it after any Inventory or Product change."""
+    key = f"{CAPACITY_CACHE_KEY}{'-'.join(map(str, get_versions(*CAPACITY_VERSION_LABELS)))}"
+    plan = cache.get(key)
+    if plan is None:
+        plan = build_capacity_plan()
+        cache.set(key, plan, timeout=CAPACITY_CACHE_TIMEOUT)
+    return plan
+
+
+# --- Multi-stage availability for order fulfilment ---
+
+LEAD_TIME_CACHE_KEY = 'inventory-lead-times'
+LEAD_TIME_CACHE_TIMEOUT = 60 * 60  # Historical averages move slowly; an hour old is fine
+DEFAULT_STAGE_LEAD_DAYS = 7.0  # Used for stages with no delivery history yet
+FINISHED_STOCK = 'FINISHED_STOCK'  # Pseudo-stage for FinishedStock, ahead of every Inventory stage
+
+# Stage a unit moves to next, e.g. CARVING -> SANDING
+NEXT_STAGE = {previous: stage for stage, previous_stages in PRODUCTION_CHAIN_MAP.items() for previous in previous_stages}
+
+
+def remaining_stages(stage):
+    """Stages a unit sitting at `stage` still has to pass through to become finished."""
+    stages = []
+    while stage in NEXT_STAGE:
+        stage = NEXT_STAGE[stage]
+        stages.append(stage)
+    return stages
+
+
+def build_lead_time_table():
+    """
+    Average days from a job being opened to its deliveries arriving, per service
+    category, from every accepted JobDelivery. One grouped query.
+    Returns {stage: {'days': float, 'deliveries': int}}.
+    """
+    rows = JobDelivery.objects.filter(quantity_accepted__gt=0).values(
+        stage=F('job_item__job__service_category'),
+    ).annotate(
+        lead_time=Avg(ExpressionWrapper(
+            F('delivery_date') - F('job_item__job__created_date'), output_field=DurationField()
+        )),
+        deliveries=Count('id'),
+    ).order_by()
+    return {
+        row['stage']: {'days': round(row['lead_time'].total_seconds() / 86400, 2), 'deliveries': row['deliveries']}
+        for row in rows if row['lead_time'] is not None
+    }
+
+
+def get_lead_time_table():
+    """Return the cached lead-time table, rebuilding it at most once per LEAD_TIME_CACHE_TIMEOUT."""
+    table = cache.get(LEAD_TIME_CACHE_KEY)
+    if table is None:
+        table = build_lead_time_table()
+        cache.set(LEAD_TIME_CACHE_KEY, table, timeout=LEAD_TIME_CACHE_TIMEOUT)
+    return table
+
+
+def _stage_quantities(product_ids):
+    """
+    {product_id: {stage: quantity}} for FinishedStock (unreserved, as FINISHED_STOCK)
+    and every active Inventory stage, fetched with a single UNION query.
+    """
+    # Annotation order fixes the column order each side of the UNION
+    inventory = Inventory.active.filter(product_id__in=product_ids, quantity__gt=0).annotate(
+        stage=F('service_category'), stage_quantity=F('quantity'),
+    ).values_list('product_id', 'stage', 'stage_quantity')
+    finished = with_availability(FinishedStock.objects.filter(product_id__in=product_ids)).annotate(
+        stage=Value(FINISHED_STOCK, output_field=CharField()), stage_quantity=F('available'),
+    ).values_list('product_id', 'stage', 'stage_quantity')
+
+    quantities = {product_id: {} for product_id in product_ids}
+    for product_id, stage, quantity in inventory.union(finished, all=True):
+        quantities[product_id][stage] = quantity
+    return quantities
+
+
+def basket_fulfilment(required):
+    """
+    For {product_id: requested_quantity}, allocate each request from unreserved
+    finished stock first, then from the stages closest to finished, and estimate
+    how many days the slowest allocated unit needs to become finished.
+    Returns one dict per requested product, in request order.
+    """
+    lead_times = get_lead_time_table()
+
+    def stage_days(stage):
+        entry = lead_times.get(stage)
+        return entry['days'] if entry else DEFAULT_STAGE_LEAD_DAYS
+
+    # Closest to finished first; stages at the same distance keep chain order
+    sources = [(FINISHED_STOCK, 0.0)] + sorted(
+        ((stage, sum(stage_days(later) for later in remaining_stages(stage))) for stage in STAGES),
+        key=lambda source: (len(remaining_stages(source[0])), STAGES.index(source[0])),
+    )
+
+    quantities = _stage_quantities(list(required.keys()))
+    results = []
+    for product_id, requested in required.items():
+        on_hand = quantities[product_id]
+        outstanding = requested
+        allocation = []
+        for stage, days in sources:
+            take = min(outstanding, max(on_hand.get(stage, 0), 0))
+            if take:
+                allocation.append({'stage': stage, 'quantity': take, 'lead_time_days': round(days, 2)})
+                outstanding -= take
+            if not outstanding:
+                break
+        results.append({
+            'product_id': product_id,
+            'requested': requested,
+            'stages': {stage: on_hand.get(stage, 0) for stage, _ in sources},
+            'allocation': allocation,
+            'shortfall': outstanding,
+            # None when the request cannot be covered from stock and WIP at all
+            'lead_time_days': max((entry['lead_time_days'] for entry in allocation), default=0.0) if not outstanding else None,
+        })
+    return results
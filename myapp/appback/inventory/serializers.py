@@ -133,13 +133,22 @@ class FinishedStockSerializer(serializers.ModelSerializer):
     Serializer for FinishedStock model.
     """
     product = ProductSerializer(read_only=True)
+    # Annotated by orders.stock.with_availability; omitted when the instance was not loaded through it
+    reserved_quantity = serializers.IntegerField(read_only=True)
+    available = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = FinishedStock
-        fields = ['id', 'product', 'quantity', 'average_cost', 'last_updated']
+        fields = ['id', 'product', 'quantity', 'reserved_quantity', 'available', 'average_cost', 'last_updated']
         read_only_fields = ['id', 'last_updated']
 
 
+class BasketLineSerializer(serializers.Serializer):
+    """A product and quantity to check in FinishedStockViewSet.availability."""
+    product_id = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1)
+
+
 class InventoryStockUpdateSerializer(serializers.Serializer):
     """
     Serializer for manual stock adjustments.
@@ -0,0 +1,159 @@
+# inventory/summary.py
+"""
+Multi-dimensional Inventory summary with subtotals.
+
+`summarize(queryset, dimensions, subtotals)` groups Inventory rows by any
+combination of DIMENSIONS and returns one row per group plus the subtotal rows
+requested:
+
+- 'rollup': hierarchical subtotals in dimension order, like GROUP BY ROLLUP
+- 'cube': subtotals for every combination of dimensions, like GROUP BY CUBE
+- 'none': only the fully grouped rows
+
+On PostgreSQL the whole result comes from one GROUP BY GROUPING SETS query.
+Other backends run one GROUP BY over all dimensions and derive the subtotal
+rows in Python. Cost is weighted by quantity: total_value / total_quantity.
+"""
+import hashlib
+from decimal import Decimal
+from itertools import combinations
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Sum, Count, F, DecimalField, ExpressionWrapper
+
+from appback.versioning import get_versions
+
+# Public dimension name -> Inventory lookup
+DIMENSIONS = {
+    'stage': 'service_category',
+    'product_type': 'product__product_type',
+    'animal_type': 'product__animal_type',
+    'size_category': 'product__size_category',
+    'is_active': 'is_active',
+}
+
+SUBTOTAL_MODES = ['rollup', 'cube', 'none']
+
+SUMMARY_VERSION_LABELS = ('inventory.inventory', 'products.product')
+
+
+def grouping_sets(dimensions, subtotals):
+    """Grouping sets, most detailed first, for the requested subtotal mode."""
+    if subtotals == 'rollup':
+        return [tuple(dimensions[:size]) for size in range(len(dimensions), -1, -1)]
+    if subtotals == 'cube':
+        return [combo for size in range(len(dimensions), -1, -1) for combo in combinations(dimensions, size)]
+    return [tuple(dimensions)]
+
+
+def _weighted(total_quantity, total_value):
+    if not total_quantity:
+        return None
+    return (total_value / total_quantity).quantize(Decimal('0.01'))
+
+
+def _result_row(dimensions, grouped_by, values, total_quantity, record_count, total_value):
+    total_value = Decimal(total_value or 0).quantize(Decimal('0.01'))
+    return {
+        **{dimension: values.get(dimension) if dimension in grouped_by else None for dimension in dimensions},
+        'grouped_by': list(grouped_by),
+        'is_subtotal': len(grouped_by) < len(dimensions),
+        'total_quantity': total_quantity or 0,
+        'record_count': record_count,
+        'total_value': total_value,
+        'weighted_average_cost': _weighted(total_quantity, total_value),
+    }
+
+
+def _base_rows(queryset, dimensions):
+    """The Inventory rows reduced to aliased dimension columns plus quantity and cost."""
+    aliases = {dimension: F(DIMENSIONS[dimension]) for dimension in dimensions if DIMENSIONS[dimension] != dimension}
+    return queryset.order_by().annotate(
+        **aliases,
+        line_quantity=F('quantity'),
+        line_value=ExpressionWrapper(F('quantity') * F('average_cost'), output_field=DecimalField(max_digits=20, decimal_places=2)),
+    ).values(*dimensions, 'line_quantity', 'line_value')
+
+
+def _summarize_postgresql(queryset, dimensions, sets):
+    base_sql, params = _base_rows(queryset, dimensions).query.sql_with_params()
+    quote = connection.ops.quote_name
+    columns = [quote(dimension) for dimension in dimensions]
+
+    select = columns + [f"GROUPING({column}) AS {quote(dimension + '__rolled_up')}"
+                        for column, dimension in zip(columns, dimensions)]
+    sets_sql = ', '.join('(' + ', '.join(quote(dimension) for dimension in grouping_set) + ')' for grouping_set in sets)
+    sql = (
+        f"SELECT {', '.join(select + ['SUM(line_quantity)', 'COUNT(*)', 'SUM(line_value)'])} "
+        f"FROM ({base_sql}) AS base GROUP BY GROUPING SETS ({sets_sql})"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        fetched = cursor.fetchall()
+
+    rows = []
+    count = len(dimensions)
+    for record in fetched:
+        values = dict(zip(dimensions, record[:count]))
+        rolled_up = record[count:2 * count]
+        grouped_by = tuple(dimension for dimension, flag in zip(dimensions, rolled_up) if not flag)
+        rows.append((grouped_by, _result_row(dimensions, grouped_by, values, *record[2 * count:])))
+    return rows
+
+
+def _summarize_python(queryset, dimensions, sets):
+    detail = list(_base_rows(queryset, dimensions).values(*dimensions).annotate(
+        total_quantity=Sum('line_quantity'), record_count=Count('id'), total_value=Sum('line_value'),
+    ))
+
+    rows = []
+    for grouping_set in sets:
+        groups = {}
+        for row in detail:
+            key = tuple(row[dimension] for dimension in grouping_set)
+            totals = groups.setdefault(key, [0, 0, Decimal('0')])
+            totals[0] += row['total_quantity'] or 0
+            totals[1] += row['record_count']
+            totals[2] += row['total_value'] or 0
+        for key, (total_quantity, record_count, total_value) in groups.items():
+            values = dict(zip(grouping_set, key))
+            rows.append((grouping_set, _result_row(dimensions, grouping_set, values, total_quantity, record_count, total_value)))
+    return rows
+
+
+def summarize(queryset, dimensions, subtotals='rollup'):
+    """Summarize an Inventory queryset. Returns result rows, detail rows first within each grouping set order."""
+    sets = grouping_sets(list(dimensions), subtotals)
+    if connection.vendor == 'postgresql':
+        rows = _summarize_postgresql(queryset, dimensions, sets)
+    else:
+        rows = _summarize_python(queryset, dimensions, sets)
+
+    set_order = {grouping_set: index for index, grouping_set in enumerate(sets)}
+
+    def sort_key(entry):
+        grouping_set, row = entry
+        # None sorts before values; str() keeps mixed types (booleans, text) comparable
+        return (set_order[grouping_set],) + tuple((row[d] is not None, str(row[d])) for d in dimensions)
+
+    return [row for _, row in sorted(rows, key=sort_key)]
+
+
+SUMMARY_CACHE_KEY = 'inventory-summary:'
+SUMMARY_CACHE_TIMEOUT = 60 * 60 * 24  # Superseded keys simply expire
+
+
+def cached_summary(queryset, dimensions, subtotals, params):
+    """
+    `summarize` cached per parameter set. `params` must capture everything that
+    shaped `queryset` (the request's filter parameters); Inventory and Product
+    writes move the version stamps and so start a fresh key space.
+    """
+    fingerprint = repr((get_versions(*SUMMARY_VERSION_LABELS), list(dimensions), subtotals, sorted(params)))
+    key = f"{SUMMARY_CACHE_KEY}{hashlib.md5(fingerprint.encode()).hexdigest()}"
+    rows = cache.get(key)
+    if rows is None:
+        rows = summarize(queryset, dimensions, subtotals)
+        cache.set(key, rows, timeout=SUMMARY_CACHE_TIMEOUT)
+    return rows
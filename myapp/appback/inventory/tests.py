@@ -1,3 +1,180 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from inventory.models import Inventory, FinishedStock
+from inventory.planning import DEFAULT_STAGE_LEAD_DAYS, build_capacity_plan
+from products.models import Product
+
+
+class CapacityPlanTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.elephant = Product.objects.create(
+            product_type='SITTING_ANIMAL', animal_type='Elephant', size_category='MEDIUM', base_price=10
+        )
+        self.giraffe = Product.objects.create(
+            product_type='SITTING_ANIMAL', animal_type='Giraffe', size_category='MEDIUM', base_price=20
+        )
+        for product, stage, quantity in [
+            (self.elephant, 'CARVING', 5), (self.elephant, 'CUTTING', 2),
+            (self.elephant, 'SANDING', 4), (self.elephant, 'PAINTING', 1),
+            (self.giraffe, 'FINISHING', 3),
+        ]:
+            Inventory.objects.create(product=product, service_category=stage, quantity=quantity, average_cost=1)
+
+    def test_max_producible_and_bottleneck(self):
+        with self.assertNumQueries(1):
+            plan = {entry['product_id']: entry for entry in build_capacity_plan()}
+
+        elephant = plan[self.elephant.id]
+        self.assertEqual(elephant['max_producible'], {'SANDING': 7, 'PAINTING': 11, 'FINISHING': 12, 'FINISHED': 12})
+        self.assertEqual(elephant['ready'], {'SANDING': 7, 'PAINTING': 4, 'FINISHING': 1, 'FINISHED': 0})
+        self.assertEqual(elephant['bottleneck'], 'FINISHED')
+
+        giraffe = plan[self.giraffe.id]
+        self.assertEqual(giraffe['max_producible']['FINISHED'], 3)
+        self.assertEqual(giraffe['bottleneck'], 'SANDING')
+
+    def test_endpoint_is_cached_until_inventory_changes(self):
+        self.client.get('/api/inventory/capacity/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/inventory/capacity/', {'product_ids': self.giraffe.id})
+        self.assertEqual(response.data['count'], 1)
+
+        inventory = Inventory.objects.get(product=self.giraffe, service_category='FINISHING')
+        inventory.quantity = 8
+        with self.captureOnCommitCallbacks(execute=True):  # Stamps are bumped on commit
+            inventory.save()
+        response = self.client.get('/api/inventory/capacity/', {'product_ids': self.giraffe.id})
+        self.assertEqual(response.data['results'][0]['max_producible']['FINISHED'], 8)
+        etag = response['ETag']
+
+        self.giraffe.size_category = 'LARGE'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.giraffe.save()
+        response = self.client.get('/api/inventory/capacity/', {'product_ids': self.giraffe.id}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['size_category'], 'LARGE')
+
+
+class FulfilmentPlanTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.product = Product.objects.create(
+            product_type='SITTING_ANIMAL', animal_type='Elephant', size_category='MEDIUM', base_price=10
+        )
+        FinishedStock.objects.create(product=self.product, quantity=2, average_cost=10)  # 3 after the delivery below
+        for stage, quantity in [('FINISHING', 2), ('CARVING', 10)]:
+            Inventory.objects.create(product=self.product, service_category=stage, quantity=quantity, average_cost=1)
+
+        # Two days from opening a FINISHED job to delivery
+        from jobs.models import Job, JobDelivery, JobItem
+        from artisans.models import Artisan
+        job = Job.objects.create(created_by='planner', service_category='FINISHED')
+        item = JobItem.objects.create(
+            job=job, artisan=Artisan.objects.create(name='Amani'), product=self.product, quantity_ordered=1
+        )
+        JobDelivery.objects.create(job_item=item, quantity_received=1, quantity_accepted=1)
+        Job.objects.filter(pk=job.pk).update(created_date=timezone.now() - timedelta(days=2))
+        cache.clear()
+
+    def plan(self, quantity):
+        return self.client.post('/api/inventory/fulfilment/', {
+            'items': [{'product_id': self.product.id, 'quantity': quantity}]
+        }, format='json').data
+
+    def test_allocates_closest_stages_first(self):
+        result = self.plan(5)['results'][0]
+        self.assertEqual(
+            [(entry['stage'], entry['quantity']) for entry in result['allocation']],
+            [('FINISHED_STOCK', 3), ('FINISHING', 2)],
+        )
+        self.assertEqual(round(result['lead_time_days']), 2)
+        self.assertEqual(result['shortfall'], 0)
+
+    def test_slow_path_uses_default_lead_times_and_reports_shortfall(self):
+        data = self.plan(20)
+        result = data['results'][0]
+        self.assertFalse(data['can_fulfil'])
+        self.assertEqual(result['shortfall'], 5)
+        self.assertIsNone(result['ready_by'])
+
+        # CARVING still needs SANDING, PAINTING and FINISHING (no history) plus FINISHED (2 days)
+        carving = result['allocation'][-1]
+        self.assertEqual(carving['stage'], 'CARVING')
+        self.assertAlmostEqual(carving['lead_time_days'], 3 * DEFAULT_STAGE_LEAD_DAYS + 2, places=0)
+
+    def test_rejects_a_non_object_body(self):
+        response = self.client.post('/api/inventory/fulfilment/', [{'product_id': self.product.id}], format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_stage_quantities_and_lead_times_take_two_queries(self):
+        from inventory.planning import basket_fulfilment
+        with self.assertNumQueries(2):
+            basket_fulfilment({self.product.id: 1})
+        with self.assertNumQueries(1):
+            basket_fulfilment({self.product.id: 1})
+
+
+class InventoryCubeTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        sitting = Product.objects.create(
+            product_type='SITTING_ANIMAL', animal_type='Elephant', size_category='MEDIUM', base_price=10
+        )
+        self.standing = Product.objects.create(
+            product_type='STANDING_ANIMAL', animal_type='Giraffe', size_category='LARGE', base_price=20
+        )
+        for product, stage, quantity, cost in [
+            (sitting, 'CARVING', 10, 2), (sitting, 'SANDING', 30, 4), (self.standing, 'CARVING', 10, 8),
+        ]:
+            Inventory.objects.create(product=product, service_category=stage, quantity=quantity, average_cost=cost)
+
+    def cube(self, **params):
+        response = self.client.get('/api/inventory/items/cube/', params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data['results']
+
+    def test_rollup_subtotals_with_weighted_cost(self):
+        rows = self.cube(dimensions='stage,product_type')
+        self.assertEqual([(row['stage'], row['product_type']) for row in rows], [
+            ('CARVING', 'SITTING_ANIMAL'), ('CARVING', 'STANDING_ANIMAL'), ('SANDING', 'SITTING_ANIMAL'),
+            ('CARVING', None), ('SANDING', None),
+            (None, None),
+        ])
+        carving, grand_total = rows[3], rows[5]
+        self.assertEqual((carving['total_quantity'], carving['total_value']), (20, Decimal('100.00')))
+        self.assertEqual(carving['weighted_average_cost'], Decimal('5.00'))
+        self.assertTrue(grand_total['is_subtotal'])
+        self.assertEqual(grand_total['weighted_average_cost'], Decimal('4.40'))  # 220 / 50, not the plain mean
+
+    def test_cube_includes_every_combination(self):
+        rows = self.cube(dimensions='stage,size_category', subtotals='cube')
+        self.assertEqual(sorted({tuple(row['grouped_by']) for row in rows}), [
+            (), ('size_category',), ('stage',), ('stage', 'size_category'),
+        ])
+
+    def test_cached_until_inventory_changes(self):
+        self.cube(dimensions='stage', subtotals='none')
+        with self.assertNumQueries(0):
+            self.cube(dimensions='stage', subtotals='none')
+
+        inventory = Inventory.objects.get(product=self.standing)
+        inventory.quantity = 30
+        with self.captureOnCommitCallbacks(execute=True):
+            inventory.save()
+        rows = self.cube(dimensions='stage', subtotals='none')
+        self.assertEqual(rows[0]['total_quantity'], 40)
 
-# Create your tests here.
+    def test_filters_apply_and_invalid_dimensions_rejected(self):
+        rows = self.cube(dimensions='product_type', subtotals='none', service_category='SANDING')
+        self.assertEqual([row['total_quantity'] for row in rows], [30])
+        self.assertEqual(self.client.get('/api/inventory/items/cube/', {'dimensions': 'colour'}).status_code, 400)
@@ -1,11 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import UnifiedInventoryViewSet as InventoryViewSet, FinishedStockViewSet
+from .views import UnifiedInventoryViewSet as InventoryViewSet, FinishedStockViewSet, capacity_plan, fulfilment_plan
 
 router = DefaultRouter()
 router.register(r'items', InventoryViewSet)
 router.register(r'finished-stock', FinishedStockViewSet) # Register FinishedStockViewSet
 
 urlpatterns = [
+    path('capacity/', capacity_plan, name='inventory-capacity'),
+    path('fulfilment/', fulfilment_plan, name='inventory-fulfilment'),
     path('', include(router.urls)),
 ]
@@ -1,11 +1,13 @@
 from rest_framework import viewsets, status
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Sum, Avg, Count
 from django.utils import timezone
+from datetime import timedelta
+import math
 from django.core.exceptions import ValidationError
 
 from .models import Inventory, FinishedStock
@@ -18,34 +20,87 @@ from .serializers import (
     InventoryUpdateSerializer,
     JobDeliverySerializer,
     FinishedStockSerializer,
+    BasketLineSerializer,
 )
 from orders.serializers import OrderItemSerializer
 from .filters import InventoryFilter
 from .filters import IsAdminOrReadOnly
+from products.models import Product
+from .summary import DIMENSIONS as SUMMARY_DIMENSIONS, SUBTOTAL_MODES, cached_summary
+from .planning import (
+    STAGES, PRODUCTION_CHAIN_MAP, INVENTORY_VERSION_LABEL, CAPACITY_VERSION_LABELS, get_capacity_plan,
+    basket_fulfilment, get_lead_time_table,
+)
+from orders.stock import quantities_by_product, with_availability, basket_availability
+from appback.conditional import static_etag, conditional_on_versions
+from appback.exports import ExportMixin
+from appback.response_cache import CachedResponseMixin
+from appback.replicas import replica_reads
+from sync.filters import UpdatedSinceFilter
 from rest_framework.pagination import PageNumberPagination
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 100
 
-class FinishedStockViewSet(viewsets.ModelViewSet):
+class FinishedStockViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = FinishedStock.objects.all()
     serializer_class = FinishedStockSerializer
     permission_classes = [AllowAny]
+    cache_version_labels = ('inventory.finishedstock', 'orders.stockreservation', 'products.product')
 
     def list(self, request, *args, **kwargs):
         print("DEBUG: FinishedStockViewSet list method hit!")
         return super().list(request, *args, **kwargs)
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter, UpdatedSinceFilter]
     filterset_fields = ['product__product_type', 'product__animal_type']
     search_fields = ['product__product_type', 'product__animal_type']
     ordering_fields = ['quantity', 'average_cost', 'last_updated']
     pagination_class = StandardResultsSetPagination
 
+    def get_queryset(self):
+        return with_availability(super().get_queryset())
+
     def list(self, request, *args, **kwargs):
         print("FinishedStockViewSet list method called!")
         return super().list(request, *args, **kwargs)
 
+    @action(detail=False, methods=['get', 'post'])
+    def availability(self, request):
+        """
+        Available-to-promise check for a basket of products, answered in one query.
+        GET  /api/inventory/finished-stock/availability/?product_ids=1,2,3
+        POST /api/inventory/finished-stock/availability/ {"items": [{"product_id": 1, "quantity": 2}, ...]}
+        """
+        if request.method == 'POST':
+            if not isinstance(request.data, dict):
+                return Response({'error': "Body must be an object with an 'items' list."},
+                                status=status.HTTP_400_BAD_REQUEST)
+            lines = BasketLineSerializer(data=request.data.get('items', []), many=True)
+            if not lines.is_valid():
+                return Response({'error': lines.errors}, status=status.HTTP_400_BAD_REQUEST)
+            if not lines.validated_data:
+                return Response({'error': 'items must not be empty.'}, status=status.HTTP_400_BAD_REQUEST)
+            required = quantities_by_product(
+                (line['product_id'], line['quantity']) for line in lines.validated_data
+            )
+        else:
+            raw_ids = request.query_params.get('product_ids', '')
+            try:
+                product_ids = [int(value) for value in raw_ids.split(',') if value.strip()]
+            except ValueError:
+                return Response({'error': 'product_ids must be a comma-separated list of integers.'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            if not product_ids:
+                return Response({'error': 'product_ids is required.'}, status=status.HTTP_400_BAD_REQUEST)
+            required = dict.fromkeys(product_ids, 1)
+
+        results = basket_availability(required)
+        return Response({
+            'can_fulfil': all(result['sufficient'] for result in results),
+            'results': results,
+        })
+
     def perform_create(self, serializer):
         # Ensure only one FinishedStock entry per product
         if FinishedStock.objects.filter(product=serializer.validated_data['product']).exists():
@@ -70,15 +125,24 @@ class FinishedStockViewSet(viewsets.ModelViewSet):
 
 
 
-class UnifiedInventoryViewSet(viewsets.ModelViewSet):
+class UnifiedInventoryViewSet(CachedResponseMixin, ExportMixin, viewsets.ModelViewSet):
     queryset = Inventory.objects.select_related('product').all()
     permission_classes = [IsAdminOrReadOnly]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    cache_version_labels = (INVENTORY_VERSION_LABEL, 'products.product')
+    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter, UpdatedSinceFilter]
     filterset_class = InventoryFilter
     search_fields = ['product__animal_type', 'product__product_type']
     ordering_fields = ['quantity', 'average_cost', 'last_updated', 'product__product_type']
     ordering = ['-last_updated']
     pagination_class = StandardResultsSetPagination
+    export_filename = 'inventory'
+    export_fields = [
+        ('id', 'id'), ('product_id', 'product_id'), ('product_type', 'product__product_type'),
+        ('animal_type', 'product__animal_type'), ('size_category', 'product__size_category'),
+        ('service_category', 'service_category'), ('quantity', 'quantity'),
+        ('average_cost', 'average_cost'), ('price_at_this_stage', 'price_at_this_stage'),
+        ('is_active', 'is_active'), ('last_updated', 'last_updated'),
+    ]
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -171,6 +235,7 @@ class UnifiedInventoryViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
+    @replica_reads
     def summary(self, request):
         group_by = request.query_params.get('group_by', 'service_category')
 
@@ -201,14 +266,100 @@ class UnifiedInventoryViewSet(viewsets.ModelViewSet):
         return Response({'summary': list(summary)})
 
     @action(detail=False, methods=['get'])
+    def cube(self, request):
+        """
+        Inventory totals grouped by any combination of dimensions, with subtotals.
+        GET /api/inventory/items/cube/?dimensions=stage,product_type&subtotals=rollup
+        subtotals: rollup (default), cube or none. The usual inventory filters apply.
+        """
+        dimensions = [value.strip() for value in request.query_params.get('dimensions', 'stage').split(',') if value.strip()]
+        unknown = [value for value in dimensions if value not in SUMMARY_DIMENSIONS]
+        if not dimensions or unknown or len(set(dimensions)) != len(dimensions):
+            return Response(
+                {'error': f"dimensions must be distinct values from: {', '.join(SUMMARY_DIMENSIONS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        subtotals = request.query_params.get('subtotals', 'rollup')
+        if subtotals not in SUBTOTAL_MODES:
+            return Response(
+                {'error': f"Invalid subtotals parameter. Use one of: {', '.join(SUBTOTAL_MODES)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = self.filter_queryset(self.get_queryset())
+        params = [(key, values) for key, values in request.query_params.lists() if key not in ('dimensions', 'subtotals')]
+        rows = cached_summary(queryset, dimensions, subtotals, params)
+        return Response({'dimensions': dimensions, 'subtotals': subtotals, 'count': len(rows), 'results': rows})
+
+    @action(detail=False, methods=['get'])
+    @static_etag
     def metadata(self, request):
         service_categories = [
             {'value': sc[0], 'label': sc[1]}
-            for sc in Inventory.SERVICE_CATEGORIES
+            for sc in Product.SERVICE_CATEGORIES
         ]
         return Response({
             'filterable_fields': ['service_category', 'quantity', 'product', 'product__product_type', 'product__size_category'],
             'sortable_fields': ['quantity', 'average_cost', 'last_updated', 'product__product_type'],
             'search_fields': ['product__animal_type', 'product__product_type'],
             'service_categories': service_categories,
-        })
\ No newline at end of file
+        })
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@conditional_on_versions(*CAPACITY_VERSION_LABELS)
+def capacity_plan(request):
+    """
+    How far current work in progress can be taken through the production chain.
+    GET /api/inventory/capacity/?product_ids=1,2,3
+    """
+    plan = get_capacity_plan()
+
+    raw_ids = request.query_params.get('product_ids')
+    if raw_ids:
+        try:
+            product_ids = {int(value) for value in raw_ids.split(',') if value.strip()}
+        except ValueError:
+            return Response({'error': 'product_ids must be a comma-separated list of integers.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        plan = [entry for entry in plan if entry['product_id'] in product_ids]
+
+    return Response({
+        'stages': STAGES,
+        'chain': PRODUCTION_CHAIN_MAP,
+        'count': len(plan),
+        'results': plan,
+    })
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def fulfilment_plan(request):
+    """
+    Where a basket can be fulfilled from: unreserved finished stock first, then work
+    in progress closest to finished, with an estimated ready date per product.
+    POST /api/inventory/fulfilment/ {"items": [{"product_id": 1, "quantity": 5}, ...]}
+    """
+    if not isinstance(request.data, dict):
+        return Response({'error': "Body must be an object with an 'items' list."}, status=status.HTTP_400_BAD_REQUEST)
+    lines = BasketLineSerializer(data=request.data.get('items', []), many=True)
+    if not lines.is_valid():
+        return Response({'error': lines.errors}, status=status.HTTP_400_BAD_REQUEST)
+    if not lines.validated_data:
+        return Response({'error': 'items must not be empty.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    required = quantities_by_product((line['product_id'], line['quantity']) for line in lines.validated_data)
+    results = basket_fulfilment(required)
+
+    today = timezone.localdate()
+    for result in results:
+        days = result['lead_time_days']
+        result['ready_by'] = today + timedelta(days=math.ceil(days)) if days is not None else None
+
+    return Response({
+        'can_fulfil': all(result['shortfall'] == 0 for result in results),
+        'lead_times': get_lead_time_table(),
+        'results': results,
+    })
@@ -1,6 +1,7 @@
 from django.contrib import admin
-from .models import Job, JobItem, ServiceRate
+from .models import Job, JobItem, ServiceRate, DailyProductionRollup
 
 admin.site.register(Job)
 admin.site.register(JobItem)
 admin.site.register(ServiceRate)
+admin.site.register(DailyProductionRollup)
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class JobsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'jobs'
+
+    def ready(self):
+        from appback.versioning import track_model_versions
+        from .models import Job, JobItem, JobDelivery, ServiceRate
+        track_model_versions(Job, JobItem, JobDelivery, ServiceRate)
+        from . import signals  # noqa: F401 Registers the rollup and re-costing receivers
@@ -1,6 +1,6 @@
 # jobs/filters.py
 import django_filters
-from .models import Job, JobItem
+from .models import Job, JobItem, JobDelivery
 from artisans.models import Artisan # Assuming Artisan app
 from products.models import Product # Assuming Product app
 
@@ -41,4 +41,32 @@ class JobItemFilter(django_filters.FilterSet):
         fields = [
             'artisan', 'product', 'payslip_generated', 'job_id',
             'created_date_gte', 'created_date_lte'
-        ]
\ No newline at end of file
+        ]
+
+
+class JobDeliveryFilter(django_filters.FilterSet):
+    artisan = django_filters.ModelChoiceFilter(
+        queryset=Artisan.objects.all(),
+        field_name='job_item__artisan',
+        help_text='Filter by Artisan ID.'
+    )
+    product = django_filters.ModelChoiceFilter(
+        queryset=Product.objects.all(),
+        field_name='job_item__product',
+        help_text='Filter by Product ID.'
+    )
+    job_id = django_filters.NumberFilter(field_name='job_item__job__job_id', help_text='Filter by parent Job ID.')
+    service_category = django_filters.ChoiceFilter(
+        field_name='job_item__job__service_category', choices=Product.SERVICE_CATEGORIES,
+        help_text='Filter by the service category of the parent Job.'
+    )
+    rejection_reason = django_filters.ChoiceFilter(choices=JobItem.REJECTION_REASONS, help_text='Filter by rejection reason.')
+    delivery_date_gte = django_filters.DateFilter(field_name='delivery_date', lookup_expr='date__gte', help_text='Delivered on or after (YYYY-MM-DD).')
+    delivery_date_lte = django_filters.DateFilter(field_name='delivery_date', lookup_expr='date__lte', help_text='Delivered on or before (YYYY-MM-DD).')
+
+    class Meta:
+        model = JobDelivery
+        fields = [
+            'artisan', 'product', 'job_id', 'service_category', 'rejection_reason',
+            'delivery_date_gte', 'delivery_date_lte'
+        ]
@@ -0,0 +1,61 @@
+import asyncio
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from appback.concurrency import gather_queries, run_queries
+from artisans.models import Artisan
+from artisans.views import _artisan_stats_queries
+from customers.views import CUSTOMER_STATS_QUERIES
+from jobs.views import JOB_DASHBOARD_QUERIES
+
+
+class Command(BaseCommand):
+    help = "Times each dashboard's queries run sequentially (sync views) and concurrently (async views)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20, help='Timed runs per dashboard and mode.')
+        parser.add_argument('--artisan', type=int, help='Artisan id for the artisan stats dashboard. Defaults to the first artisan.')
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        if iterations < 1:
+            raise CommandError('--iterations must be a positive integer.')
+
+        dashboards = {'jobs/dashboard': JOB_DASHBOARD_QUERIES, 'customers/stats': CUSTOMER_STATS_QUERIES}
+        artisans = Artisan.objects.filter(pk=options['artisan']) if options['artisan'] else Artisan.objects.order_by('pk')
+        artisan = artisans.first()
+        if artisan:
+            dashboards['artisans/stats'] = _artisan_stats_queries(artisan)
+        elif options['artisan']:
+            raise CommandError(f"Artisan {options['artisan']} not found.")
+
+        self.stdout.write(f'Database: {connection.vendor}, {iterations} runs per mode (median latency)')
+        for name, queries in dashboards.items():
+            sequential = self._time_sequential(queries, iterations)
+            concurrent = asyncio.run(self._time_concurrent(queries, iterations))
+            self.stdout.write(
+                f'{name:<18} {len(queries)} queries  sequential {sequential:8.2f} ms  '
+                f'concurrent {concurrent:8.2f} ms  speed-up x{sequential / concurrent:.2f}'
+            )
+
+    def _time_sequential(self, queries, iterations):
+        run_queries(queries)  # Warm up
+        timings = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            run_queries(queries)
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+
+    async def _time_concurrent(self, queries, iterations):
+        # One event loop for all runs, so worker threads and their connections are reused
+        await gather_queries(queries)  # Warm up
+        timings = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            await gather_queries(queries)
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
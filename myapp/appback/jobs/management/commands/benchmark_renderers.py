@@ -0,0 +1,86 @@
+import contextlib
+import io
+import json
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+from appback.renderers import MessagePackRenderer, ORJSONRenderer
+from artisans.models import Artisan
+from jobs.models import Job, JobItem, ServiceRate
+from jobs.serializers import JobDetailSerializer
+from products.models import Product
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Times DRF JSON, orjson and MessagePack rendering of a JobDetailSerializer payload.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=100, help='Job items in the sample job.')
+        parser.add_argument('--iterations', type=int, default=200, help='Timed renders per renderer.')
+
+    def handle(self, *args, **options):
+        if options['items'] < 1 or options['iterations'] < 1:
+            raise CommandError('--items and --iterations must be positive integers.')
+
+        payloads = self._payloads(options['items'])
+        renderers = {'drf json': JSONRenderer(), 'orjson': ORJSONRenderer()}
+        try:
+            import msgpack  # noqa: F401
+            renderers['msgpack'] = MessagePackRenderer()
+        except ImportError:
+            self.stdout.write('msgpack is not installed; skipping MessagePackRenderer.')
+
+        for label, data in payloads.items():
+            self.stdout.write(f"{label} ({options['items']} items, median of {options['iterations']} renders)")
+            for name, renderer in renderers.items():
+                timings, content = self._time(renderer, data, options['iterations'])
+                self.stdout.write(f'  {name:<9} {statistics.median(timings):8.1f} us  {len(content):>7} bytes')
+            same = json.loads(JSONRenderer().render(data)) == json.loads(ORJSONRenderer().render(data))
+            self.stdout.write(f"  orjson output matches DRF: {'yes' if same else 'NO'}")
+
+    def _payloads(self, item_count):
+        """Serialize a throwaway job, once with Decimal strings (the default) and once with raw Decimals."""
+        payloads = {}
+        try:
+            with transaction.atomic():
+                product = Product.objects.create(
+                    product_type='SITTING_ANIMAL', animal_type='Benchmark', size_category='MEDIUM', base_price=Decimal('12.50'),
+                )
+                artisan = Artisan.objects.create(name='Benchmark Artisan')
+                ServiceRate.objects.create(product=product, service_category='CARVING', rate_per_unit=Decimal('3.75'))
+                job = Job.objects.create(created_by='benchmark', service_category='CARVING')
+                JobItem.objects.bulk_create([
+                    JobItem(job=job, artisan=artisan, product=product, quantity_ordered=index + 1,
+                            original_amount=product.base_price * (index + 1), final_payment=Decimal('0.00'))
+                    for index in range(item_count)
+                ])
+                job = Job.objects.prefetch_related('items__artisan', 'items__product', 'items__deliveries').get(pk=job.pk)
+                # The serializer prints a line per item; keep the benchmark output readable
+                with contextlib.redirect_stdout(io.StringIO()):
+                    payloads['decimals as strings'] = JobDetailSerializer(job).data
+                    with override_settings(REST_FRAMEWORK={**api_settings.user_settings, 'COERCE_DECIMAL_TO_STRING': False}):
+                        payloads['decimals as Decimal'] = JobDetailSerializer(job).data
+                raise _Rollback()
+        except _Rollback:
+            pass
+        return payloads
+
+    def _time(self, renderer, data, iterations):
+        content = renderer.render(data)  # Warm up
+        timings = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            renderer.render(data)
+            timings.append((time.perf_counter() - started) * 1_000_000)
+        return timings, content
@@ -0,0 +1,66 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter: time loading the WSGI application, then the first
+# and second request through it, the way a newly forked worker would serve them.
+PROBE = r'''
+import io, json, sys, time
+started = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+loaded = time.perf_counter()
+
+def request(path):
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '', 'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80', 'HTTP_HOST': 'localhost', 'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr,
+    }
+    status = []
+    started = time.perf_counter()
+    body = b''.join(application(environ, lambda s, h, exc_info=None: status.append(s)))
+    return (time.perf_counter() - started) * 1000, status[0]
+
+first, status = request(sys.argv[1])
+second, _ = request(sys.argv[1])
+print(json.dumps({
+    'load': (loaded - started) * 1000, 'first': first, 'second': second, 'status': status,
+    'reportlab_loaded': 'reportlab' in sys.modules,
+}))
+'''
+
+
+class Command(BaseCommand):
+    help = 'Times application load and the first requests in fresh processes (cold worker start-up).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='Fresh processes to start.')
+        parser.add_argument('--path', default='/api/products/metadata/', help='Path requested after loading.')
+
+    def handle(self, *args, **options):
+        runs = options['runs']
+        if runs < 1:
+            raise CommandError('--runs must be a positive integer.')
+
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'appback.settings')}
+        samples = []
+        for _ in range(runs):
+            result = subprocess.run(
+                [sys.executable, '-c', PROBE, options['path']],
+                cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+            )
+            if result.returncode:
+                raise CommandError(f'Probe failed:\n{result.stderr}')
+            samples.append(json.loads(result.stdout.strip().splitlines()[-1]))
+
+        self.stdout.write(f"Settings: {env['DJANGO_SETTINGS_MODULE']}, {runs} fresh processes (median)")
+        for key, label in (('load', 'application load'), ('first', 'first request'), ('second', 'second request')):
+            self.stdout.write(f'{label:<17} {statistics.median(s[key] for s in samples):8.2f} ms')
+        self.stdout.write(f"{options['path']} -> {samples[-1]['status']}")
+        self.stdout.write(f"reportlab imported at start-up: {'yes' if samples[-1]['reportlab_loaded'] else 'no'}")
@@ -0,0 +1,28 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from jobs.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Backfills DailyProductionRollup from JobDelivery history, one date window per transaction.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start-date', type=date.fromisoformat, help='First delivery date (YYYY-MM-DD). Defaults to the earliest delivery.')
+        parser.add_argument('--end-date', type=date.fromisoformat, help='Last delivery date (YYYY-MM-DD). Defaults to the latest delivery.')
+        parser.add_argument('--chunk-days', type=int, default=31, help='Days rebuilt per transaction.')
+
+    def handle(self, *args, **options):
+        if options['chunk_days'] < 1:
+            raise CommandError('--chunk-days must be a positive integer.')
+        if options['start_date'] and options['end_date'] and options['start_date'] > options['end_date']:
+            raise CommandError('--start-date must not be after --end-date.')
+
+        def progress(window_start, window_end, rows):
+            self.stdout.write(f'{window_start} to {window_end}: {rows} rollup rows')
+
+        self.stdout.write(self.style.SUCCESS('Rebuilding production rollups...'))
+        written = rebuild_rollups(
+            options['start_date'], options['end_date'], chunk_days=options['chunk_days'], progress=progress
+        )
+        self.stdout.write(self.style.SUCCESS(f'Production rollup rebuild complete: {written} rows written.'))
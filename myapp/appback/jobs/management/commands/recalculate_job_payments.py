@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from jobs.models import JobItem
+from jobs.recosting import recost_job_items
+
+
+class Command(BaseCommand):
+    help = 'Reprices final_payment on unpaid job items (payslip not generated) at the current service rates.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--product', type=int, action='append', dest='products', help='Limit to a product id (repeatable).')
+
+    def handle(self, *args, **options):
+        pairs = None
+        if options['products']:
+            pairs = JobItem.objects.filter(product_id__in=options['products']).values_list(
+                'product_id', 'job__service_category'
+            ).distinct().order_by()
+
+        summary = recost_job_items(pairs)
+        self.stdout.write(self.style.SUCCESS(
+            f"Recalculated {summary['pairs']} product/service pair(s): {summary['items_updated']} job item(s) "
+            f"updated, total payment change {summary['total_delta']:+.2f}."
+        ))
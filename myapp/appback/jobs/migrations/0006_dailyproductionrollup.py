@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artisans', '0002_jobrating'),
+        ('products', '0003_alter_product_product_type'),
+        ('jobs', '0005_alter_servicerate_product'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyProductionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('service_category', models.CharField(choices=[('CARVING', 'Carving'), ('CUTTING', 'Cutting'), ('PAINTING', 'Painting'), ('SANDING', 'Sanding'), ('FINISHING', 'Finishing'), ('FINISHED', 'Finished')], max_length=50)),
+                ('deliveries', models.PositiveIntegerField(default=0)),
+                ('quantity_received', models.PositiveIntegerField(default=0)),
+                ('quantity_accepted', models.PositiveIntegerField(default=0)),
+                ('rejected_quality', models.PositiveIntegerField(default=0)),
+                ('rejected_damage', models.PositiveIntegerField(default=0)),
+                ('rejected_other', models.PositiveIntegerField(default=0)),
+                ('payment_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('artisan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='production_rollups', to='artisans.artisan')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='production_rollups', to='products.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'service_category'], name='jobs_dailyp_date_c9d993_idx'), models.Index(fields=['artisan', 'date'], name='jobs_dailyp_artisan_4da433_idx'), models.Index(fields=['product', 'date'], name='jobs_dailyp_product_8b86bb_idx')],
+                'unique_together': {('date', 'product', 'service_category', 'artisan')},
+            },
+        ),
+    ]
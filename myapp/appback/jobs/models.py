@@ -14,6 +14,7 @@ class Job(models.Model):
     
     job_id = models.AutoField(primary_key=True)
     created_date = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     created_by = models.CharField(max_length=100)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='IN_PROGRESS')
     service_category = models.CharField(max_length=50, choices=Product.SERVICE_CATEGORIES)
@@ -78,6 +79,7 @@ class JobItem(models.Model):
     original_amount = models.DecimalField(max_digits=10, decimal_places=2, editable=False)
     final_payment = models.DecimalField(max_digits=10, decimal_places=2, editable=False)
     payslip_generated = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     
     # Add rating field to support frontend rating display
     rating = models.DecimalField(
@@ -180,4 +182,33 @@ class ServiceRate(models.Model):
         verbose_name_plural = "Service Rates"
 
     def __str__(self):
-        return f"{self.product.product_type} - {self.product.animal_type} ({self.service_category}) Rate: Ksh{self.rate_per_unit}/unit"
\ No newline at end of file
+        return f"{self.product.product_type} - {self.product.animal_type} ({self.service_category}) Rate: Ksh{self.rate_per_unit}/unit"
+
+class DailyProductionRollup(models.Model):
+    """
+    Delivery totals for one day x product x service category x artisan.
+    Maintained from JobDelivery writes by jobs/rollups.py and rebuilt with the
+    rebuild_production_rollups command; reports read these rows instead of raw deliveries.
+    """
+    date = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='production_rollups')
+    service_category = models.CharField(max_length=50, choices=Product.SERVICE_CATEGORIES)
+    artisan = models.ForeignKey(Artisan, on_delete=models.CASCADE, related_name='production_rollups')
+    deliveries = models.PositiveIntegerField(default=0)
+    quantity_received = models.PositiveIntegerField(default=0)
+    quantity_accepted = models.PositiveIntegerField(default=0)
+    rejected_quality = models.PositiveIntegerField(default=0)
+    rejected_damage = models.PositiveIntegerField(default=0)
+    rejected_other = models.PositiveIntegerField(default=0)
+    payment_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ('date', 'product', 'service_category', 'artisan')
+        indexes = [
+            models.Index(fields=['date', 'service_category']),
+            models.Index(fields=['artisan', 'date']),
+            models.Index(fields=['product', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.service_category} - {self.product} / {self.artisan}"
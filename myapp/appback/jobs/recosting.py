@@ -0,0 +1,75 @@
+# jobs/recosting.py
+"""
+Set-based re-costing of JobItem.final_payment after ServiceRate changes.
+
+JobItem.save prices final_payment at the rate current when the item is saved,
+so a rate change leaves existing items stale. `recost_job_items` reprices every
+unpaid item of a (product, service category) pair with a single UPDATE, without
+re-saving items or re-running Job.update_status(). Items with
+payslip_generated=True have been paid and are never touched. The pair's
+DailyProductionRollup rows are rebuilt on the days with unpaid deliveries, so
+paid deliveries keep counting at what was paid (see jobs/rollups.py).
+
+jobs/signals.py calls this whenever a ServiceRate is saved or deleted; the
+recalculate_job_payments command reprices everything.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from appback.versioning import bump_version
+from sync.changes import record_changes
+
+from .models import JobItem, ServiceRate
+from .rollups import reprice_rollups
+
+
+def _recost_pair(product_id, service_category, rate):
+    """Reprice one pair's unpaid items at `rate`. Returns (items_updated, total_delta)."""
+    amount = ExpressionWrapper(F('quantity_accepted') * Value(rate), output_field=DecimalField(max_digits=10, decimal_places=2))
+    stale = JobItem.objects.filter(
+        product_id=product_id, job__service_category=service_category, payslip_generated=False,
+    ).annotate(new_payment=amount).exclude(final_payment=F('new_payment'))
+
+    delta = stale.aggregate(
+        delta=Coalesce(Sum(F('new_payment') - F('final_payment')), Value(Decimal('0.00')), output_field=DecimalField())
+    )['delta']
+    # Unpaid JobItem rows for the pair, repriced in one UPDATE
+    updated = JobItem.objects.filter(pk__in=stale.values('pk')).update(final_payment=amount, updated_at=timezone.now())
+
+    reprice_rollups(product_id, service_category)
+    return updated, Decimal(delta).quantize(Decimal('0.01'))
+
+
+def recost_job_items(pairs=None):
+    """
+    Reprice unpaid JobItems for the given (product_id, service_category) pairs,
+    or for every pair that has job items when `pairs` is None. Pairs without a
+    ServiceRate are priced at zero, as JobItem.save does.
+    Returns {'pairs': n, 'items_updated': n, 'total_delta': Decimal}.
+    """
+    if pairs is None:
+        pairs = JobItem.objects.filter(payslip_generated=False).values_list(
+            'product_id', 'job__service_category'
+        ).distinct().order_by()
+    pairs = set(pairs)
+
+    rates = {}
+    for product_id, service_category, rate in ServiceRate.objects.filter(
+        product_id__in={product_id for product_id, _ in pairs}
+    ).values_list('product_id', 'service_category', 'rate_per_unit'):
+        rates[(product_id, service_category)] = rate
+
+    summary = {'pairs': len(pairs), 'items_updated': 0, 'total_delta': Decimal('0.00')}
+    with transaction.atomic():
+        for product_id, service_category in sorted(pairs):
+            updated, delta = _recost_pair(product_id, service_category, rates.get((product_id, service_category), Decimal('0.00')))
+            summary['items_updated'] += updated
+            summary['total_delta'] += delta
+    if summary['items_updated']:
+        bump_version('jobs.jobitem')  # .update() skips post_save
+        record_changes('job_item')
+    return summary
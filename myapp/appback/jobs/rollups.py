@@ -0,0 +1,226 @@
+# jobs/rollups.py
+"""
+Daily production rollups (DailyProductionRollup).
+
+One row per delivery day x product x service category x artisan holding the
+received/accepted totals, rejections by reason and the payment amount. A
+JobDelivery write recomputes only the bucket it falls in (see jobs/signals.py).
+Moving deliveries to another bucket (a new delivery date, a JobItem's artisan
+or product, or a Job's service category) recomputes the buckets they left as
+well. `rebuild_rollups` regenerates whole date ranges in chunks.
+
+Deliveries of paid items (payslip_generated) count at the rate their item was
+paid at, final_payment / quantity_accepted, so the rollups keep matching what
+was paid. Unpaid deliveries count at the current ServiceRate, which is what
+their items are priced at; jobs/recosting.py reprices them when it changes.
+"""
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum, Count, Q, F, Min, Max, DecimalField, ExpressionWrapper, IntegerField
+from django.db.models.functions import Coalesce, TruncDate, TruncWeek, TruncMonth
+from django.utils import timezone
+
+from .models import JobDelivery, DailyProductionRollup, ServiceRate
+
+NAMED_REJECTION_REASONS = ['QUALITY', 'DAMAGE']  # Any other (or missing) reason counts as rejected_other
+
+METRIC_FIELDS = [
+    'deliveries', 'quantity_received', 'quantity_accepted',
+    'rejected_quality', 'rejected_damage', 'rejected_other', 'payment_amount',
+]
+
+# Dimensions accepted by query_rollups, mapped to the rollup columns they group on
+DIMENSIONS = {
+    'date': ['period'],
+    'product': ['product_id', 'product__product_type', 'product__animal_type', 'product__size_category'],
+    'service_category': ['service_category'],
+    'artisan': ['artisan_id', 'artisan__name'],
+}
+
+PERIODS = {'day': None, 'week': TruncWeek, 'month': TruncMonth}
+
+
+def _day_bounds(start_date, end_date):
+    """Aware datetimes covering start_date 00:00 up to (not including) the day after end_date."""
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(start_date, time.min), tz)
+    end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min), tz)
+    return start, end
+
+
+def _build_rollups(deliveries):
+    """Aggregate a JobDelivery queryset into unsaved DailyProductionRollup rows (two queries)."""
+    rejected = ExpressionWrapper(F('quantity_received') - F('quantity_accepted'), output_field=IntegerField())
+
+    def rejected_sum(condition):
+        return Coalesce(Sum(rejected, filter=condition), 0)
+
+    paid = Q(job_item__payslip_generated=True, job_item__quantity_accepted__gt=0)
+    paid_amount = ExpressionWrapper(
+        F('quantity_accepted') * F('job_item__final_payment') / F('job_item__quantity_accepted'),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+
+    buckets = list(deliveries.values(
+        day=TruncDate('delivery_date'),
+        product_ref=F('job_item__product_id'),
+        stage=F('job_item__job__service_category'),
+        artisan_ref=F('job_item__artisan_id'),
+    ).annotate(
+        delivery_count=Count('id'),
+        received=Coalesce(Sum('quantity_received'), 0),
+        accepted=Coalesce(Sum('quantity_accepted'), 0),
+        quality=rejected_sum(Q(rejection_reason='QUALITY')),
+        damage=rejected_sum(Q(rejection_reason='DAMAGE')),
+        other=rejected_sum(~Q(rejection_reason__in=NAMED_REJECTION_REASONS)),
+        paid_payment=Sum(paid_amount, filter=paid),
+        unpaid_accepted=Coalesce(Sum('quantity_accepted', filter=~paid), 0),
+    ).order_by())
+
+    rates = {
+        (product_id, service_category): rate
+        for product_id, service_category, rate in ServiceRate.objects.filter(
+            product_id__in={bucket['product_ref'] for bucket in buckets}
+        ).values_list('product_id', 'service_category', 'rate_per_unit')
+    }
+
+    return [
+        DailyProductionRollup(
+            date=bucket['day'],
+            product_id=bucket['product_ref'],
+            service_category=bucket['stage'],
+            artisan_id=bucket['artisan_ref'],
+            deliveries=bucket['delivery_count'],
+            quantity_received=bucket['received'],
+            quantity_accepted=bucket['accepted'],
+            rejected_quality=bucket['quality'],
+            rejected_damage=bucket['damage'],
+            rejected_other=bucket['other'],
+            payment_amount=(
+                Decimal(bucket['paid_payment'] or 0)
+                + bucket['unpaid_accepted'] * rates.get((bucket['product_ref'], bucket['stage']), Decimal('0.00'))
+            ).quantize(Decimal('0.01')),
+        )
+        for bucket in buckets
+    ]
+
+
+def delivery_bucket(delivery):
+    """The (date, product_id, service_category, artisan_id) bucket a delivery belongs to."""
+    job_item = delivery.job_item
+    return (
+        timezone.localdate(delivery.delivery_date),
+        job_item.product_id,
+        job_item.job.service_category,
+        job_item.artisan_id,
+    )
+
+
+def delivery_buckets(deliveries):
+    """The set of buckets the deliveries in a JobDelivery queryset fall in, from one query."""
+    return {
+        (timezone.localdate(delivery_date), product_id, service_category, artisan_id)
+        for delivery_date, product_id, service_category, artisan_id in deliveries.values_list(
+            'delivery_date', 'job_item__product_id', 'job_item__job__service_category', 'job_item__artisan_id',
+        )
+    }
+
+
+def refresh_bucket(date, product_id, service_category, artisan_id):
+    """Recompute a single rollup row from its deliveries."""
+    start, end = _day_bounds(date, date)
+    deliveries = JobDelivery.objects.filter(
+        delivery_date__gte=start, delivery_date__lt=end,
+        job_item__product_id=product_id,
+        job_item__artisan_id=artisan_id,
+        job_item__job__service_category=service_category,
+    )
+    rows = _build_rollups(deliveries)
+    if rows:
+        # Upsert so the row keeps its id while the bucket has deliveries
+        DailyProductionRollup.objects.bulk_create(
+            rows, update_conflicts=True,
+            unique_fields=['date', 'product', 'service_category', 'artisan'], update_fields=METRIC_FIELDS,
+        )
+    else:
+        DailyProductionRollup.objects.filter(
+            date=date, product_id=product_id, service_category=service_category, artisan_id=artisan_id
+        ).delete()
+
+
+def reprice_rollups(product_id, service_category):
+    """
+    Recompute the payment amounts of a (product, service category) pair's rollups
+    on the days it has unpaid deliveries. Days whose deliveries are all paid keep
+    their amounts.
+    """
+    deliveries = JobDelivery.objects.filter(
+        job_item__product_id=product_id, job_item__job__service_category=service_category,
+    )
+    days = set(deliveries.filter(job_item__payslip_generated=False).annotate(
+        day=TruncDate('delivery_date')
+    ).values_list('day', flat=True).order_by())
+    if not days:
+        return 0
+    rows = _build_rollups(deliveries.filter(delivery_date__date__in=days))
+    DailyProductionRollup.objects.bulk_create(
+        rows, update_conflicts=True,
+        unique_fields=['date', 'product', 'service_category', 'artisan'], update_fields=['payment_amount'],
+    )
+    return len(rows)
+
+
+def rebuild_rollups(start_date=None, end_date=None, chunk_days=31, progress=None):
+    """
+    Regenerate rollups for every delivery between start_date and end_date (inclusive,
+    defaulting to the full delivery history), one transaction per `chunk_days` window.
+    Calls progress(window_start, window_end, rows_written) after each window.
+    Returns the number of rollup rows written.
+    """
+    if start_date is None or end_date is None:
+        bounds = JobDelivery.objects.aggregate(first=Min('delivery_date'), last=Max('delivery_date'))
+        if bounds['first'] is None:
+            return 0
+        start_date = start_date or timezone.localdate(bounds['first'])
+        end_date = end_date or timezone.localdate(bounds['last'])
+
+    written = 0
+    window_start = start_date
+    while window_start <= end_date:
+        window_end = min(window_start + timedelta(days=chunk_days - 1), end_date)
+        start, end = _day_bounds(window_start, window_end)
+        with transaction.atomic():
+            DailyProductionRollup.objects.filter(date__gte=window_start, date__lte=window_end).delete()
+            rows = DailyProductionRollup.objects.bulk_create(
+                _build_rollups(JobDelivery.objects.filter(delivery_date__gte=start, delivery_date__lt=end))
+            )
+        written += len(rows)
+        if progress:
+            progress(window_start, window_end, len(rows))
+        window_start = window_end + timedelta(days=1)
+    return written
+
+
+def query_rollups(start_date=None, end_date=None, group_by=('date',), period='day', filters=None):
+    """
+    Sum the rollup metrics over a date range, grouped by any of DIMENSIONS.
+    `filters` narrows the rows first, e.g. {'artisan_id': 3, 'service_category': 'CARVING'}.
+    """
+    rollups = DailyProductionRollup.objects.all()
+    if start_date:
+        rollups = rollups.filter(date__gte=start_date)
+    if end_date:
+        rollups = rollups.filter(date__lte=end_date)
+    if filters:
+        rollups = rollups.filter(**filters)
+
+    truncate = PERIODS[period]
+    rollups = rollups.annotate(period=truncate('date') if truncate else F('date'))
+
+    columns = [column for dimension in group_by for column in DIMENSIONS[dimension]]
+    totals = {f'total_{field}': Sum(field) for field in METRIC_FIELDS}
+    if not columns:
+        return [rollups.aggregate(**totals)]
+    return list(rollups.values(*columns).annotate(**totals).order_by(*columns))
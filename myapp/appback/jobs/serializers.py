@@ -1,8 +1,11 @@
 # jobs/serializers.py
+from django.db.models import OuterRef, Subquery
 from rest_framework import serializers
 from .models import Job, JobItem, JobDelivery, ServiceRate
 from artisans.models import Artisan # Assuming Artisan app
 from products.models import Product # Assuming Product app
+from inventory.planning import PRODUCTION_CHAIN_MAP
+from appback.sparse import SparseFieldsMixin
 
 # --- Lite Serializers for Nested Data ---
 
@@ -60,16 +63,7 @@ class JobItemCreateUpdateSerializer(serializers.ModelSerializer):
         # Use the job's service_category as the current_service_category for deduction logic
         current_service_category = job.service_category
 
-        # Define the production chain mapping
-        # Key: current service category of the job item
-        # Value: list of possible previous service categories to deduct from (in order of preference)
-        PRODUCTION_CHAIN_MAP = {
-            'SANDING': ['CARVING', 'CUTTING'],
-            'PAINTING': ['SANDING'],
-            'FINISHING': ['PAINTING'],
-            'FINISHED': ['FINISHING'],
-        }
-
+        # Possible previous service categories to deduct from (in order of preference)
         previous_categories_to_check = PRODUCTION_CHAIN_MAP.get(current_service_category)
 
         if previous_categories_to_check:
@@ -128,8 +122,11 @@ class JobItemCreateUpdateSerializer(serializers.ModelSerializer):
         return instance
 
 
-class JobItemDetailListSerializer(serializers.ModelSerializer):
-    """Serializer for listing and retrieving JobItems, with nested related data."""
+class JobItemDetailListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """
+    Serializer for listing and retrieving JobItems, with nested related data.
+    Deliveries and the service rate are only rendered on ?expand=.
+    """
     artisan = ArtisanJobItemLiteSerializer(read_only=True)
     product = ProductJobItemLiteSerializer(read_only=True)
     deliveries = JobItemDeliverySerializer(many=True, read_only=True) # Nested deliveries
@@ -148,7 +145,21 @@ class JobItemDetailListSerializer(serializers.ModelSerializer):
             'original_amount', 'final_payment', 'payslip_generated'
         ]
 
+    expandable_fields = ('deliveries', 'service_rate_per_unit')
+    field_queryset_hints = {
+        'artisan': {'select': ('artisan',)},
+        'product': {'select': ('product',)},
+        'deliveries': {'prefetch': ('deliveries',)},
+        'service_rate_per_unit': {'annotate': {'current_service_rate': Subquery(
+            ServiceRate.objects.filter(
+                product=OuterRef('product'), service_category=OuterRef('job__service_category')
+            ).values('rate_per_unit')[:1]
+        )}},
+    }
+
     def get_service_rate_per_unit(self, obj):
+        if hasattr(obj, 'current_service_rate'):  # Annotated by shape_queryset
+            return obj.current_service_rate
         from django.core.exceptions import ObjectDoesNotExist
         print(f"Attempting to get service rate for Product ID: {obj.product.id}, Job Service Category: {obj.job.service_category}")
         try:
@@ -163,7 +174,7 @@ class JobItemDetailListSerializer(serializers.ModelSerializer):
 
 # --- Job Serializers ---
 
-class JobListSerializer(serializers.ModelSerializer):
+class JobListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for listing Jobs."""
     service_category_display = serializers.CharField(source='get_service_category_display', read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
@@ -187,6 +198,30 @@ class JobDetailSerializer(JobListSerializer):
     class Meta(JobListSerializer.Meta):
         fields = JobListSerializer.Meta.fields + ['items']
 
+    field_queryset_hints = {
+        'items': {'prefetch': (('items', JobItemDetailListSerializer, JobItem.objects.all()),)},
+    }
+
+
+class JobSheetSerializer(JobListSerializer):
+    """
+    Job header of the job sheet (jobs/sheet.py). The totals and artisans come from
+    the items already loaded (context['items'], with current_service_rate set)
+    instead of the model properties, which query once per item.
+    """
+    total_cost = serializers.SerializerMethodField()
+    total_final_payment = serializers.SerializerMethodField()
+    artisans_involved = serializers.SerializerMethodField()
+
+    def get_total_cost(self, obj):
+        return float(sum((item.current_service_rate or 0) * item.quantity_ordered for item in self.context['items']))
+
+    def get_total_final_payment(self, obj):
+        return float(sum(item.final_payment for item in self.context['items']))
+
+    def get_artisans_involved(self, obj):
+        return list(dict.fromkeys(item.artisan.name for item in self.context['items']))
+
 
 class JobCreateUpdateSerializer(serializers.ModelSerializer):
     """Serializer for creating and updating Jobs."""
@@ -0,0 +1,67 @@
+# jobs/sheet.py
+"""
+The job sheet: everything the job screen renders, in one response.
+
+    GET /api/jobs/{job_id}/sheet/
+
+Replaces job detail + list_job_items + list_job_item_deliveries per item +
+get_price per product + an Inventory lookup per product. However many items
+the job has, the sheet is built from at most five queries: the job, its items
+(with artisan and product), their deliveries, the ServiceRates of the job's
+service category for those products, and their Inventory at the stages the
+job consumes from (PRODUCTION_CHAIN_MAP).
+
+Each item carries its service rate, deliveries (newest first), remaining
+quantity and `upstream_stock`, the quantity on hand at each of those stages.
+"""
+from django.db.models import Prefetch
+
+from inventory.models import Inventory
+from inventory.planning import PRODUCTION_CHAIN_MAP
+
+from .models import JobDelivery, ServiceRate
+from .serializers import JobItemDetailListSerializer, JobSheetSerializer
+
+
+def build_job_sheet(job):
+    """Return the sheet data for `job`."""
+    items = list(
+        job.items.select_related('artisan', 'product').prefetch_related(
+            Prefetch('deliveries', queryset=JobDelivery.objects.order_by('-delivery_date'))
+        ).order_by('id')
+    )
+    product_ids = {item.product_id for item in items}
+
+    rates = dict(ServiceRate.objects.filter(
+        product_id__in=product_ids, service_category=job.service_category
+    ).values_list('product_id', 'rate_per_unit'))
+
+    # The stages and rows that creating an item deducts from
+    upstream_stages = PRODUCTION_CHAIN_MAP.get(job.service_category, [])
+    stock = {product_id: dict.fromkeys(upstream_stages, 0) for product_id in product_ids}
+    for product_id, stage, quantity in Inventory.objects.filter(
+        product_id__in=product_ids, service_category__in=upstream_stages
+    ).values_list('product_id', 'service_category', 'quantity'):
+        stock[product_id][stage] += quantity
+
+    for item in items:
+        item.current_service_rate = rates.get(item.product_id)  # Read by get_service_rate_per_unit
+
+    item_data = JobItemDetailListSerializer(items, many=True).data
+    for item, data in zip(items, item_data):
+        data['remaining_quantity'] = item.quantity_ordered - item.quantity_received
+        data['upstream_stock'] = stock[item.product_id]
+
+    return {
+        'job': JobSheetSerializer(job, context={'items': items}).data,
+        'upstream_stages': upstream_stages,
+        'items': item_data,
+        'totals': {
+            'items': len(items),
+            'deliveries': sum(len(item.deliveries.all()) for item in items),
+            'quantity_ordered': sum(item.quantity_ordered for item in items),
+            'quantity_received': sum(item.quantity_received for item in items),
+            'quantity_accepted': sum(item.quantity_accepted for item in items),
+            'remaining_quantity': sum(data['remaining_quantity'] for data in item_data),
+        },
+    }
@@ -0,0 +1,77 @@
+# jobs/signals.py
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Job, JobItem, JobDelivery, ServiceRate
+from .recosting import recost_job_items
+from .rollups import delivery_bucket, delivery_buckets, refresh_bucket
+
+# Set in pre_save on rows whose deliveries may be changing bucket; read in post_save
+BUCKETS_BEFORE = '_rollup_buckets_before'
+
+
+def _refresh_moved_buckets(instance, deliveries):
+    # Refresh the buckets the deliveries left and the ones they are in now
+    before = instance.__dict__.pop(BUCKETS_BEFORE, None)
+    if before is not None:
+        for bucket in before | delivery_buckets(deliveries):
+            refresh_bucket(*bucket)
+
+
+@receiver(pre_save, sender=JobDelivery, dispatch_uid='rollup_delivery_before')
+def remember_delivery_bucket(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        return
+    instance.__dict__[BUCKETS_BEFORE] = delivery_buckets(JobDelivery.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=JobDelivery, dispatch_uid='rollup_delivery_save')
+@receiver(post_delete, sender=JobDelivery, dispatch_uid='rollup_delivery_delete')
+def refresh_delivery_rollup(sender, instance, raw=False, **kwargs):
+    if raw:  # Skip fixture loading; rebuild_production_rollups covers it
+        return
+    bucket = delivery_bucket(instance)
+    for moved_from in instance.__dict__.pop(BUCKETS_BEFORE, set()) - {bucket}:
+        refresh_bucket(*moved_from)
+    refresh_bucket(*bucket)
+
+
+@receiver(pre_save, sender=JobItem, dispatch_uid='rollup_item_before')
+def remember_item_buckets(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        return
+    unchanged = JobItem.objects.filter(
+        pk=instance.pk, artisan_id=instance.artisan_id, product_id=instance.product_id,
+    ).exists()
+    if not unchanged:
+        instance.__dict__[BUCKETS_BEFORE] = delivery_buckets(JobDelivery.objects.filter(job_item_id=instance.pk))
+
+
+@receiver(post_save, sender=JobItem, dispatch_uid='rollup_item_save')
+def refresh_item_rollups(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _refresh_moved_buckets(instance, JobDelivery.objects.filter(job_item_id=instance.pk))
+
+
+@receiver(pre_save, sender=Job, dispatch_uid='rollup_job_before')
+def remember_job_buckets(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        return
+    if not Job.objects.filter(pk=instance.pk, service_category=instance.service_category).exists():
+        instance.__dict__[BUCKETS_BEFORE] = delivery_buckets(JobDelivery.objects.filter(job_item__job_id=instance.pk))
+
+
+@receiver(post_save, sender=Job, dispatch_uid='rollup_job_save')
+def refresh_job_rollups(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _refresh_moved_buckets(instance, JobDelivery.objects.filter(job_item__job_id=instance.pk))
+
+
+@receiver(post_save, sender=ServiceRate, dispatch_uid='recost_rate_save')
+@receiver(post_delete, sender=ServiceRate, dispatch_uid='recost_rate_delete')
+def recost_unpaid_items(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    recost_job_items([(instance.product_id, instance.service_category)])
@@ -1,5 +1,19 @@
-from django.test import TestCase
-from jobs.models import Job, JobItem
+import csv
+import json
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from appback.testing import ProductionFixtures
+from inventory.models import Inventory
+from jobs.models import DailyProductionRollup, Job, JobDelivery, JobItem, ServiceRate
+from jobs.recosting import recost_job_items
+from jobs.rollups import rebuild_rollups
 from products.models import Product
 from artisans.models import Artisan
 
@@ -29,4 +43,245 @@ class ArtisanSpecialtyTest(TestCase):
             product=self.product,
             quantity_ordered=10
         )
-        self.assertIn(self.product.service_category, self.artisan.specialties)
\ No newline at end of file
+        self.assertIn(self.product.service_category, self.artisan.specialties)
+
+class ProductionRollupTest(ProductionFixtures, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.amani = cls.artisan
+        cls.baraka = Artisan.objects.create(name='Baraka')
+        cls.items = {
+            cls.amani: cls.item,
+            cls.baraka: JobItem.objects.create(job=cls.job, artisan=cls.baraka, product=cls.product, quantity_ordered=10),
+        }
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def deliver(self, artisan, received, accepted, reason=None):
+        return JobDelivery.objects.create(
+            job_item=self.items[artisan], quantity_received=received,
+            quantity_accepted=accepted, rejection_reason=reason,
+        )
+
+    def test_deliveries_update_their_bucket(self):
+        self.deliver(self.amani, 5, 4, 'QUALITY')
+        delivery = self.deliver(self.amani, 3, 1, 'DAMAGE')
+        rollup = DailyProductionRollup.objects.get(artisan=self.amani)
+        self.assertEqual(
+            (rollup.deliveries, rollup.quantity_received, rollup.quantity_accepted,
+             rollup.rejected_quality, rollup.rejected_damage, rollup.payment_amount),
+            (2, 8, 5, 1, 2, 25),
+        )
+
+        delivery.delete()
+        rollup.refresh_from_db()
+        self.assertEqual((rollup.quantity_received, rollup.rejected_damage), (5, 0))
+
+    def test_reassigned_item_moves_its_rollups(self):
+        self.deliver(self.amani, 5, 4)
+        item = self.items[self.amani]
+        item.artisan = self.baraka
+        item.save()
+        self.assertFalse(DailyProductionRollup.objects.filter(artisan=self.amani).exists())
+        self.assertEqual(DailyProductionRollup.objects.get(artisan=self.baraka).quantity_received, 5)
+
+        item.job.service_category = 'SANDING'
+        item.job.save()
+        self.assertEqual(
+            list(DailyProductionRollup.objects.values_list('service_category', 'quantity_received')),
+            [('SANDING', 5)],
+        )
+
+    def test_backfill_matches_incremental_rows(self):
+        self.deliver(self.amani, 5, 5)
+        self.deliver(self.baraka, 4, 2, 'OTHER')
+        fields = ['artisan_id', 'quantity_received', 'quantity_accepted', 'rejected_other', 'payment_amount']
+        incremental = list(DailyProductionRollup.objects.order_by('artisan_id').values_list(*fields))
+
+        DailyProductionRollup.objects.all().delete()
+        call_command('rebuild_production_rollups', '--chunk-days', '1', stdout=StringIO())
+        self.assertEqual(list(DailyProductionRollup.objects.order_by('artisan_id').values_list(*fields)), incremental)
+
+    def test_report_groups_by_requested_dimensions(self):
+        self.deliver(self.amani, 5, 5)
+        self.deliver(self.baraka, 4, 2, 'QUALITY')
+
+        response = self.client.get('/api/jobs/rollups/', {'group_by': 'service_category', 'period': 'month'})
+        self.assertEqual(response.status_code, 200)
+        [row] = response.data['results']
+        self.assertEqual((row['service_category'], row['total_quantity_accepted'], row['total_rejected_quality']), ('CARVING', 7, 2))
+
+        response = self.client.get('/api/jobs/rollups/', {'group_by': 'artisan', 'artisan': self.baraka.id})
+        self.assertEqual([row['artisan__name'] for row in response.data['results']], ['Baraka'])
+
+        response = self.client.get('/api/jobs/rollups/', {'group_by': 'colour'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/jobs/rollups/', {'product': 'abc'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ExportTest(ProductionFixtures, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        JobItem.objects.create(job=cls.job, artisan=Artisan.objects.create(name='Baraka'), product=cls.product, quantity_ordered=5)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def read(self, response):
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_export_streams_filtered_rows(self):
+        baraka = Artisan.objects.get(name='Baraka')
+        response = self.client.get('/api/jobs/job-items/export/', {'format': 'csv', 'artisan': baraka.id})
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(self.read(response).splitlines()))
+        self.assertEqual([(row['artisan'], row['quantity_ordered']) for row in rows], [('Baraka', '5')])
+
+    def test_ndjson_export(self):
+        response = self.client.get('/api/jobs/job-items/export/', {'format': 'ndjson', 'ordering': 'artisan__name'})
+        lines = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual([line['artisan'] for line in lines], ['Amani', 'Baraka'])
+
+    def test_job_export_and_invalid_filter(self):
+        response = self.client.get('/api/jobs/export/', {'format': 'csv', 'status': 'IN_PROGRESS'})
+        self.assertEqual(len(self.read(response).splitlines()), 2)
+        response = self.client.get('/api/jobs/export/', {'format': 'csv', 'status': 'NOPE'})
+        self.assertEqual(response.status_code, 400)
+
+
+class RecostJobPaymentsTest(ProductionFixtures, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        sanding = Job.objects.create(created_by='planner', service_category='SANDING')
+        cls.unpaid = cls.item
+        cls.unpaid.quantity_accepted = 4
+        cls.unpaid.save()
+        cls.paid = JobItem.objects.create(job=cls.job, artisan=cls.artisan, product=cls.product, quantity_ordered=10, quantity_accepted=6)
+        cls.other_stage = JobItem.objects.create(job=sanding, artisan=cls.artisan, product=cls.product, quantity_ordered=10, quantity_accepted=3)
+        JobItem.objects.filter(pk=cls.paid.pk).update(payslip_generated=True)
+
+    def payments(self):
+        return {item.pk: item.final_payment for item in JobItem.objects.all()}
+
+    def test_rate_change_reprices_only_unpaid_items_of_that_pair(self):
+        self.rate.rate_per_unit = 7
+        self.rate.save()
+        payments = self.payments()
+        self.assertEqual(payments[self.unpaid.pk], 28)
+        self.assertEqual(payments[self.paid.pk], 30)
+        self.assertEqual(payments[self.other_stage.pk], 0)
+
+        self.rate.delete()
+        self.assertEqual(self.payments()[self.unpaid.pk], 0)
+
+    def test_rate_change_keeps_paid_deliveries_at_the_paid_rate_in_rollups(self):
+        artisan = Artisan.objects.create(name='Baraka')
+        job = Job.objects.create(created_by='planner', service_category='CARVING')
+        paid = JobItem.objects.create(job=job, artisan=artisan, product=self.product, quantity_ordered=10)
+        unpaid = JobItem.objects.create(job=job, artisan=artisan, product=self.product, quantity_ordered=10)
+        JobDelivery.objects.create(job_item=paid, quantity_received=6, quantity_accepted=6)
+        JobDelivery.objects.create(job_item=unpaid, quantity_received=4, quantity_accepted=4)
+        JobItem.objects.filter(pk=paid.pk).update(payslip_generated=True)
+
+        self.rate.rate_per_unit = 7
+        self.rate.save()
+        rollup = DailyProductionRollup.objects.get(artisan=artisan)
+        self.assertEqual(rollup.payment_amount, 6 * 5 + 4 * 7)
+
+        # A full rebuild agrees with the incremental repricing
+        rebuild_rollups()
+        self.assertEqual(DailyProductionRollup.objects.get(artisan=artisan).payment_amount, 58)
+
+    def test_command_reports_count_and_delta(self):
+        # A bulk write skips the post_save hook, leaving items stale
+        ServiceRate.objects.filter(pk=self.rate.pk).update(rate_per_unit=8)
+        summary = recost_job_items()
+        self.assertEqual((summary['items_updated'], summary['total_delta']), (1, 12))
+        self.assertEqual(self.payments()[self.paid.pk], 30)
+
+        out = StringIO()
+        call_command('recalculate_job_payments', stdout=out)
+        self.assertIn('0 job item(s) updated', out.getvalue())
+
+
+class AsyncDashboardTest(ProductionFixtures, TransactionTestCase):
+    """Async dashboard variants return the sync payloads; their queries run on worker-thread connections."""
+
+    def setUp(self):
+        self.create_production_data()
+
+    def test_async_dashboard_matches_sync_endpoint(self):
+        expected = self.client.get('/api/jobs/dashboard/')
+        self.assertEqual(expected.status_code, 200)
+        response = self.client.get('/api/jobs/dashboard/async/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), expected.json())
+        self.assertEqual(self.client.post('/api/jobs/dashboard/async/').status_code, 405)
+
+    def test_benchmark_command_reports_both_modes(self):
+        out = StringIO()
+        call_command('benchmark_dashboards', '--iterations', '2', stdout=out)
+        self.assertIn('jobs/dashboard', out.getvalue())
+        self.assertIn('artisans/stats', out.getvalue())
+
+
+class JobSheetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.artisan = Artisan.objects.create(name='Amani')
+        cls.job = Job.objects.create(created_by='planner', service_category='SANDING')
+        cls.products = []
+        for index, animal in enumerate(['Elephant', 'Giraffe', 'Lion']):
+            product = Product.objects.create(
+                product_type='SITTING_ANIMAL', animal_type=animal, size_category='MEDIUM', base_price=10
+            )
+            ServiceRate.objects.create(product=product, service_category='SANDING', rate_per_unit='2.50')
+            Inventory.objects.create(product=product, service_category='CARVING', quantity=4 + index, average_cost=5)
+            cls.products.append(product)
+        item = JobItem.objects.create(job=cls.job, artisan=cls.artisan, product=cls.products[0], quantity_ordered=5)
+        JobDelivery.objects.create(job_item=item, quantity_received=2, quantity_accepted=2)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def add_item(self, product, quantity):
+        return JobItem.objects.create(job=self.job, artisan=self.artisan, product=product, quantity_ordered=quantity)
+
+    def get_sheet(self):
+        cache.clear()
+        return self.client.get(f'/api/jobs/{self.job.job_id}/sheet/')
+
+    def test_sheet_combines_items_rates_deliveries_and_stock(self):
+        sheet = self.get_sheet().json()
+        self.assertEqual(sheet['job']['job_id'], self.job.job_id)
+        self.assertEqual(sheet['job']['artisans_involved'], ['Amani'])
+        self.assertEqual(sheet['job']['total_cost'], 12.5)
+        self.assertEqual(sheet['upstream_stages'], ['CARVING', 'CUTTING'])
+
+        item = sheet['items'][0]
+        self.assertEqual(float(item['service_rate_per_unit']), 2.5)
+        self.assertEqual(len(item['deliveries']), 1)
+        self.assertEqual(item['remaining_quantity'], 3)
+        self.assertEqual(item['upstream_stock'], {'CARVING': 4, 'CUTTING': 0})
+        self.assertEqual(sheet['totals']['remaining_quantity'], 3)
+
+    def test_query_count_does_not_grow_with_items(self):
+        with CaptureQueriesContext(connection) as one_item:
+            self.get_sheet()
+        for product in self.products[1:]:
+            self.add_item(product, quantity=3)
+        with CaptureQueriesContext(connection) as three_items:
+            response = self.get_sheet()
+
+        self.assertEqual(len(response.json()['items']), 3)
+        self.assertEqual(len(three_items.captured_queries), len(one_item.captured_queries))
+        self.assertLessEqual(len(three_items.captured_queries), 5)
+
+    def test_unknown_job_is_404(self):
+        self.assertEqual(self.client.get('/api/jobs/999999/sheet/').status_code, 404)
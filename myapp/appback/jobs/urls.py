@@ -1,7 +1,7 @@
 # jobs/urls.py
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import JobViewSet, JobItemViewSet, JobDeliveryViewSet, ServiceRateViewSet
+from .views import JobViewSet, JobItemViewSet, JobDeliveryViewSet, ServiceRateViewSet, production_rollups, job_dashboard_async
 
 # Create routers for standalone viewsets
 standalone_router = DefaultRouter()
@@ -13,6 +13,10 @@ urlpatterns = [
     # Job CRUD operations (basic REST endpoints)
     path('', JobViewSet.as_view({'get': 'list', 'post': 'create'}), name='job-list'),
     path('dashboard/', JobViewSet.as_view({'get': 'dashboard'}), name='job-dashboard'),
+    path('dashboard/async/', job_dashboard_async, name='job-dashboard-async'),
+    path('rollups/', production_rollups, name='production-rollups'),
+    path('export/', JobViewSet.as_view({'get': 'export'}, **JobViewSet.export.kwargs), name='job-export'),
+    path('_batch/', JobViewSet.as_view({'post': 'batch'}), name='job-batch'),
     path('<str:job_id>/', JobViewSet.as_view({'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'}), name='job-detail'),
     
     # Job Items nested routes
@@ -39,6 +43,7 @@ urlpatterns = [
     
     # Job summary route
     path('<str:job_id>/summary/', JobViewSet.as_view({'get': 'job_summary'}), name='job-summary'),
+    path('<str:job_id>/sheet/', JobViewSet.as_view({'get': 'job_sheet'}), name='job-sheet'),
     
     # Include standalone viewsets
     path('', include(standalone_router.urls)),
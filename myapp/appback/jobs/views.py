@@ -5,7 +5,7 @@ from django.db.models import Q, Sum, F, Count
 from rest_framework.permissions import AllowAny
 
 from rest_framework import viewsets, status, filters
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.pagination import PageNumberPagination
@@ -21,7 +21,37 @@ from .serializers import (
     JobItemDeliverySerializer,
     ServiceRateSerializer,
 )
-from .filters import JobFilter, JobItemFilter
+from .filters import JobFilter, JobItemFilter, JobDeliveryFilter
+from .rollups import DIMENSIONS, PERIODS, query_rollups
+from .sheet import build_job_sheet
+from appback.conditional import ConditionalGetMixin
+from appback.response_cache import CachedResponseMixin, cache_on_versions
+from appback.batch import BatchMixin
+from appback.sparse import SparseQuerysetMixin
+from appback.exports import ExportMixin
+from appback.replicas import replica_reads
+from appback.concurrency import run_queries, gather_queries, async_get_view
+from inventory.planning import INVENTORY_VERSION_LABEL
+from sync.filters import UpdatedSinceFilter
+
+
+# Independent queries behind the job dashboard (see appback/concurrency.py)
+JOB_DASHBOARD_QUERIES = {
+    'total_jobs': lambda: Job.objects.count(),
+    'in_progress': lambda: Job.objects.filter(status='IN_PROGRESS').count(),
+    'partially_received': lambda: Job.objects.filter(status='PARTIALLY_RECEIVED').count(),
+    'completed': lambda: Job.objects.filter(status='COMPLETED').count(),
+    'total_cost': lambda: Job.objects.aggregate(total=Sum(F('items__original_amount')))['total'] or 0,
+    'total_final_payment': lambda: Job.objects.aggregate(total=Sum(F('items__final_payment')))['total'] or 0,
+}
+
+
+# Everything the job, job item and delivery serializers read
+JOB_VERSION_LABELS = (
+    'jobs.job', 'jobs.jobitem', 'jobs.jobdelivery', 'jobs.servicerate', 'artisans.artisan', 'products.product',
+)
+# The job sheet also shows upstream stock
+JOB_SHEET_VERSION_LABELS = JOB_VERSION_LABELS + (INVENTORY_VERSION_LABEL,)
 
 
 class JobPagination(PageNumberPagination):
@@ -30,7 +60,7 @@ class JobPagination(PageNumberPagination):
     max_page_size = 100
 
 
-class JobViewSet(viewsets.ModelViewSet):
+class JobViewSet(SparseQuerysetMixin, CachedResponseMixin, BatchMixin, ExportMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing Job resources.
     Supports CRUD operations for Jobs.
@@ -39,11 +69,18 @@ class JobViewSet(viewsets.ModelViewSet):
     queryset = Job.objects.all().order_by('-created_date')
     pagination_class = JobPagination
     permission_classes = [AllowAny]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter, UpdatedSinceFilter]
     filterset_class = JobFilter
     search_fields = ['job_id', 'created_by', 'notes']
     ordering_fields = ['created_date', 'status', 'service_category', 'total_cost', 'total_final_payment']
     lookup_field = 'job_id'
+    export_filename = 'jobs'
+    replica_actions = ('list',)
+    cache_version_labels = JOB_VERSION_LABELS
+    export_fields = [
+        ('job_id', 'job_id'), ('created_date', 'created_date'), ('created_by', 'created_by'),
+        ('status', 'status'), ('service_category', 'service_category'), ('notes', 'notes'),
+    ]
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -72,24 +109,13 @@ class JobViewSet(viewsets.ModelViewSet):
         instance.delete()
 
     @action(detail=False, methods=['get'], url_path='dashboard')
+    @replica_reads
     def dashboard(self, request):
         """
         GET /api/jobs/dashboard/
         Get job statistics and summary data.
         """
-        stats = {
-            'total_jobs': Job.objects.count(),
-            'in_progress': Job.objects.filter(status='IN_PROGRESS').count(),
-            'partially_received': Job.objects.filter(status='PARTIALLY_RECEIVED').count(),
-            'completed': Job.objects.filter(status='COMPLETED').count(),
-            'total_cost': Job.objects.aggregate(
-                total=Sum(F('items__original_amount'))
-            )['total'] or 0,
-            'total_final_payment': Job.objects.aggregate(
-                total=Sum(F('items__final_payment'))
-            )['total'] or 0,
-        }
-        return Response(stats)
+        return Response(run_queries(JOB_DASHBOARD_QUERIES))
 
     # --- Nested JobItem Actions ---
 
@@ -100,18 +126,19 @@ class JobViewSet(viewsets.ModelViewSet):
         List all JobItems for a specific Job.
         """
         job = self.get_object()
-        queryset = job.items.all().select_related('artisan', 'product').order_by('id')
+        queryset = JobItemDetailListSerializer.shape_queryset(job.items.all().order_by('id'), request)
 
         # Apply JobItemFilter
         filter_instance = JobItemFilter(request.query_params, queryset=queryset)
         queryset = filter_instance.qs
 
+        context = self.get_serializer_context()
         page = self.paginate_queryset(queryset)
         if page is not None:
-            serializer = JobItemDetailListSerializer(page, many=True)
+            serializer = JobItemDetailListSerializer(page, many=True, context=context)
             return self.get_paginated_response(serializer.data)
 
-        serializer = JobItemDetailListSerializer(queryset, many=True)
+        serializer = JobItemDetailListSerializer(queryset, many=True, context=context)
         return Response(serializer.data)
 
     
@@ -298,6 +325,7 @@ class JobViewSet(viewsets.ModelViewSet):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=True, methods=['get'], url_path='summary')
+    @replica_reads
     def job_summary(self, request, job_id=None):
         """
         GET /api/jobs/{job_id}/summary/
@@ -340,8 +368,18 @@ class JobViewSet(viewsets.ModelViewSet):
         
         return Response(summary_data)
 
+    @action(detail=True, methods=['get'], url_path='sheet')
+    @cache_on_versions(*JOB_SHEET_VERSION_LABELS)
+    def job_sheet(self, request, job_id=None):
+        """
+        GET /api/jobs/{job_id}/sheet/
+        Everything the job screen needs in one response: items with rates, deliveries,
+        remaining quantities and upstream stage stock (see jobs/sheet.py).
+        """
+        return Response(build_job_sheet(self.get_object()))
+
 
-class JobItemViewSet(viewsets.ModelViewSet):
+class JobItemViewSet(SparseQuerysetMixin, CachedResponseMixin, ExportMixin, viewsets.ModelViewSet):
     """
     Standalone ViewSet for JobItem resources.
     Provides direct access to JobItems across all jobs.
@@ -349,11 +387,25 @@ class JobItemViewSet(viewsets.ModelViewSet):
     queryset = JobItem.objects.all().select_related('artisan', 'product', 'job')
     serializer_class = JobItemDetailListSerializer
     permission_classes = [AllowAny]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter, UpdatedSinceFilter]
     filterset_class = JobItemFilter
     search_fields = ['artisan__name', 'product__product_type', 'job__job_id']
     ordering_fields = ['job__created_date', 'artisan__name', 'product__product_type', 'quantity_ordered']
     pagination_class = JobPagination
+    export_filename = 'job-items'
+    replica_actions = ('list',)
+    cache_version_labels = JOB_VERSION_LABELS
+    export_fields = [
+        ('id', 'id'), ('job_id', 'job_id'), ('job_created_date', 'job__created_date'),
+        ('service_category', 'job__service_category'),
+        ('artisan_id', 'artisan_id'), ('artisan', 'artisan__name'),
+        ('product_id', 'product_id'), ('product_type', 'product__product_type'),
+        ('animal_type', 'product__animal_type'), ('size_category', 'product__size_category'),
+        ('quantity_ordered', 'quantity_ordered'), ('quantity_received', 'quantity_received'),
+        ('quantity_accepted', 'quantity_accepted'), ('rejection_reason', 'rejection_reason'),
+        ('original_amount', 'original_amount'), ('final_payment', 'final_payment'),
+        ('payslip_generated', 'payslip_generated'),
+    ]
 
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
@@ -454,7 +506,7 @@ class JobItemViewSet(viewsets.ModelViewSet):
         return Response({"detail": "Payslip status reset successfully"})
 
 
-class JobDeliveryViewSet(viewsets.ModelViewSet):
+class JobDeliveryViewSet(CachedResponseMixin, ExportMixin, viewsets.ModelViewSet):
     """
     Standalone ViewSet for JobDelivery resources.
     Provides direct access to all deliveries across all jobs.
@@ -462,10 +514,24 @@ class JobDeliveryViewSet(viewsets.ModelViewSet):
     queryset = JobDelivery.objects.all().select_related('job_item__job', 'job_item__artisan', 'job_item__product')
     serializer_class = JobItemDeliverySerializer
     permission_classes = [AllowAny]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter, UpdatedSinceFilter]
+    filterset_class = JobDeliveryFilter
     search_fields = ['job_item__artisan__name', 'job_item__product__product_type', 'job_item__job__job_id']
     ordering_fields = ['delivery_date', 'quantity_received', 'quantity_accepted']
     pagination_class = JobPagination
+    export_filename = 'job-deliveries'
+    replica_actions = ('list',)
+    cache_version_labels = JOB_VERSION_LABELS
+    export_fields = [
+        ('id', 'id'), ('delivery_date', 'delivery_date'),
+        ('job_id', 'job_item__job_id'), ('job_item_id', 'job_item_id'),
+        ('service_category', 'job_item__job__service_category'),
+        ('artisan_id', 'job_item__artisan_id'), ('artisan', 'job_item__artisan__name'),
+        ('product_id', 'job_item__product_id'), ('product_type', 'job_item__product__product_type'),
+        ('animal_type', 'job_item__product__animal_type'),
+        ('quantity_received', 'quantity_received'), ('quantity_accepted', 'quantity_accepted'),
+        ('rejection_reason', 'rejection_reason'), ('notes', 'notes'),
+    ]
 
     def perform_create(self, serializer):
         with transaction.atomic():
@@ -532,11 +598,67 @@ class JobDeliveryViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class ServiceRateViewSet(viewsets.ModelViewSet):
+class ServiceRateViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
     queryset = ServiceRate.objects.all()
     serializer_class = ServiceRateSerializer
     permission_classes = [AllowAny] # Adjust permissions as needed
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter, UpdatedSinceFilter]
     filterset_fields = ['service_category', 'product']
     search_fields = ['service_category', 'product__product_type', 'product__animal_type']
-    ordering_fields = ['service_category', 'rate_per_unit', 'product__product_type']
\ No newline at end of file
+    ordering_fields = ['service_category', 'rate_per_unit', 'product__product_type']
+    etag_version_labels = ('jobs.servicerate', 'products.product')
+
+
+@replica_reads
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def production_rollups(request):
+    """
+    Production totals answered from DailyProductionRollup.
+    GET /api/jobs/rollups/?start_date=2024-01-01&end_date=2024-03-31&group_by=service_category,artisan&period=month
+    Optional filters: product, artisan, service_category.
+    """
+    from datetime import date
+
+    params = request.query_params
+    try:
+        start_date = date.fromisoformat(params['start_date']) if params.get('start_date') else None
+        end_date = date.fromisoformat(params['end_date']) if params.get('end_date') else None
+    except ValueError:
+        return Response({'error': 'start_date and end_date must be YYYY-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    group_by = [value.strip() for value in params.get('group_by', 'date').split(',') if value.strip()]
+    unknown = [value for value in group_by if value not in DIMENSIONS]
+    if unknown:
+        return Response(
+            {'error': f"Invalid group_by value(s): {', '.join(unknown)}. Use any of: {', '.join(DIMENSIONS)}."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    period = params.get('period', 'day')
+    if period not in PERIODS:
+        return Response({'error': f"Invalid period. Use one of: {', '.join(PERIODS)}."}, status=status.HTTP_400_BAD_REQUEST)
+
+    filters = {}
+    for param, lookup in [('product', 'product_id'), ('artisan', 'artisan_id')]:
+        if params.get(param):
+            try:
+                filters[lookup] = int(params[param])
+            except ValueError:
+                return Response({'error': f"{param} must be an integer id."}, status=status.HTTP_400_BAD_REQUEST)
+    if params.get('service_category'):
+        filters['service_category'] = params['service_category']
+
+    results = query_rollups(start_date, end_date, group_by=group_by, period=period, filters=filters)
+    return Response({'group_by': group_by, 'period': period, 'count': len(results), 'results': results})
+
+
+@replica_reads
+@async_get_view
+async def job_dashboard_async(request):
+    """
+    GET /api/jobs/dashboard/async/
+    Same payload as /api/jobs/dashboard/, with its aggregates run concurrently.
+    Best served by an ASGI server (see appback/asgi.py).
+    """
+    return await gather_queries(JOB_DASHBOARD_QUERIES)
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Order, OrderItem
+from .models import Order, OrderItem, StockReservation
 
 admin.site.register(Order)
 admin.site.register(OrderItem)
+admin.site.register(StockReservation)
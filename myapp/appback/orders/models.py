@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Sum, F
 from customers.models import Customer
 from products.models import Product
 
@@ -14,12 +15,15 @@ class Order(models.Model):
     order_id = models.AutoField(primary_key=True)
     customer = models.ForeignKey(Customer, on_delete=models.PROTECT)
     created_date = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
     total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
     notes = models.TextField(blank=True, null=True)
     
     def update_total_amount(self):
-        self.total_amount = sum(item.subtotal for item in self.items.all())
+        self.total_amount = self.items.aggregate(
+            total=Sum(F('quantity') * F('unit_price'), output_field=models.DecimalField(max_digits=12, decimal_places=2))
+        )['total'] or 0
         self.save()
     
     def __str__(self):
@@ -52,4 +56,24 @@ class OrderItem(models.Model):
         self.order.update_total_amount()
     
     def __str__(self):
-        return f"{self.product} - Qty: {self.quantity}"
\ No newline at end of file
+        return f"{self.product} - Qty: {self.quantity}"
+
+class StockReservation(models.Model):
+    """
+    FinishedStock held for a PENDING order, one row per (order, product).
+    Available-to-promise stock is FinishedStock.quantity minus the sum of these rows.
+    Maintained by orders.stock.sync_reservations; rows only exist while the order is PENDING.
+    """
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='reservations')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_reservations')
+    quantity = models.PositiveIntegerField()
+    created_date = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('order', 'product')
+        indexes = [
+            models.Index(fields=['product', 'quantity']),  # Covers the per-product SUM in the ATP query
+        ]
+
+    def __str__(self):
+        return f"{self.product} - Reserved: {self.quantity} (Order #{self.order_id})"
@@ -1,9 +1,15 @@
 # orders/serializers.py
+from django.db import transaction
 from rest_framework import serializers
 from .models import Order, OrderItem
+from .stock import (
+    STOCK_DEDUCTING_STATUSES, InsufficientStockError, quantities_by_product,
+    check_available, apply_stock_deltas, replace_reservations, sync_reservations,
+)
 from customers.models import Customer
 from products.models import Product
 from inventory.models import FinishedStock # Assuming this exists
+from appback.versioning import bump_version
 
 class CustomerSerializer(serializers.ModelSerializer):
     class Meta:
@@ -64,13 +70,7 @@ class OrderCreateUpdateItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = OrderItem
         fields = ['product_id', 'quantity']
-
-    def validate(self, data):
-        # Basic validation, more complex stock validation handled in OrderSerializer create/update
-        product = data.get('product')
-        if product and product.service_category != 'FINISHED':
-            raise serializers.ValidationError(f"Product {product.name} is not a 'FINISHED' product type.")
-        return data
+        # Stock is checked for the whole order in OrderUpdateSerializer.update
 
 
 class OrderListSerializer(serializers.ModelSerializer):
@@ -98,9 +98,18 @@ class OrderDetailSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['created_date', 'total_amount']
 
+class OrderLineSerializer(serializers.Serializer):
+    """
+    A single line of a new order. Products are resolved for all lines at once in
+    OrderCreateSerializer.validate_items rather than one query per line.
+    """
+    product_id = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1)
+
+
 class OrderCreateSerializer(serializers.ModelSerializer):
     customer = serializers.PrimaryKeyRelatedField(queryset=Customer.objects.all())
-    items = OrderCreateUpdateItemSerializer(many=True, write_only=True) # For nested creation
+    items = OrderLineSerializer(many=True, write_only=True) # For nested creation
 
     class Meta:
         model = Order
@@ -115,44 +124,62 @@ class OrderCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Invalid status provided.")
         return value
 
+    def validate_items(self, value):
+        if not value:
+            raise serializers.ValidationError("An order must have at least one item.")
+
+        product_ids = {item['product_id'] for item in value}
+        products = Product.objects.in_bulk(product_ids)
+        missing = sorted(product_ids - products.keys())
+        if missing:
+            raise serializers.ValidationError(f"Invalid product_id(s): {', '.join(map(str, missing))}.")
+
+        for item in value:
+            item['product'] = products[item['product_id']]
+        return value
+
     def create(self, validated_data):
+        """
+        Create the order and its items with a fixed number of queries:
+        one locking read of FinishedStock, one grouped read of reservations, one bulk
+        insert of items, then either one stock UPDATE or one bulk insert of
+        reservations, and one aggregate for the total.
+        """
         items_data = validated_data.pop('items', [])
         status = validated_data.get('status', 'PENDING') # Get status for stock check
 
-        # Using a transaction to ensure atomicity
-        from django.db import transaction
-        from inventory.models import FinishedStock
+        required = quantities_by_product((item['product_id'], item['quantity']) for item in items_data)
+        product_labels = {item['product_id']: str(item['product']) for item in items_data}
 
         with transaction.atomic():
+            # Stock held for other PENDING orders is not available to this one
+            try:
+                check_available(required, product_labels=product_labels)
+            except InsufficientStockError as exc:
+                raise serializers.ValidationError({'items': exc.shortages})
+
             order = Order.objects.create(**validated_data)
 
-            for item_data in items_data:
-                product = item_data['product']
-                quantity = item_data['quantity']
-
-                # Stock validation before creating OrderItem
-                try:
-                    finished_stock = FinishedStock.objects.get(product=product)
-                    if finished_stock.quantity < quantity:
-                        raise serializers.ValidationError(
-                            f"Insufficient stock for {product.name}. Available: {finished_stock.quantity}, "
-                            f"Requested: {quantity}."
-                        )
-                except FinishedStock.DoesNotExist:
-                    raise serializers.ValidationError(f"Stock information not found for product: {product.name}")
-                if product.service_category != 'FINISHED':
-                    raise serializers.ValidationError(f"Product {product.name} is not a 'FINISHED' product type.")
-
-
-                # Create OrderItem - model's save method will set unit_price
-                order_item = OrderItem.objects.create(order=order, **item_data)
-
-                # Deduct stock if status is not PENDING
-                if status in ['PROCESSING', 'SHIPPED', 'DELIVERED']:
-                    finished_stock.quantity -= quantity
-                    finished_stock.save()
-
-            order.update_total_amount() # Call model method to calculate total
+            # bulk_create skips OrderItem.save(), so unit_price is set here and
+            # stock/total are handled once below instead of once per line.
+            OrderItem.objects.bulk_create([
+                OrderItem(
+                    order=order,
+                    product=item['product'],
+                    quantity=item['quantity'],
+                    unit_price=item['product'].base_price,
+                )
+                for item in items_data
+            ])
+            bump_version('orders.orderitem')
+
+            # Deduct stock if status is not PENDING; a PENDING order reserves it instead
+            if status in STOCK_DEDUCTING_STATUSES:
+                apply_stock_deltas({product_id: -quantity for product_id, quantity in required.items()})
+            elif status == 'PENDING':
+                replace_reservations(order, required)
+
+            order.update_total_amount() # Single aggregate over the new items
             return order
 
 class OrderUpdateSerializer(serializers.ModelSerializer):
@@ -168,118 +195,78 @@ class OrderUpdateSerializer(serializers.ModelSerializer):
         return value
 
     def update(self, instance, validated_data):
+        """
+        Apply status, notes and item changes. While in a stock-deducting status the
+        order holds its items out of FinishedStock; the net change in what it holds
+        is checked against locked, unreserved stock and applied with one UPDATE,
+        as in OrderCreateSerializer.create. A PENDING order reserves instead.
+        """
         items_data = validated_data.pop('items', None)
         new_status = validated_data.get('status', instance.status) # Get new status or keep old
 
-        from django.db import transaction
-        from inventory.models import FinishedStock
-
         with transaction.atomic():
-            # Handle status change and stock adjustment
-            original_status = instance.status
-            if new_status != original_status:
-                if new_status in ['PROCESSING', 'SHIPPED', 'DELIVERED'] and original_status not in ['PROCESSING', 'SHIPPED', 'DELIVERED']:
-                    # Transitioning to a stock-deducting status
-                    for item in instance.items.all():
-                        try:
-                            finished_stock = FinishedStock.objects.get(product=item.product)
-                            if finished_stock.quantity < item.quantity:
-                                raise serializers.ValidationError(
-                                    f"Insufficient stock for {item.product.name} "
-                                    f"to fulfill order {instance.order_id} with new status: "
-                                    f"{finished_stock.quantity} available, {item.quantity} needed."
-                                )
-                            finished_stock.quantity -= item.quantity
-                            finished_stock.save()
-                        except FinishedStock.DoesNotExist:
-                            raise serializers.ValidationError(f"Stock information not found for product: {item.product.name}")
-
-                elif new_status == 'CANCELLED' and original_status not in ['PENDING', 'CANCELLED']:
-                    # Transitioning to CANCELLED from a status where stock was deducted
-                    for item in instance.items.all():
-                        try:
-                            finished_stock = FinishedStock.objects.get(product=item.product)
-                            finished_stock.quantity += item.quantity # Restore stock
-                            finished_stock.save()
-                        except FinishedStock.DoesNotExist:
-                            # Log this, but don't block cancel if stock model somehow disappeared
-                            print(f"Warning: Stock not found for {item.product.name} during cancellation of Order {instance.order_id}")
-
+            held_before = self._held_stock(instance, instance.status)
 
             # Update basic order fields
             instance.status = new_status
             instance.notes = validated_data.get('notes', instance.notes)
             instance.save() # Save order to update its fields
 
-            # Handle nested item updates (add, update quantity, remove)
+            # Handle nested item updates (add, update quantity, remove). Items are
+            # written with queryset calls, since OrderItem.save() moves stock itself.
             if items_data is not None:
                 current_item_ids = {item.id for item in instance.items.all()}
                 incoming_item_ids = set()
+                new_items = []
 
                 for item_data in items_data:
                     item_id = item_data.get('id') # Assuming 'id' can be passed for existing items
 
                     if item_id: # Existing item
-                        incoming_item_ids.add(item_id)
-                        try:
-                            order_item = instance.items.get(id=item_id)
-                            original_quantity = order_item.quantity
-                            new_quantity = item_data.get('quantity', original_quantity)
-                            quantity_change = new_quantity - original_quantity
-
-                            # Validate and adjust stock for quantity change
-                            if new_quantity != original_quantity and new_status in ['PROCESSING', 'SHIPPED', 'DELIVERED']:
-                                finished_stock = FinishedStock.objects.get(product=order_item.product)
-                                if finished_stock.quantity < quantity_change:
-                                    raise serializers.ValidationError(
-                                        f"Insufficient stock for {order_item.product.name}. "
-                                        f"Available: {finished_stock.quantity}, Need: {quantity_change}."
-                                    )
-                                finished_stock.quantity -= quantity_change
-                                finished_stock.save()
-
-                            order_item.quantity = new_quantity
-                            order_item.save() # Call OrderItem's save to update unit_price if needed and total
-                        except OrderItem.DoesNotExist:
+                        if item_id not in current_item_ids:
                             raise serializers.ValidationError(f"OrderItem with ID {item_id} not found in this order.")
+                        incoming_item_ids.add(item_id)
+                        if 'quantity' in item_data:
+                            OrderItem.objects.filter(id=item_id).update(quantity=item_data['quantity'])
                     else: # New item
-                        product = item_data['product']
-                        quantity = item_data['quantity']
-
-                        # Stock validation for new item
-                        if new_status in ['PROCESSING', 'SHIPPED', 'DELIVERED']:
-                            try:
-                                finished_stock = FinishedStock.objects.get(product=product)
-                                if finished_stock.quantity < quantity:
-                                    raise serializers.ValidationError(
-                                        f"Insufficient stock for {product.name}. Available: {finished_stock.quantity}, "
-                                        f"Requested: {quantity}."
-                                    )
-                                finished_stock.quantity -= quantity
-                                finished_stock.save()
-                            except FinishedStock.DoesNotExist:
-                                raise serializers.ValidationError(f"Stock information not found for product: {product.name}")
-
-                        OrderItem.objects.create(order=instance, **item_data)
-
+                        new_items.append(OrderItem(
+                            order=instance,
+                            product=item_data['product'],
+                            quantity=item_data['quantity'],
+                            unit_price=item_data['product'].base_price,
+                        ))
+
+                OrderItem.objects.bulk_create(new_items)
                 # Remove items that are no longer in the list
-                items_to_remove_ids = current_item_ids - incoming_item_ids
-                for item_id in items_to_remove_ids:
-                    item_to_remove = instance.items.get(id=item_id)
-                    if new_status not in ['PENDING', 'CANCELLED']: # Only restore stock if not PENDING or CANCELLED
-                        try:
-                            finished_stock = FinishedStock.objects.get(product=item_to_remove.product)
-                            finished_stock.quantity += item_to_remove.quantity # Restore stock
-                            finished_stock.save()
-                        except FinishedStock.DoesNotExist:
-                            print(f"Warning: Stock not found for {item_to_remove.product.name} when removing item from Order {instance.order_id}")
-                    item_to_remove.delete()
-
+                instance.items.filter(id__in=current_item_ids - incoming_item_ids).delete()
+                bump_version('orders.orderitem')
+
+            held_after = self._held_stock(instance, new_status)
+            deltas = {
+                product_id: held_before.get(product_id, 0) - held_after.get(product_id, 0)
+                for product_id in held_before.keys() | held_after.keys()
+            }
+            required = {product_id: -delta for product_id, delta in deltas.items() if delta < 0}
+            try:
+                # Stock held for other PENDING orders is not available to this one
+                if required:
+                    check_available(required, exclude_order=instance)
+                apply_stock_deltas(deltas)
+                # Reserve stock for the final item list while PENDING; release it otherwise
+                sync_reservations(instance)
+            except InsufficientStockError as exc:
+                raise serializers.ValidationError({'items': exc.shortages})
 
             instance.update_total_amount() # Recalculate total after item changes
-
             return instance
 
+    @staticmethod
+    def _held_stock(order, order_status):
+        """{product_id: quantity} the order keeps out of FinishedStock in `order_status`."""
+        if order_status not in STOCK_DEDUCTING_STATUSES:
+            return {}
+        return quantities_by_product(order.items.values_list('product_id', 'quantity'))
+
 
 class OrderStatusUpdateSerializer(serializers.Serializer):
     status = serializers.CharField(max_length=20)
@@ -287,4 +274,10 @@ class OrderStatusUpdateSerializer(serializers.Serializer):
     def validate_status(self, value):
         if value not in [choice[0] for choice in Order.STATUS_CHOICES]:
             raise serializers.ValidationError("Invalid status provided.")
-        return value
\ No newline at end of file
+        return value
+
+
+class OrderBulkStatusUpdateSerializer(OrderStatusUpdateSerializer):
+    order_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=500
+    )
@@ -0,0 +1,179 @@
+# orders/stock.py
+"""
+Set-based FinishedStock helpers shared by order creation and status changes.
+Each helper issues a fixed number of queries regardless of how many lines or
+products are involved.
+
+Stock held by PENDING orders is recorded in StockReservation; the quantity that
+can still be promised is FinishedStock.quantity minus the reserved total.
+"""
+from collections import defaultdict
+
+from django.db.models import Case, When, F, Value, IntegerField, Sum, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from inventory.models import FinishedStock
+from products.models import Product
+from appback.versioning import bump_version
+from sync.changes import record_changes
+from .models import StockReservation
+
+# Statuses in which an order's items have been taken out of FinishedStock
+STOCK_DEDUCTING_STATUSES = ['PROCESSING', 'SHIPPED', 'DELIVERED']
+
+
+def quantities_by_product(lines):
+    """Sum (product_id, quantity) pairs into {product_id: total_quantity}."""
+    totals = defaultdict(int)
+    for product_id, quantity in lines:
+        totals[product_id] += quantity
+    return dict(totals)
+
+
+def lock_finished_stock(product_ids):
+    """
+    Fetch and row-lock the FinishedStock records for `product_ids` in one query.
+    Must be called inside a transaction. Returns {product_id: FinishedStock}.
+    """
+    rows = FinishedStock.objects.select_for_update().filter(product_id__in=product_ids).order_by('product_id')
+    return {row.product_id: row for row in rows}
+
+
+class InsufficientStockError(ValueError):
+    """Raised when reserved or deducted quantities exceed what is available."""
+
+    def __init__(self, shortages):
+        super().__init__('; '.join(shortages))
+        self.shortages = shortages
+
+
+def reserved_quantities(product_ids, exclude_order=None):
+    """Return {product_id: reserved_total} for `product_ids` in one grouped query."""
+    reservations = StockReservation.objects.filter(product_id__in=product_ids)
+    if exclude_order is not None:
+        reservations = reservations.exclude(order=exclude_order)
+    return dict(
+        reservations.values('product_id').annotate(total=Sum('quantity')).values_list('product_id', 'total')
+    )
+
+
+def find_shortages(required, stock_by_product, product_labels=None, reserved=None):
+    """
+    Compare {product_id: quantity} against locked stock rows, less anything in
+    `reserved` ({product_id: quantity} held by other orders).
+    Returns a list of human-readable messages, empty when everything is available.
+    """
+    product_labels = product_labels or {}
+    reserved = reserved or {}
+    shortages = []
+    for product_id, quantity in required.items():
+        label = product_labels.get(product_id, f"product {product_id}")
+        stock = stock_by_product.get(product_id)
+        if stock is None:
+            shortages.append(f"Stock information not found for product: {label}")
+            continue
+        available = stock.quantity - reserved.get(product_id, 0)
+        if available < quantity:
+            shortages.append(
+                f"Insufficient stock for {label}. Available: {available}, Requested: {quantity}."
+            )
+    return shortages
+
+
+def check_available(required, exclude_order=None, product_labels=None):
+    """
+    Lock the stock rows for `required` and raise InsufficientStockError unless every
+    product has enough unreserved stock. Reservations held by `exclude_order` count
+    as available to it. Must be called inside a transaction.
+    """
+    stock_by_product = lock_finished_stock(required.keys())
+    reserved = reserved_quantities(required.keys(), exclude_order=exclude_order)
+    shortages = find_shortages(required, stock_by_product, product_labels, reserved)
+    if shortages and product_labels is None:
+        # Only pay for the product lookup when there is something to report
+        product_labels = {product.id: str(product) for product in Product.objects.filter(id__in=required.keys())}
+        shortages = find_shortages(required, stock_by_product, product_labels, reserved)
+    if shortages:
+        raise InsufficientStockError(shortages)
+
+
+def replace_reservations(order, required):
+    """Replace the order's reservations with {product_id: quantity}. Does not check availability."""
+    StockReservation.objects.filter(order=order).delete()
+    StockReservation.objects.bulk_create([
+        StockReservation(order=order, product_id=product_id, quantity=quantity)
+        for product_id, quantity in required.items() if quantity
+    ])
+    bump_version('orders.stockreservation')
+
+
+def sync_reservations(order):
+    """
+    Bring an order's reservations in line with its status: a PENDING order reserves
+    exactly its items, any other status holds nothing. Raises InsufficientStockError
+    if a PENDING order asks for more than is unreserved. Must be called inside a transaction.
+    """
+    if order.status != 'PENDING':
+        StockReservation.objects.filter(order=order).delete()
+        return
+    required = quantities_by_product(order.items.values_list('product_id', 'quantity'))
+    check_available(required, exclude_order=order)
+    replace_reservations(order, required)
+
+
+def with_availability(queryset):
+    """
+    Annotate a FinishedStock queryset with `reserved_quantity` and `available`
+    (quantity - reserved_quantity). The reserved total is a correlated SUM served
+    by the (product, quantity) index on StockReservation, so a whole basket is
+    answered in one query.
+    """
+    reserved = StockReservation.objects.filter(product_id=OuterRef('product_id')).values('product_id').annotate(
+        total=Sum('quantity')
+    ).values('total')
+    return queryset.annotate(
+        reserved_quantity=Coalesce(Subquery(reserved, output_field=IntegerField()), Value(0)),
+    ).annotate(
+        available=F('quantity') - F('reserved_quantity'),
+    )
+
+
+def basket_availability(required):
+    """
+    Available-to-promise check for {product_id: requested_quantity}.
+    Returns one dict per requested product, in request order, and issues one query.
+    """
+    rows = with_availability(FinishedStock.objects.filter(product_id__in=required.keys())).values(
+        'product_id', 'quantity', 'reserved_quantity', 'available'
+    )
+    by_product = {row['product_id']: row for row in rows}
+    results = []
+    for product_id, requested in required.items():
+        row = by_product.get(product_id)
+        if row is None:
+            row = {'product_id': product_id, 'quantity': 0, 'reserved_quantity': 0, 'available': 0}
+        results.append({**row, 'requested': requested, 'sufficient': row['available'] >= requested})
+    return results
+
+
+def apply_stock_deltas(deltas):
+    """
+    Add {product_id: delta} to FinishedStock.quantity with a single UPDATE.
+    Negative deltas deduct stock; callers are responsible for checking availability first.
+    """
+    deltas = {product_id: delta for product_id, delta in deltas.items() if delta}
+    if not deltas:
+        return 0
+    updated = FinishedStock.objects.filter(product_id__in=deltas.keys()).update(
+        quantity=F('quantity') + Case(
+            *[When(product_id=product_id, then=Value(delta)) for product_id, delta in deltas.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        ),
+        last_updated=timezone.now(),
+    )
+    # .update() skips post_save; both run once the order transaction commits
+    bump_version('inventory.finishedstock')
+    record_changes('finished_stock')
+    return updated
@@ -1,3 +1,279 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from customers.models import Customer
+from inventory.models import FinishedStock
+from orders.models import Order
+from products.models import Product
+
+
+class OrderTestMixin:
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('sales'))
+        self.customer = Customer.objects.create(name='Jane Doe')
+        self.products = [
+            Product.objects.create(
+                product_type='SITTING_ANIMAL', animal_type=animal, size_category='MEDIUM', base_price=price
+            )
+            for animal, price in [('Elephant', 10), ('Giraffe', 20), ('Lion', 30)]
+        ]
+        for product in self.products:
+            FinishedStock.objects.create(product=product, quantity=10, average_cost=product.base_price)
+
+    def create_order(self, lines, order_status='PENDING'):
+        return self.client.post('/api/orders/', {
+            'customer': self.customer.id,
+            'status': order_status,
+            'items': [{'product_id': product.id, 'quantity': quantity} for product, quantity in lines],
+        }, format='json')
+
+    def stock(self, product):
+        return FinishedStock.objects.get(product=product).quantity
+
+
+class OrderCreateTest(OrderTestMixin, TestCase):
+    def test_create_deducts_stock_and_sets_total_once(self):
+        elephant, giraffe, lion = self.products
+        response = self.create_order([(elephant, 2), (giraffe, 3), (elephant, 1)], order_status='PROCESSING')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+
+        order = Order.objects.get()
+        self.assertEqual(order.items.count(), 3)
+        self.assertEqual(order.total_amount, Decimal('90.00'))
+        self.assertEqual(self.stock(elephant), 7)
+        self.assertEqual(self.stock(giraffe), 7)
+        self.assertEqual(self.stock(lion), 10)
+
+    def test_query_count_does_not_grow_with_lines(self):
+        with self.assertNumQueries(self._count_queries([(self.products[0], 1)])):
+            self.create_order([(product, 1) for product in self.products])
+
+    def _count_queries(self, lines):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as context:
+            self.create_order(lines)
+        return len(context.captured_queries)
+
+    def test_insufficient_stock_rejects_whole_order(self):
+        elephant, giraffe, _ = self.products
+        response = self.create_order([(elephant, 5), (giraffe, 11)], order_status='PROCESSING')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(self.stock(elephant), 10)
+
+    def test_stock_version_moves_only_when_the_order_commits(self):
+        from appback.versioning import get_version
+
+        before = get_version('inventory.finishedstock')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_order([(self.products[0], 20)], order_status='PROCESSING')  # Rolled back
+        self.assertEqual(get_version('inventory.finishedstock'), before)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_order([(self.products[0], 2)], order_status='PROCESSING')
+            self.assertEqual(get_version('inventory.finishedstock'), before)
+        self.assertNotEqual(get_version('inventory.finishedstock'), before)
+
+    def test_pending_order_does_not_deduct_stock(self):
+        response = self.create_order([(self.products[0], 4)])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.stock(self.products[0]), 10)
+
+
+class StockReservationTest(OrderTestMixin, TestCase):
+    def reserved(self, product):
+        from orders.models import StockReservation
+        return sum(StockReservation.objects.filter(product=product).values_list('quantity', flat=True))
+
+    def test_pending_order_reserves_stock(self):
+        elephant = self.products[0]
+        self.assertEqual(self.create_order([(elephant, 6)]).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.reserved(elephant), 6)
+
+        # Only 4 left to promise
+        response = self.create_order([(elephant, 5)])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Available: 4', response.data['items'][0])
+
+    def test_processing_consumes_own_reservation(self):
+        elephant = self.products[0]
+        self.create_order([(elephant, 6)])
+        self.create_order([(elephant, 4)])
+        order = Order.objects.order_by('order_id').first()
+
+        response = self.client.post(f'/api/orders/{order.order_id}/update-status/', {'status': 'PROCESSING'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(self.stock(elephant), 4)
+        self.assertEqual(self.reserved(elephant), 4)
+
+    def test_cancel_releases_reservation(self):
+        elephant = self.products[0]
+        self.create_order([(elephant, 6)])
+        order = Order.objects.get()
+        self.client.post(f'/api/orders/{order.order_id}/update-status/', {'status': 'CANCELLED'})
+        self.assertEqual(self.reserved(elephant), 0)
+        self.assertEqual(self.stock(elephant), 10)
+
+    def test_finished_stock_reports_available(self):
+        elephant = self.products[0]
+        self.create_order([(elephant, 3)])
+        stock_id = FinishedStock.objects.get(product=elephant).id
+        response = self.client.get(f'/api/inventory/finished-stock/{stock_id}/')
+        self.assertEqual(response.data['reserved_quantity'], 3)
+        self.assertEqual(response.data['available'], 7)
+
+    def test_basket_availability_is_one_query(self):
+        elephant, giraffe, lion = self.products
+        self.create_order([(elephant, 8)])
+        with self.assertNumQueries(1):
+            response = self.client.post('/api/inventory/finished-stock/availability/', {
+                'items': [
+                    {'product_id': elephant.id, 'quantity': 3},
+                    {'product_id': giraffe.id, 'quantity': 3},
+                    {'product_id': lion.id + 100, 'quantity': 1},
+                ]
+            }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['can_fulfil'])
+        self.assertEqual([result['available'] for result in response.data['results']], [2, 10, 0])
+        self.assertEqual([result['sufficient'] for result in response.data['results']], [False, True, False])
+
+    def test_basket_availability_rejects_a_non_object_body(self):
+        response = self.client.post('/api/inventory/finished-stock/availability/', [1, 2], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class OrderUpdateTest(OrderTestMixin, TestCase):
+    def patch(self, order, data):
+        return self.client.patch(f'/api/orders/{order.order_id}/', data, format='json')
+
+    def test_patch_to_processing_respects_other_reservations(self):
+        elephant = self.products[0]
+        self.create_order([(elephant, 6)])
+        self.create_order([(elephant, 4)])
+        order = Order.objects.order_by('order_id').first()
+        FinishedStock.objects.filter(product=elephant).update(quantity=8)  # 4 of them held by the other order
+
+        response = self.patch(order, {'status': 'PROCESSING'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Available: 4', response.data['items'][0])
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'PENDING')
+        self.assertEqual(self.stock(elephant), 8)
+
+    def test_patch_items_moves_only_the_net_change(self):
+        elephant, giraffe, _ = self.products
+        self.create_order([(elephant, 2)], order_status='PROCESSING')
+        order = Order.objects.get()
+
+        response = self.patch(order, {'items': [
+            {'product_id': elephant.id, 'quantity': 5},
+            {'product_id': giraffe.id, 'quantity': 1},
+        ]})
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(self.stock(elephant), 5)
+        self.assertEqual(self.stock(giraffe), 9)
+        order.refresh_from_db()
+        self.assertEqual(order.total_amount, Decimal('70.00'))
+
+        self.patch(order, {'status': 'CANCELLED'})
+        self.assertEqual(self.stock(elephant), 10)
+        self.assertEqual(self.stock(giraffe), 10)
+
+
+class BulkStatusUpdateTest(OrderTestMixin, TestCase):
+    def bulk_update(self, orders, new_status):
+        return self.client.post('/api/orders/bulk-update-status/', {
+            'order_ids': [order.order_id for order in orders],
+            'status': new_status,
+        }, format='json')
+
+    def test_nets_stock_across_orders_and_reports_per_order(self):
+        elephant, giraffe, _ = self.products
+        self.create_order([(elephant, 4), (giraffe, 2)])
+        self.create_order([(elephant, 5)])
+        first, second = Order.objects.order_by('order_id')
+        FinishedStock.objects.filter(product=elephant).update(quantity=8)  # Manual write-off
+
+        response = self.bulk_update([first, second], 'SHIPPED')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual([result['success'] for result in response.data['results']], [True, False])
+
+        self.assertEqual(self.stock(elephant), 4)
+        self.assertEqual(self.stock(giraffe), 8)
+        self.assertEqual(Order.objects.get(pk=first.pk).status, 'SHIPPED')
+        self.assertEqual(Order.objects.get(pk=second.pk).status, 'PENDING')
+        self.assertEqual(second.reservations.get().quantity, 5)
+
+    def test_cancel_restores_and_frees_stock_for_the_batch(self):
+        elephant = self.products[0]
+        self.create_order([(elephant, 10)], order_status='PROCESSING')
+        processing = Order.objects.get()
+        Order.objects.create(customer=self.customer)  # Cancelling an order without items is a no-op
+
+        response = self.bulk_update([processing], 'CANCELLED')
+        self.assertTrue(response.data['results'][0]['success'])
+        self.assertEqual(self.stock(elephant), 10)
+
+    def test_query_count_does_not_grow_with_orders(self):
+        for product in self.products:
+            self.create_order([(product, 1), (self.products[0], 1)])
+        orders = list(Order.objects.order_by('order_id'))
+
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as single:
+            self.bulk_update(orders[:1], 'PROCESSING')
+        with self.assertNumQueries(len(single.captured_queries)):
+            response = self.bulk_update(orders[1:], 'PROCESSING')
+        self.assertEqual(response.data['updated'], 2)
+        self.assertEqual(self.stock(self.products[0]), 6)
+
+    def test_unknown_order_is_reported(self):
+        response = self.client.post('/api/orders/bulk-update-status/', {
+            'order_ids': [999], 'status': 'SHIPPED',
+        }, format='json')
+        self.assertEqual(response.data['results'], [{'order_id': 999, 'success': False, 'detail': 'Order not found.'}])
+
+
+class ResponseCacheTest(OrderTestMixin, TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        super().setUp()
+        self.create_order([(self.products[0], 1)])
+        self.order_id = Order.objects.get().order_id
+
+    def test_list_is_cached_until_an_order_changes(self):
+        first = self.client.get('/api/orders/')
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(0):
+            cached = self.client.get('/api/orders/')
+        self.assertEqual(cached.json(), first.json())
+
+        # Bulk status changes use .update(), which bumps the version explicitly
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/orders/bulk-update-status/', {'order_ids': [self.order_id], 'status': 'SHIPPED'}, format='json')
+        response = self.client.get('/api/orders/')
+        self.assertEqual(response.json()['results'][0]['status'], 'SHIPPED')
+
+    def test_query_parameters_are_part_of_the_key(self):
+        self.client.get('/api/orders/?status=PENDING')
+        response = self.client.get('/api/orders/?status=CANCELLED')
+        self.assertEqual(response.json()['count'], 0)
+
+    def test_stats_count_hits_and_misses(self):
+        self.client.get(f'/api/orders/{self.order_id}/')
+        self.client.get(f'/api/orders/{self.order_id}/')
+        self.assertEqual(self.client.get('/api/cache-stats/').status_code, status.HTTP_403_FORBIDDEN)
 
-# Create your tests here.
+        self.client.force_authenticate(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        stats = self.client.get('/api/cache-stats/').json()
+        self.assertEqual(stats['views']['orders.OrderViewSet.retrieve'], {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
@@ -0,0 +1,144 @@
+# orders/transitions.py
+"""
+Status changes for many orders at once.
+
+`bulk_update_status` moves a batch of orders to one status inside a single
+transaction, with a fixed number of queries however many orders or lines are
+involved. It follows the same stock rules as OrderViewSet.update_order_status:
+
+- entering PROCESSING/SHIPPED/DELIVERED deducts the order's items from FinishedStock;
+- CANCELLED after a deducting status puts the items back;
+- PENDING orders hold a StockReservation for their items, other statuses hold none.
+
+Orders are checked in request order against a running pool of unreserved stock,
+so one order that cannot be fulfilled fails on its own without blocking the rest;
+earlier orders in the request take priority over later ones.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from appback.versioning import bump_version
+from search.indexing import index_queryset
+from sync.changes import record_changes
+
+from .models import Order, OrderItem, StockReservation
+from .stock import (
+    STOCK_DEDUCTING_STATUSES, quantities_by_product, lock_finished_stock,
+    reserved_quantities, apply_stock_deltas,
+)
+
+
+def _transition_kind(original_status, new_status):
+    if new_status in STOCK_DEDUCTING_STATUSES and original_status not in STOCK_DEDUCTING_STATUSES:
+        return 'deduct'
+    if new_status == 'CANCELLED' and original_status not in ['PENDING', 'CANCELLED']:
+        return 'restore'
+    if new_status == 'PENDING':
+        return 'reserve'
+    return None
+
+
+def _nested_quantities(rows):
+    """Group (order_id, product_id, quantity) rows into {order_id: {product_id: quantity}}."""
+    grouped = defaultdict(list)
+    for order_id, product_id, quantity in rows:
+        grouped[order_id].append((product_id, quantity))
+    return {order_id: quantities_by_product(lines) for order_id, lines in grouped.items()}
+
+
+def bulk_update_status(order_ids, new_status):
+    """
+    Move every order in `order_ids` to `new_status`.
+    Returns a list of {'order_id', 'success', 'detail'} dicts in the order of `order_ids`.
+    """
+    order_ids = list(dict.fromkeys(order_ids))  # De-duplicate, keep request order
+    results = {}
+
+    with transaction.atomic():
+        orders = {
+            order.order_id: order
+            for order in Order.objects.select_for_update().filter(order_id__in=order_ids).order_by('order_id')
+        }
+        items = _nested_quantities(
+            OrderItem.objects.filter(order_id__in=orders.keys()).values_list('order_id', 'product_id', 'quantity')
+        )
+        held = _nested_quantities(
+            StockReservation.objects.filter(order_id__in=orders.keys()).values_list('order_id', 'product_id', 'quantity')
+        )
+
+        plans = []
+        for order_id in order_ids:
+            order = orders.get(order_id)
+            if order is None:
+                results[order_id] = {'order_id': order_id, 'success': False, 'detail': 'Order not found.'}
+            elif order.status == new_status:
+                results[order_id] = {'order_id': order_id, 'success': True, 'detail': 'Status is already set to this value.'}
+            else:
+                plans.append((order_id, _transition_kind(order.status, new_status)))
+
+        product_ids = {product_id for quantities in items.values() for product_id in quantities}
+        stock_by_product = lock_finished_stock(product_ids)
+        reserved = reserved_quantities(product_ids)
+
+        # Unreserved stock after every restore in the batch has been put back. Stock
+        # reserved by orders in the batch is pooled too, so they are served in request order.
+        deltas = defaultdict(int)
+        pool = defaultdict(int)
+        for order_id, kind in plans:
+            if kind == 'restore':
+                for product_id, quantity in items.get(order_id, {}).items():
+                    deltas[product_id] += quantity
+            elif kind in ('deduct', 'reserve'):
+                for product_id, quantity in held.get(order_id, {}).items():
+                    pool[product_id] += quantity
+        for product_id in product_ids:
+            stock = stock_by_product.get(product_id)
+            on_hand = stock.quantity if stock is not None else 0
+            pool[product_id] += on_hand + deltas[product_id] - reserved.get(product_id, 0)
+
+        succeeded = []
+        new_reservations = {}
+        for order_id, kind in plans:
+            required = items.get(order_id, {})
+            if kind in ('deduct', 'reserve'):
+                shortages = [
+                    f"Insufficient stock for product {product_id}. Available: {pool[product_id]}, Requested: {quantity}."
+                    if product_id in stock_by_product
+                    else f"Stock information not found for product {product_id}."
+                    for product_id, quantity in required.items()
+                    if product_id not in stock_by_product or pool[product_id] < quantity
+                ]
+                if shortages:
+                    for product_id, quantity in held.get(order_id, {}).items():  # It keeps holding its reservation
+                        pool[product_id] -= quantity
+                    results[order_id] = {'order_id': order_id, 'success': False, 'detail': ' '.join(shortages)}
+                    continue
+                for product_id, quantity in required.items():
+                    pool[product_id] -= quantity
+                    if kind == 'deduct':
+                        deltas[product_id] -= quantity
+                if kind == 'reserve':
+                    new_reservations[order_id] = required
+            succeeded.append(order_id)
+            results[order_id] = {'order_id': order_id, 'success': True, 'detail': f"Status updated to {new_status}."}
+
+        if succeeded:
+            apply_stock_deltas(deltas)
+            Order.objects.filter(order_id__in=succeeded).update(status=new_status, updated_at=timezone.now())
+            StockReservation.objects.filter(order_id__in=succeeded).delete()
+            StockReservation.objects.bulk_create([
+                StockReservation(order_id=order_id, product_id=product_id, quantity=quantity)
+                for order_id, required in new_reservations.items()
+                for product_id, quantity in required.items()
+            ])
+            # .update() and bulk_create skip the signals that bump version stamps
+            bump_version('orders.order')
+            bump_version('orders.stockreservation')
+            record_changes('order', succeeded)
+
+            # .update() skips post_save, so refresh the search documents for these orders
+            index_queryset('order', Order.objects.filter(order_id__in=succeeded).select_related('customer'))
+
+    return [results[order_id] for order_id in order_ids]
@@ -1,10 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import OrderViewSet
+from .views import OrderViewSet, OrderMetadataView
 
 router = DefaultRouter()
 router.register(r'', OrderViewSet)
 
 urlpatterns = [
+    path('metadata/', OrderMetadataView.as_view(), name='order-metadata'),  # Before the router so it is not taken as a pk
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -13,13 +13,23 @@ from datetime import timedelta
 from .models import Order, OrderItem
 from .serializers import (
     OrderListSerializer, OrderDetailSerializer, OrderCreateSerializer,
-    OrderUpdateSerializer, OrderItemSerializer, OrderStatusUpdateSerializer
+    OrderUpdateSerializer, OrderItemSerializer, OrderStatusUpdateSerializer,
+    OrderBulkStatusUpdateSerializer,
 )
-from inventory.models import FinishedStock
-
-class OrderViewSet(viewsets.ModelViewSet):
+from .stock import (
+    STOCK_DEDUCTING_STATUSES, InsufficientStockError, quantities_by_product,
+    check_available, apply_stock_deltas, sync_reservations,
+)
+from .transitions import bulk_update_status
+from appback.conditional import static_etag
+from appback.exports import ExportMixin
+from appback.response_cache import CachedResponseMixin
+from appback.batch import BatchMixin
+from sync.filters import UpdatedSinceFilter
+
+class OrderViewSet(CachedResponseMixin, BatchMixin, ExportMixin, viewsets.ModelViewSet):
     queryset = Order.objects.all().select_related('customer').prefetch_related('items__product')
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter, UpdatedSinceFilter]
     permission_classes = [IsAuthenticatedOrReadOnly] # Adjust as per your auth needs
 
     # Filtering
@@ -36,6 +46,16 @@ class OrderViewSet(viewsets.ModelViewSet):
     ordering_fields = ['order_id', 'created_date', 'total_amount', 'status']
     ordering = ['-created_date'] # Default ordering
 
+    # Streaming export (GET /api/orders/export/?format=csv|ndjson)
+    export_filename = 'orders'
+    replica_actions = ('list',)
+    cache_version_labels = ('orders.order', 'orders.orderitem', 'customers.customer', 'products.product')
+    export_fields = [
+        ('order_id', 'order_id'), ('created_date', 'created_date'),
+        ('customer_id', 'customer_id'), ('customer', 'customer__name'), ('customer_email', 'customer__email'),
+        ('status', 'status'), ('total_amount', 'total_amount'), ('notes', 'notes'),
+    ]
+
     def get_serializer_class(self):
         if self.action == 'list':
             return OrderListSerializer
@@ -104,53 +124,62 @@ class OrderViewSet(viewsets.ModelViewSet):
             return Response({"detail": "Status is already set to this value."}, status=status.HTTP_200_OK)
 
         original_status = order.status
+        lines = list(order.items.select_related('product'))
+        quantities = quantities_by_product((item.product_id, item.quantity) for item in lines)
+        product_labels = {item.product_id: str(item.product) for item in lines}
 
         with transaction.atomic():
-            # Logic for stock adjustment based on status change
-            if new_status in ['PROCESSING', 'SHIPPED', 'DELIVERED'] and original_status not in ['PROCESSING', 'SHIPPED', 'DELIVERED']:
-                # Transitioning to a stock-deducting status
-                for item in order.items.all():
-                    try:
-                        finished_stock = FinishedStock.objects.get(product=item.product)
-                        if finished_stock.quantity < item.quantity:
-                            transaction.set_rollback(True) # Force rollback
-                            return Response(
-                                {"detail": f"Insufficient stock for {item.product.name} ({item.quantity} needed, {finished_stock.quantity} available). Status update blocked."},
-                                status=status.HTTP_400_BAD_REQUEST
-                            )
-                        finished_stock.quantity -= item.quantity
-                        finished_stock.save()
-                    except FinishedStock.DoesNotExist:
-                        transaction.set_rollback(True) # Force rollback
-                        return Response(
-                            {"detail": f"Stock information not found for product: {item.product.name}. Status update blocked."},
-                            status=status.HTTP_400_BAD_REQUEST
-                        )
-
-            elif new_status == 'CANCELLED' and original_status not in ['PENDING', 'CANCELLED']:
-                # Transitioning to CANCELLED from a status where stock was deducted
-                for item in order.items.all():
-                    try:
-                        finished_stock = FinishedStock.objects.get(product=item.product)
-                        finished_stock.quantity += item.quantity # Restore stock
-                        finished_stock.save()
-                    except FinishedStock.DoesNotExist:
-                        # Log this, but don't block if stock model somehow disappeared after initial deduction
-                        print(f"Warning: Stock not found for {item.product.name} during cancellation of Order {order.order_id}")
-
-            order.status = new_status
-            order.save()
-            order.update_total_amount() # In case logic caused item changes implicitly (though not direct here)
+            try:
+                # Logic for stock adjustment based on status change
+                if new_status in STOCK_DEDUCTING_STATUSES and original_status not in STOCK_DEDUCTING_STATUSES:
+                    # Transitioning to a stock-deducting status; this order's own reservation counts as available
+                    check_available(quantities, exclude_order=order, product_labels=product_labels)
+                    apply_stock_deltas({product_id: -quantity for product_id, quantity in quantities.items()})
+
+                elif new_status == 'CANCELLED' and original_status not in ['PENDING', 'CANCELLED']:
+                    # Transitioning to CANCELLED from a status where stock was deducted
+                    apply_stock_deltas(quantities)
+
+                order.status = new_status
+                order.save()
+                sync_reservations(order) # Reserve while PENDING, release on any other status
+            except InsufficientStockError as exc:
+                transaction.set_rollback(True) # Force rollback
+                return Response(
+                    {"detail": f"{' '.join(exc.shortages)} Status update blocked."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
 
         return Response(OrderListSerializer(order).data, status=status.HTTP_200_OK)
 
 
+    @action(detail=False, methods=['post'], url_path='bulk-update-status')
+    def bulk_update_status(self, request):
+        """
+        Move many orders to one status in a single transaction.
+        POST /api/orders/bulk-update-status/ {"order_ids": [1, 2, 3], "status": "SHIPPED"}
+        Orders that cannot be fulfilled from stock fail individually; the rest are updated.
+        """
+        serializer = OrderBulkStatusUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        new_status = serializer.validated_data['status']
+
+        results = bulk_update_status(serializer.validated_data['order_ids'], new_status)
+        updated = sum(1 for result in results if result['success'])
+        return Response({
+            'status': new_status,
+            'updated': updated,
+            'failed': len(results) - updated,
+            'results': results,
+        }, status=status.HTTP_200_OK)
+
 class OrderMetadataView(APIView):
     """
     Provides metadata about the Order model, such as status choices.
     """
     permission_classes = [IsAuthenticatedOrReadOnly] # Allow anyone to see metadata
 
+    @static_etag
     def get(self, request, *args, **kwargs):
         status_choices = [{"value": choice[0], "label": choice[1]} for choice in Order.STATUS_CHOICES]
         metadata = {
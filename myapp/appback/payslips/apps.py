@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class PayslipsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'payslips'
+
+    def ready(self):
+        from appback.versioning import track_model_versions
+        from .models import Payslip, ServiceRate
+        track_model_versions(Payslip, ServiceRate)
@@ -11,6 +11,8 @@ from django.conf import settings
 import os
 from django.db import transaction
 from django.utils import timezone
+from appback.versioning import bump_version
+from sync.changes import record_changes
 
 
 class PayslipGenerateSerializer(serializers.Serializer):
@@ -233,7 +235,9 @@ class PayslipCreateUpdateSerializer(serializers.ModelSerializer):
                     job__created_date__date__lte=payslip.period_end,
                     payslip_generated=False # Only mark those not already generated
                 )
-                valid_job_items.update(payslip_generated=True)
+                valid_job_items.update(payslip_generated=True, updated_at=timezone.now())
+                bump_version('jobs.jobitem')  # .update() skips post_save
+                record_changes('job_item')
 
         return payslip
 
@@ -300,7 +304,7 @@ class PayslipCreateUpdateSerializer(serializers.ModelSerializer):
                 # Items to unset (were marked, but not in the new list)
                 items_to_unset = current_marked_job_item_ids - new_job_item_ids_set
                 if items_to_unset:
-                    JobItem.objects.filter(id__in=items_to_unset, artisan=instance.artisan).update(payslip_generated=False)
+                    JobItem.objects.filter(id__in=items_to_unset, artisan=instance.artisan).update(payslip_generated=False, updated_at=timezone.now())
 
                 # Items to set (are in new list, but were not marked)
                 items_to_set = new_job_item_ids_set - current_marked_job_item_ids
@@ -311,7 +315,9 @@ class PayslipCreateUpdateSerializer(serializers.ModelSerializer):
                          artisan=instance.artisan,
                          job__created_date__date__gte=instance.period_start,
                          job__created_date__date__lte=instance.period_end
-                     ).update(payslip_generated=True) # Only update if they match criteria
+                     ).update(payslip_generated=True, updated_at=timezone.now()) # Only update if they match criteria
+                bump_version('jobs.jobitem')  # .update() skips post_save
+                record_changes('job_item')
 
         return instance
 
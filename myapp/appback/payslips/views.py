@@ -28,14 +28,21 @@ from .serializers import (
     ServiceRateSerializer # Import the new serializer
 )
 from .filters import PayslipFilter # Import the filterset
+from appback.conditional import ConditionalGetMixin, static_etag
+from appback.exports import ExportMixin
+from appback.response_cache import CachedResponseMixin
+from appback.versioning import bump_version
+from sync.changes import record_changes
+from sync.filters import UpdatedSinceFilter
 
-# ReportLab imports for PDF generation
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
 from io import BytesIO
 
 # --- PDF Generation Function (Can be in a separate utils.py if preferred) ---
 def generate_payslip_pdf(artisan, job_items, period_start, period_end, service_category=None):
+    # ReportLab is imported on first use: it is heavy and only payslip generation needs it
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
     buffer = BytesIO()
     p = canvas.Canvas(buffer, pagesize=A4)
     p.setFont("Helvetica", 12)
@@ -109,7 +116,7 @@ class PayslipPagination(PageNumberPagination):
     max_page_size = 100
 
 
-class PayslipViewSet(viewsets.ModelViewSet):
+class PayslipViewSet(CachedResponseMixin, ExportMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing Payslip resources.
     Supports CRUD, filtering, searching, sorting, and custom actions for:
@@ -121,11 +128,19 @@ class PayslipViewSet(viewsets.ModelViewSet):
     queryset = Payslip.objects.all().select_related('artisan') # Optimize for list/detail
     pagination_class = PayslipPagination
     permission_classes = [AllowAny] # Most operations require authentication
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter, UpdatedSinceFilter]
     filterset_class = PayslipFilter # Apply the custom filterset
     search_fields = ['artisan__name'] # Search by artisan name
     ordering_fields = ['generated_date', 'total_payment', 'artisan__name', 'period_start', 'period_end']
     ordering = ['-generated_date'] # Default sorting
+    export_filename = 'payslips'
+    # The detail serializer nests job items with their job and product
+    cache_version_labels = ('payslips.payslip', 'artisans.artisan', 'jobs.jobitem', 'jobs.job', 'products.product')
+    export_fields = [
+        ('id', 'id'), ('generated_date', 'generated_date'),
+        ('artisan_id', 'artisan_id'), ('artisan', 'artisan__name'), ('service_category', 'service_category'),
+        ('period_start', 'period_start'), ('period_end', 'period_end'), ('total_payment', 'total_payment'),
+    ]
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -165,7 +180,9 @@ class PayslipViewSet(viewsets.ModelViewSet):
                 job__created_date__date__gte=instance.period_start,
                 job__created_date__date__lte=instance.period_end,
                 payslip_generated=True # Only reset those that were marked
-            ).update(payslip_generated=False)
+            ).update(payslip_generated=False, updated_at=timezone.now())
+            bump_version('jobs.jobitem')  # .update() skips post_save
+            record_changes('job_item')
 
             # 2. Delete the PDF file from storage
             if instance.pdf_file:
@@ -286,7 +303,9 @@ class PayslipViewSet(viewsets.ModelViewSet):
                 payslip.pdf_file.save(pdf_filename, ContentFile(pdf_content), save=True)
                 
                 job_item_ids = [item.id for item in job_items]
-                JobItem.objects.filter(id__in=job_item_ids).update(payslip_generated=True)
+                JobItem.objects.filter(id__in=job_item_ids).update(payslip_generated=True, updated_at=timezone.now())
+                bump_version('jobs.jobitem')  # .update() skips post_save
+                record_changes('job_item', job_item_ids)
 
             response_serializer = PayslipListSerializer(payslip, context={'request': request})
             return Response(response_serializer.data, status=status.HTTP_201_CREATED)
@@ -323,7 +342,9 @@ class PayslipViewSet(viewsets.ModelViewSet):
                     payslip.pdf_file.save(pdf_filename, ContentFile(pdf_content), save=True)
                     
                     job_item_ids = [item.id for item in items]
-                    JobItem.objects.filter(id__in=job_item_ids).update(payslip_generated=True)
+                    JobItem.objects.filter(id__in=job_item_ids).update(payslip_generated=True, updated_at=timezone.now())
+                    bump_version('jobs.jobitem')  # .update() skips post_save
+                    record_changes('job_item', job_item_ids)
                     
                     generated_payslips.append(payslip)
 
@@ -334,6 +355,7 @@ class PayslipViewSet(viewsets.ModelViewSet):
 
 
     @action(detail=False, methods=['get'])
+    @static_etag
     def metadata(self, request):
         """
         GET /api/payslips/metadata/
@@ -355,14 +377,15 @@ class PayslipViewSet(viewsets.ModelViewSet):
         return Response(metadata, status=status.HTTP_200_OK)
 
 
-class ServiceRateViewSet(viewsets.ModelViewSet):
+class ServiceRateViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing ServiceRate resources.
     """
     queryset = ServiceRate.objects.all().select_related('product')
     serializer_class = ServiceRateSerializer
     permission_classes = [AllowAny]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter, UpdatedSinceFilter]
     search_fields = ['product__product_type', 'product__animal_type', 'service_category']
     ordering_fields = ['product__product_type', 'product__animal_type', 'service_category', 'rate_per_unit']
     pagination_class = PayslipPagination # Re-use PayslipPagination for now
+    etag_version_labels = ('payslips.servicerate', 'products.product')
@@ -1,6 +1,7 @@
 # filepath: /home/gadmor/projects/myapp-backend/appback/products/admin.py
 from django.contrib import admin
-from .models import Product, PriceHistory
+from .models import Product, PriceHistory, ScheduledPriceChange
 
 admin.site.register(Product)
-admin.site.register(PriceHistory)
\ No newline at end of file
+admin.site.register(PriceHistory)
+admin.site.register(ScheduledPriceChange)
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ProductsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'products'
+
+    def ready(self):
+        # Version stamps invalidate the in-process catalog (products/catalog.py) and cached API responses
+        from appback.versioning import track_model_versions
+        from .models import Product, PriceHistory
+        track_model_versions(Product, PriceHistory)
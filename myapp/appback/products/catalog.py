@@ -0,0 +1,87 @@
+# products/catalog.py
+"""
+In-process index of the active product catalog.
+
+Resolves (product_type, animal_type, size_category) to the product id, its
+base price and the per-stage service rates without touching the database on
+the hot path. The index is loaded lazily, once per process, and reloaded when
+the Product, PriceHistory or ServiceRate version stamps change
+(see appback/versioning.py).
+"""
+import threading
+
+from appback.versioning import get_versions
+from jobs.models import ServiceRate
+from .models import Product
+
+CATALOG_VERSION_LABELS = ('products.product', 'products.pricehistory', 'jobs.servicerate')
+
+
+class ProductCatalog:
+    """
+    Dict keyed by the product natural key. Each entry holds:
+        {'id': ..., 'base_price': Decimal, 'rates': {service_category: Decimal}}
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._entries = {}
+
+    def _load(self):
+        entries = {}
+        by_id = {}
+        products = Product.objects.filter(is_active=True).values_list(
+            'id', 'product_type', 'animal_type', 'size_category', 'base_price'
+        )
+        for product_id, product_type, animal_type, size_category, base_price in products:
+            entry = {'id': product_id, 'base_price': base_price, 'rates': {}}
+            entries[(product_type, animal_type, size_category)] = entry
+            by_id[product_id] = entry
+
+        rates = ServiceRate.objects.filter(product_id__in=by_id.keys()).values_list(
+            'product_id', 'service_category', 'rate_per_unit'
+        )
+        for product_id, service_category, rate_per_unit in rates:
+            by_id[product_id]['rates'][service_category] = rate_per_unit
+
+        return entries
+
+    def _current_entries(self):
+        version = get_versions(*CATALOG_VERSION_LABELS)
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    # Read the stamp before loading so a write racing the load
+                    # leaves us stale by one version rather than silently current.
+                    self._entries = self._load()
+                    self._version = version
+        return self._entries
+
+    def get(self, product_type, animal_type, size_category):
+        """Return the catalog entry for a natural key, or None if no active product matches."""
+        return self._current_entries().get((product_type, animal_type, size_category))
+
+    def resolve_price(self, product_type, animal_type, size_category, service_category):
+        """
+        Return {'id', 'price', 'service_rate_per_unit'} for a product and service
+        category, or None if the product does not exist or is inactive.
+        service_rate_per_unit is None when no rate is defined for the category.
+        """
+        entry = self.get(product_type, animal_type, size_category)
+        if entry is None:
+            return None
+        return {
+            'id': entry['id'],
+            'price': entry['base_price'],
+            'service_rate_per_unit': entry['rates'].get(service_category),
+        }
+
+    def clear(self):
+        """Drop the loaded index; the next lookup reloads it."""
+        with self._lock:
+            self._version = None
+            self._entries = {}
+
+
+catalog = ProductCatalog()
@@ -0,0 +1,388 @@
+# products/importing.py
+"""
+Bulk CSV import for the catalogue: products, job service rates and opening stock.
+
+Each import kind reads its own CSV layout (see IMPORT_COLUMNS). The file is read
+row by row and handled in batches: every batch costs one lookup of the existing
+rows plus one upsert (`bulk_create(update_conflicts=True)`), whatever its size.
+Product imports also bulk-create the matching PriceHistory rows.
+
+A key may appear only once per file (a product, or a product and service
+category for rates and inventory); a repeated key is an invalid row.
+
+The whole import runs in one transaction and is rolled back if any row is
+invalid, or if the file turns out not to be UTF-8 text. With dry_run=True
+nothing is written; the report lists what would be created or changed.
+
+Bulk writes skip model signals, so version stamps, search documents and the
+job payments priced from imported rates are refreshed here once per import.
+"""
+import csv
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from appback.versioning import bump_version
+from inventory.models import Inventory, FinishedStock
+from jobs.models import ServiceRate
+from jobs.recosting import recost_job_items
+from search.indexing import index_queryset
+from sync.changes import record_changes
+from .models import Product, PriceHistory
+
+IMPORT_KINDS = ['products', 'rates', 'inventory']
+
+PRODUCT_KEY_COLUMNS = ['product_type', 'animal_type', 'size_category']
+IMPORT_COLUMNS = {
+    'products': PRODUCT_KEY_COLUMNS + ['base_price'],  # Optional: is_active
+    'rates': PRODUCT_KEY_COLUMNS + ['service_category', 'rate_per_unit'],
+    'inventory': PRODUCT_KEY_COLUMNS + ['service_category', 'quantity', 'average_cost'],  # FINISHED rows go to FinishedStock
+}
+
+DEFAULT_BATCH_SIZE = 500
+MAX_REPORTED_CHANGES = 1000
+
+PRODUCT_TYPE_VALUES = {choice[0] for choice in Product.PRODUCT_TYPES}
+SIZE_CATEGORY_VALUES = {choice[0] for choice in Product.SIZE_CATEGORIES}
+SERVICE_CATEGORY_VALUES = {choice[0] for choice in Product.SERVICE_CATEGORIES}
+TRUE_VALUES = {'1', 'true', 'yes', 'y'}
+FALSE_VALUES = {'0', 'false', 'no', 'n'}
+
+
+class ImportAborted(Exception):
+    """Raised inside the import transaction to roll it back."""
+
+
+class ImportReport:
+    def __init__(self, kind, dry_run):
+        self.kind = kind
+        self.dry_run = dry_run
+        self.rows = 0
+        self.counts = {'created': 0, 'updated': 0, 'unchanged': 0}
+        self.errors = []
+        self.changes = []
+        self.changes_truncated = False
+
+    def record(self, line, action, key, changes=None):
+        self.counts[action] += 1
+        if action == 'unchanged':
+            return
+        if len(self.changes) >= MAX_REPORTED_CHANGES:
+            self.changes_truncated = True
+            return
+        self.changes.append({'line': line, 'action': action, 'key': key, 'changes': changes or {}})
+
+    def as_dict(self):
+        return {
+            'kind': self.kind,
+            'dry_run': self.dry_run,
+            'committed': not self.dry_run and not self.errors,
+            'rows': self.rows,
+            **self.counts,
+            'errors': self.errors,
+            'changes': self.changes,
+            'changes_truncated': self.changes_truncated,
+        }
+
+
+# --- Row parsing ---
+
+def _decimal(value, field, errors):
+    try:
+        number = Decimal(value)
+    except (InvalidOperation, TypeError):
+        errors.append(f"{field} must be a number, got '{value}'.")
+        return None
+    if number < 0:
+        errors.append(f"{field} must not be negative.")
+        return None
+    return number.quantize(Decimal('0.01'))
+
+
+def _parse_row(kind, row):
+    """Return (values, errors) for one CSV row."""
+    errors = []
+    values = {column: (row.get(column) or '').strip() for column in IMPORT_COLUMNS[kind]}
+
+    missing = [column for column, value in values.items() if value == '']
+    if missing:
+        return None, [f"Missing value(s) for: {', '.join(missing)}."]
+
+    values['product_type'] = values['product_type'].upper()
+    values['size_category'] = values['size_category'].upper()
+    if values['product_type'] not in PRODUCT_TYPE_VALUES:
+        errors.append(f"Invalid product_type '{values['product_type']}'.")
+    if values['size_category'] not in SIZE_CATEGORY_VALUES:
+        errors.append(f"Invalid size_category '{values['size_category']}'.")
+
+    if 'service_category' in values:
+        values['service_category'] = values['service_category'].upper()
+        if values['service_category'] not in SERVICE_CATEGORY_VALUES:
+            errors.append(f"Invalid service_category '{values['service_category']}'.")
+
+    if kind == 'products':
+        values['base_price'] = _decimal(values['base_price'], 'base_price', errors)
+        is_active = (row.get('is_active') or '').strip().lower()
+        if is_active and is_active not in TRUE_VALUES | FALSE_VALUES:
+            errors.append(f"is_active must be true or false, got '{is_active}'.")
+        # Blank keeps an existing product's flag; new products default to active
+        values['is_active'] = None if not is_active else is_active in TRUE_VALUES
+    elif kind == 'rates':
+        values['rate_per_unit'] = _decimal(values['rate_per_unit'], 'rate_per_unit', errors)
+    else:
+        values['average_cost'] = _decimal(values['average_cost'], 'average_cost', errors)
+        try:
+            values['quantity'] = int(values['quantity'])
+            if values['quantity'] < 0:
+                raise ValueError
+        except ValueError:
+            errors.append(f"quantity must be a non-negative integer, got '{values['quantity']}'.")
+
+    return values, errors
+
+
+def _product_key(values):
+    return tuple(values[column] for column in PRODUCT_KEY_COLUMNS)
+
+
+def _row_key(kind, values):
+    """The natural key a row writes to; each may appear only once per file."""
+    if kind == 'products':
+        return _product_key(values)
+    return _product_key(values) + (values['service_category'],)
+
+
+def _products_by_key(keys):
+    """One query: {natural_key: Product} for the given natural keys."""
+    condition = Q()
+    for product_type, animal_type, size_category in keys:
+        condition |= Q(product_type=product_type, animal_type=animal_type, size_category=size_category)
+    if not keys:
+        return {}
+    return {(p.product_type, p.animal_type, p.size_category): p for p in Product.objects.filter(condition)}
+
+
+def _diff(existing, values, fields):
+    return {
+        field: {'old': getattr(existing, field), 'new': values[field]}
+        for field in fields if getattr(existing, field) != values[field]
+    }
+
+
+# --- Batch handlers (one per kind) ---
+
+def _import_products(batch, report, changed_by, touched):
+    fields = ['base_price', 'is_active']
+    existing = _products_by_key({_product_key(values) for _, values in batch})
+    rows, history = {}, []
+
+    for line, values in batch:
+        key = _product_key(values)
+        product = existing.get(key)
+        label = ' / '.join(key)
+        if values['is_active'] is None:
+            values['is_active'] = product.is_active if product else True
+        if product is None:
+            report.record(line, 'created', label, {field: {'old': None, 'new': values[field]} for field in fields})
+            history.append((key, Decimal('0.00'), values['base_price'], "Initial product price setting (bulk import)"))
+        else:
+            changes = _diff(product, values, fields)
+            report.record(line, 'updated' if changes else 'unchanged', label, changes)
+            if not changes:
+                continue
+            if 'base_price' in changes:
+                history.append((key, product.base_price, values['base_price'], "Bulk import price update"))
+        rows[key] = Product(**{column: values[column] for column in PRODUCT_KEY_COLUMNS}, **{field: values[field] for field in fields})
+
+    if report.dry_run or not rows:
+        return
+
+    Product.objects.bulk_create(
+        list(rows.values()), update_conflicts=True,
+        unique_fields=PRODUCT_KEY_COLUMNS, update_fields=fields + ['last_price_update'],
+    )
+    # bulk_create does not return ids for upserted rows on every backend, so re-read them
+    ids = {key: product.id for key, product in _products_by_key(rows.keys()).items()}
+    now = timezone.now()
+    PriceHistory.objects.bulk_create([
+        PriceHistory(product_id=ids[key], old_price=old, new_price=new, effective_date=now, changed_by=changed_by, reason=reason)
+        for key, old, new, reason in history
+    ])
+    touched['products.product'].update(ids.values())
+    if history:
+        touched['products.pricehistory'].add(True)
+
+
+def _import_rates(batch, report, changed_by, touched):
+    products = _products_by_key({_product_key(values) for _, values in batch})
+    resolved = []
+    for line, values in batch:
+        product = products.get(_product_key(values))
+        if product is None:
+            report.errors.append({'line': line, 'errors': [f"Product {' / '.join(_product_key(values))} does not exist."]})
+        else:
+            resolved.append((line, values, product))
+
+    existing = {
+        (rate.product_id, rate.service_category): rate
+        for rate in ServiceRate.objects.filter(product_id__in={product.id for _, _, product in resolved})
+    }
+    rows = {}
+    for line, values, product in resolved:
+        label = f"{product} {values['service_category']}"
+        rate = existing.get((product.id, values['service_category']))
+        if rate is None:
+            report.record(line, 'created', label, {'rate_per_unit': {'old': None, 'new': values['rate_per_unit']}})
+        else:
+            changes = _diff(rate, values, ['rate_per_unit'])
+            report.record(line, 'updated' if changes else 'unchanged', label, changes)
+            if not changes:
+                continue
+        rows[(product.id, values['service_category'])] = ServiceRate(
+            product=product, service_category=values['service_category'], rate_per_unit=values['rate_per_unit']
+        )
+
+    if report.dry_run or report.errors or not rows:
+        return
+    ServiceRate.objects.bulk_create(
+        list(rows.values()), update_conflicts=True,
+        unique_fields=['product', 'service_category'], update_fields=['rate_per_unit'],
+    )
+    touched['jobs.servicerate'].update(rows.keys())
+
+
+def _import_inventory(batch, report, changed_by, touched):
+    products = _products_by_key({_product_key(values) for _, values in batch})
+    resolved = []
+    for line, values in batch:
+        product = products.get(_product_key(values))
+        if product is None:
+            report.errors.append({'line': line, 'errors': [f"Product {' / '.join(_product_key(values))} does not exist."]})
+        else:
+            resolved.append((line, values, product))
+
+    product_ids = {product.id for _, _, product in resolved}
+    existing_stages = {
+        (row.product_id, row.service_category): row for row in Inventory.objects.filter(product_id__in=product_ids)
+    }
+    existing_finished = {row.product_id: row for row in FinishedStock.objects.filter(product_id__in=product_ids)}
+
+    stages, finished = {}, {}
+    for line, values, product in resolved:
+        is_finished = values['service_category'] == 'FINISHED'
+        current = existing_finished.get(product.id) if is_finished else existing_stages.get((product.id, values['service_category']))
+        label = f"{product} {'FinishedStock' if is_finished else values['service_category']}"
+        fields = ['quantity', 'average_cost']
+        if current is None:
+            report.record(line, 'created', label, {field: {'old': None, 'new': values[field]} for field in fields})
+        else:
+            changes = _diff(current, values, fields)
+            report.record(line, 'updated' if changes else 'unchanged', label, changes)
+            if not changes:
+                continue
+        if is_finished:
+            finished[product.id] = FinishedStock(
+                product=product, quantity=values['quantity'], average_cost=values['average_cost']
+            )
+        else:
+            stages[(product.id, values['service_category'])] = Inventory(
+                product=product, service_category=values['service_category'], quantity=values['quantity'],
+                average_cost=values['average_cost'], price_at_this_stage=values['average_cost'],
+            )
+
+    if report.dry_run or report.errors:
+        return
+    if stages:
+        Inventory.objects.bulk_create(
+            list(stages.values()), update_conflicts=True, unique_fields=['product', 'service_category'],
+            update_fields=['quantity', 'average_cost', 'price_at_this_stage', 'last_updated'],
+        )
+        touched['inventory.inventory'].add(True)
+    if finished:
+        FinishedStock.objects.bulk_create(
+            list(finished.values()), update_conflicts=True, unique_fields=['product'],
+            update_fields=['quantity', 'average_cost', 'last_updated'],
+        )
+        touched['inventory.finishedstock'].add(True)
+
+
+BATCH_HANDLERS = {
+    'products': _import_products,
+    'rates': _import_rates,
+    'inventory': _import_inventory,
+}
+
+
+def _encoding_error(line):
+    return {'line': line, 'errors': ['The file is not UTF-8 text. Save it as "CSV UTF-8" and upload it again.']}
+
+
+def run_import(kind, lines, dry_run=False, batch_size=DEFAULT_BATCH_SIZE, changed_by='system'):
+    """
+    Import CSV text `lines` (any iterable of str, such as an open file) of the given kind.
+    Returns an ImportReport. Nothing is written if dry_run is set or any row is invalid.
+    """
+    report = ImportReport(kind, dry_run)
+    handler = BATCH_HANDLERS[kind]
+    touched = {label: set() for label in (
+        'products.product', 'products.pricehistory', 'jobs.servicerate', 'inventory.inventory', 'inventory.finishedstock',
+    )}
+
+    reader = csv.DictReader(lines)
+    try:
+        fieldnames = reader.fieldnames or []
+    except UnicodeDecodeError:
+        report.errors.append(_encoding_error(1))
+        return report
+    missing_columns = [column for column in IMPORT_COLUMNS[kind] if column not in fieldnames]
+    if missing_columns:
+        report.errors.append({'line': 1, 'errors': [f"Missing column(s): {', '.join(missing_columns)}."]})
+        return report
+
+    try:
+        with transaction.atomic():
+            batch = []
+            first_lines = {}  # Row key -> line it first appeared on
+            for row in reader:
+                report.rows += 1
+                values, errors = _parse_row(kind, row)
+                if not errors:
+                    first_line = first_lines.setdefault(_row_key(kind, values), reader.line_num)
+                    if first_line != reader.line_num:
+                        errors = [f"Duplicate of line {first_line}; each row must have its own key."]
+                if errors:
+                    report.errors.append({'line': reader.line_num, 'errors': errors})
+                    continue
+                batch.append((reader.line_num, values))
+                if len(batch) >= batch_size:
+                    handler(batch, report, changed_by, touched)
+                    batch = []
+            if batch:
+                handler(batch, report, changed_by, touched)
+
+            if report.errors and not dry_run:
+                raise ImportAborted()
+    except ImportAborted:
+        return report
+    except UnicodeDecodeError:
+        # Raised while reading the next line, after the transaction has been rolled back
+        report.errors.append(_encoding_error(reader.line_num + 1))
+        return report
+
+    if not dry_run:
+        for label, marks in touched.items():
+            if marks:
+                bump_version(label)
+        # bulk_create skips the signals behind the /api/events/ change log
+        if touched['products.product']:
+            record_changes('product', touched['products.product'])
+        for label, entity_type in (('inventory.inventory', 'inventory'), ('inventory.finishedstock', 'finished_stock')):
+            if touched[label]:
+                record_changes(entity_type)
+        if touched['jobs.servicerate']:
+            recost_job_items(touched['jobs.servicerate'])
+        if touched['products.product']:
+            index_queryset('product', Product.objects.filter(id__in=touched['products.product']))
+    return report
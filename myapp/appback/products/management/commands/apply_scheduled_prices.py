@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from products.pricing import apply_due_price_changes
+
+
+class Command(BaseCommand):
+    help = 'Applies scheduled base price changes whose effective date has arrived. Run it from cron.'
+
+    def handle(self, *args, **options):
+        applied = apply_due_price_changes()
+        self.stdout.write(self.style.SUCCESS(f'{applied} scheduled price change(s) applied.'))
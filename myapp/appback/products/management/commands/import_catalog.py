@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+from products.importing import IMPORT_KINDS, DEFAULT_BATCH_SIZE, run_import
+
+
+class Command(BaseCommand):
+    help = 'Imports products, job service rates or opening inventory from a CSV file (see products/importing.py).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=IMPORT_KINDS, help='What the CSV contains.')
+        parser.add_argument('path', help='Path to the CSV file.')
+        parser.add_argument('--dry-run', action='store_true', help='Report the changes without writing anything.')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Rows upserted per query.')
+        parser.add_argument('--changed-by', default='system', help='Recorded on PriceHistory rows.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be a positive integer.')
+
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as csv_file:
+                report = run_import(
+                    options['kind'], csv_file, dry_run=options['dry_run'],
+                    batch_size=options['batch_size'], changed_by=options['changed_by'],
+                )
+        except OSError as exc:
+            raise CommandError(f"Cannot read {options['path']}: {exc}")
+
+        for change in report.changes:
+            details = ', '.join(f"{field}: {values['old']} -> {values['new']}" for field, values in change['changes'].items())
+            self.stdout.write(f"line {change['line']}: {change['action']} {change['key']} ({details})")
+        if report.changes_truncated:
+            self.stdout.write('... further changes not listed')
+        for error in report.errors:
+            self.stderr.write(f"line {error['line']}: {' '.join(error['errors'])}")
+
+        summary = (
+            f"{report.rows} rows: {report.counts['created']} created, "
+            f"{report.counts['updated']} updated, {report.counts['unchanged']} unchanged"
+        )
+        if report.errors:
+            raise CommandError(f'{summary}; {len(report.errors)} invalid row(s), nothing was imported.')
+        if report.dry_run:
+            self.stdout.write(self.style.WARNING(f'Dry run, nothing written. {summary}.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Import complete. {summary}.'))
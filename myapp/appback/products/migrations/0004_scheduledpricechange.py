@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:54
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_alter_product_product_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduledPriceChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('new_price', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(0)])),
+                ('effective_date', models.DateTimeField()),
+                ('changed_by', models.CharField(max_length=100)),
+                ('reason', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('applied_at', models.DateTimeField(blank=True, null=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scheduled_price_changes', to='products.product')),
+            ],
+            options={
+                'ordering': ['effective_date'],
+                'indexes': [models.Index(fields=['applied_at', 'effective_date'], name='products_sc_applied_f93eda_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_scheduledpricechange'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pricehistory',
+            index=models.Index(fields=['product', '-effective_date'], name='pricehistory_asof_idx'),
+        ),
+    ]
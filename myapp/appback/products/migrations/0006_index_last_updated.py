@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_pricehistory_asof_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='product',
+            name='last_price_update',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
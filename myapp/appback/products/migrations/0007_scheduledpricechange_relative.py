@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-19 12:40
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_index_last_updated'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='scheduledpricechange',
+            name='new_price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, validators=[django.core.validators.MinValueValidator(0)]),
+        ),
+        migrations.AddField(
+            model_name='scheduledpricechange',
+            name='percentage',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=6, null=True),
+        ),
+        migrations.AddField(
+            model_name='scheduledpricechange',
+            name='amount',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+    ]
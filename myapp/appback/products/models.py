@@ -81,7 +81,7 @@ class Product(models.Model):
     size_category = models.CharField(max_length=20, choices=SIZE_CATEGORIES, default='MEDIUM')
     base_price = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(0)])
     is_active = models.BooleanField(default=True)
-    last_price_update = models.DateTimeField(auto_now=True)
+    last_price_update = models.DateTimeField(auto_now=True, db_index=True)  # Changes on every save, not just price changes
     
     class Meta:
         unique_together = ['product_type', 'animal_type', 'size_category']
@@ -104,4 +104,39 @@ class PriceHistory(models.Model):
     reason = models.TextField(blank=True, null=True)
     
     class Meta:
-        ordering = ['-effective_date']
\ No newline at end of file
+        ordering = ['-effective_date']
+        indexes = [
+            # As-of lookups: latest change for a product at or before a date
+            models.Index(fields=['product', '-effective_date'], name='pricehistory_asof_idx'),
+        ]
+
+class ScheduledPriceChange(models.Model):
+    """
+    A base price revision queued for a future date; applied by the apply_scheduled_prices command.
+    Exactly one of new_price, percentage or amount is set. A relative revision is priced
+    from the base price at the moment it is applied, so earlier changes are not overwritten.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='scheduled_price_changes')
+    new_price = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(0)], null=True, blank=True)
+    percentage = models.DecimalField(max_digits=6, decimal_places=2, null=True, blank=True)
+    amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    effective_date = models.DateTimeField()
+    changed_by = models.CharField(max_length=100)
+    reason = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    applied_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['effective_date']
+        indexes = [
+            models.Index(fields=['applied_at', 'effective_date']),
+        ]
+
+    def __str__(self):
+        if self.new_price is not None:
+            change = self.new_price
+        elif self.percentage is not None:
+            change = f"{self.percentage:+}%"
+        else:
+            change = f"{self.amount:+}"
+        return f"{self.product} -> {change} on {self.effective_date:%Y-%m-%d}"
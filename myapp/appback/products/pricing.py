@@ -0,0 +1,241 @@
+# products/pricing.py
+"""
+Bulk base-price revisions.
+
+`apply_price_changes` writes any number of new prices in one transaction: one
+locked read, a batched bulk_update of Product and one bulk_create of the
+matching PriceHistory rows. Revisions dated in the future are saved as
+ScheduledPriceChange rows; the apply_scheduled_prices command runs
+`apply_due_price_changes` to make them live once their date arrives. A
+scheduled percentage or amount is kept as such and priced from the base price
+current when it is applied, so a manual change made in between still counts.
+
+Bulk writes skip model signals, so the Product/PriceHistory version stamps
+and the product search documents are refreshed here.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+from django.utils import timezone
+
+from appback.versioning import bump_version
+from search.indexing import index_queryset
+from sync.changes import record_changes
+from .models import Product, PriceHistory, ScheduledPriceChange
+
+BULK_UPDATE_BATCH_SIZE = 500
+CENT = Decimal('0.01')
+
+
+def revised_price(old_price, percentage=None, amount=None):
+    """Apply a percentage (8 means +8%) or an absolute amount to a price, rounded to the cent."""
+    if percentage is not None:
+        new_price = old_price * (Decimal('1') + Decimal(percentage) / Decimal('100'))
+    else:
+        new_price = old_price + Decimal(amount)
+    return new_price.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def _refresh_products(product_ids):
+    # bulk_update and bulk_create skip the signals behind versions, search and /api/events/
+    bump_version('products.product')
+    bump_version('products.pricehistory')
+    record_changes('product', product_ids)
+    index_queryset('product', Product.objects.filter(id__in=product_ids))
+
+
+def apply_price_changes(new_prices, changed_by, reason):
+    """
+    Set {product_id: new_price} now. A new price may also be a function of the
+    locked current price, returning None to leave the product alone. Products
+    already at their new price are skipped.
+    Returns [{'product_id', 'old_price', 'new_price'}] for the changed products.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        products = list(Product.objects.select_for_update().filter(id__in=new_prices.keys()).order_by('id'))
+        changed, history, updated = [], [], []
+        for product in products:
+            new_price = new_prices[product.id]
+            if callable(new_price):
+                new_price = new_price(product.base_price)
+            if new_price is None or new_price == product.base_price:
+                continue
+            history.append(PriceHistory(
+                product=product, old_price=product.base_price, new_price=new_price,
+                effective_date=now, changed_by=changed_by, reason=reason,
+            ))
+            changed.append({'product_id': product.id, 'old_price': product.base_price, 'new_price': new_price})
+            product.base_price = new_price
+            product.last_price_update = now  # bulk_update does not apply auto_now
+            updated.append(product)
+
+        if changed:
+            Product.objects.bulk_update(
+                updated, ['base_price', 'last_price_update'], batch_size=BULK_UPDATE_BATCH_SIZE,
+            )
+            PriceHistory.objects.bulk_create(history, batch_size=BULK_UPDATE_BATCH_SIZE)
+            transaction.on_commit(lambda: _refresh_products([entry['product_id'] for entry in changed]))
+    return changed
+
+
+def schedule_price_changes(revisions, effective_date, changed_by, reason):
+    """
+    Queue {product_id: revision} for `effective_date`, where a revision is
+    {'new_price': ...}, {'percentage': ...} or {'amount': ...}. Returns the number of rows queued.
+    """
+    scheduled = ScheduledPriceChange.objects.bulk_create([
+        ScheduledPriceChange(
+            product_id=product_id, effective_date=effective_date, changed_by=changed_by, reason=reason, **revision,
+        )
+        for product_id, revision in revisions.items()
+    ], batch_size=BULK_UPDATE_BATCH_SIZE)
+    return len(scheduled)
+
+
+def _scheduled_price(change):
+    """The new price of a scheduled change, or a function of the price current when it is applied."""
+    if change.new_price is not None:
+        return change.new_price
+
+    def price(current):
+        new_price = revised_price(current, change.percentage, change.amount)
+        return new_price if new_price >= 0 else None  # Never applied below zero
+    return price
+
+
+def apply_due_price_changes(now=None):
+    """
+    Apply every unapplied ScheduledPriceChange dated at or before `now`. When a
+    product has several due, they are applied in date order so PriceHistory
+    keeps each step, and each relative change builds on the one before.
+    A relative change that would take a price below zero is skipped.
+    Returns the number of scheduled changes applied.
+    """
+    now = now or timezone.now()
+    applied = 0
+    with transaction.atomic():
+        due = list(
+            ScheduledPriceChange.objects.select_for_update()
+            .filter(applied_at__isnull=True, effective_date__lte=now)
+            .order_by('effective_date', 'id')
+        )
+        # Group into rounds holding at most one change per product
+        rounds = []
+        for change in due:
+            for round_changes in rounds:
+                if change.product_id not in round_changes:
+                    round_changes[change.product_id] = change
+                    break
+            else:
+                rounds.append({change.product_id: change})
+
+        for round_changes in rounds:
+            for (changed_by, reason), group in _by_author(round_changes.values()).items():
+                apply_price_changes({change.product_id: _scheduled_price(change) for change in group}, changed_by, reason)
+            applied += len(round_changes)
+
+        ScheduledPriceChange.objects.filter(id__in=[change.id for change in due]).update(applied_at=now)
+    return applied
+
+
+def _by_author(changes):
+    groups = {}
+    for change in changes:
+        reason = change.reason or f"Scheduled price change for {change.effective_date:%Y-%m-%d}"
+        groups.setdefault((change.changed_by, reason), []).append(change)
+    return groups
+
+
+# --- Point-in-time prices ---
+
+MAX_PRICE_AT_LOOKUPS = 1000
+
+
+def prices_at(pairs):
+    """
+    Resolve the base price of each (product_id, moment) pair as it stood at that
+    moment, with one query. For each pair the latest PriceHistory row at or before
+    the moment gives the price (an index-backed top-1 lookup per pair on
+    pricehistory_asof_idx). Before a product's first recorded change it is that
+    change's old_price; products with no history have always had their base_price.
+
+    Returns one dict per pair, in order:
+        {'product_id', 'at', 'price', 'source'}  # source: history, before_history or current
+    Unknown products get price None and source None.
+    """
+    from django.db import connection
+
+    if not pairs:
+        return []
+    quote = connection.ops.quote_name
+    history = quote(PriceHistory._meta.db_table)
+    products = quote(Product._meta.db_table)
+    if connection.vendor == 'postgresql':
+        row_sql = '(%s::integer, %s::integer, %s::timestamptz)'
+    else:
+        row_sql = '(%s, %s, %s)'
+
+    params = []
+    for index, (product_id, moment) in enumerate(pairs):
+        params.extend([index, product_id, connection.ops.adapt_datetimefield_value(moment)])
+
+    sql = f"""
+        WITH request (idx, product_id, at) AS (VALUES {', '.join([row_sql] * len(pairs))})
+        SELECT request.idx,
+            (SELECT h.new_price FROM {history} h
+              WHERE h.product_id = request.product_id AND h.effective_date <= request.at
+              ORDER BY h.effective_date DESC, h.id DESC LIMIT 1),
+            (SELECT h.old_price FROM {history} h
+              WHERE h.product_id = request.product_id AND h.effective_date > request.at
+              ORDER BY h.effective_date ASC, h.id ASC LIMIT 1),
+            p.base_price,
+            p.id
+        FROM request LEFT JOIN {products} p ON p.id = request.product_id
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        fetched = {row[0]: row[1:] for row in cursor.fetchall()}
+
+    field = PriceHistory._meta.get_field('new_price')
+    results = []
+    for index, (product_id, moment) in enumerate(pairs):
+        as_of, before_history, current, found = fetched[index]
+        if found is None:
+            price, source = None, None
+        elif as_of is not None:
+            price, source = as_of, 'history'
+        elif before_history is not None:
+            price, source = before_history, 'before_history'
+        else:
+            price, source = current, 'current'
+        if price is not None:
+            price = field.to_python(price).quantize(CENT)  # SQLite hands back floats
+        results.append({'product_id': product_id, 'at': moment, 'price': price, 'source': source})
+    return results
+
+
+def as_of_moment(value):
+    """
+    Parse an ISO datetime, or a YYYY-MM-DD date meaning the end of that day, into
+    an aware datetime. Returns None if the value is neither.
+    """
+    from datetime import datetime, time
+    from django.utils.dateparse import parse_date, parse_datetime
+
+    try:
+        # Dates first: parse_datetime would read a bare date as midnight
+        day = parse_date(value)
+        moment = datetime.combine(day, time.max) if day else parse_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if moment is None:
+        return None
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def price_at(product_id, moment):
+    """Single-pair form of prices_at; returns the price or None for an unknown product."""
+    return prices_at([(product_id, moment)])[0]['price']
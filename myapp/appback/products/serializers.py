@@ -1,6 +1,7 @@
 # products/serializers.py
 from rest_framework import serializers
 from .models import Product, PriceHistory
+from .pricing import MAX_PRICE_AT_LOOKUPS, as_of_moment
 from datetime import date
 from django.utils import timezone
 
@@ -134,4 +135,66 @@ class PriceHistoryCreateUpdateSerializer(serializers.ModelSerializer):
             else:
                 validated_data['changed_by'] = instance.changed_by
 
-        return super().update(instance, validated_data)
\ No newline at end of file
+        return super().update(instance, validated_data)
+
+# --- Bulk reprice ---
+
+class RepriceItemSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField(min_value=1)
+    new_price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+
+
+class BulkRepriceSerializer(serializers.Serializer):
+    """
+    Either `items` (explicit new prices) or a product selection (`product_ids`
+    or `filters`, which takes ProductFilter parameters) plus exactly one of
+    `percentage` or `amount`.
+    """
+    items = RepriceItemSerializer(many=True, required=False, allow_empty=False)
+    product_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, allow_empty=False, max_length=5000
+    )
+    filters = serializers.DictField(child=serializers.CharField(), required=False)
+    percentage = serializers.DecimalField(max_digits=6, decimal_places=2, required=False, min_value=-100)
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    reason = serializers.CharField(required=False, allow_blank=True, default='Bulk price revision')
+    effective_date = serializers.DateTimeField(required=False, allow_null=True)
+
+    def validate(self, data):
+        selections = [key for key in ('items', 'product_ids', 'filters') if key in data]
+        if len(selections) != 1:
+            raise serializers.ValidationError("Provide exactly one of items, product_ids or filters.")
+
+        changes = [key for key in ('percentage', 'amount') if data.get(key) is not None]
+        if 'items' in data:
+            if changes:
+                raise serializers.ValidationError("percentage/amount cannot be combined with explicit items.")
+        elif len(changes) != 1:
+            raise serializers.ValidationError("Provide exactly one of percentage or amount.")
+
+        effective_date = data.get('effective_date')
+        if effective_date and effective_date <= timezone.now():
+            data['effective_date'] = None  # Past or present dates apply immediately
+        return data
+
+
+# --- Point-in-time prices ---
+
+class PriceAtItemSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField(min_value=1)
+    date = serializers.CharField(help_text='YYYY-MM-DD (end of that day) or an ISO datetime.')
+
+    def validate_date(self, value):
+        moment = as_of_moment(value)
+        if moment is None:
+            raise serializers.ValidationError("Use YYYY-MM-DD or an ISO datetime.")
+        return moment
+
+
+class PriceAtBatchSerializer(serializers.Serializer):
+    items = PriceAtItemSerializer(many=True, allow_empty=False)
+
+    def validate_items(self, value):
+        if len(value) > MAX_PRICE_AT_LOOKUPS:
+            raise serializers.ValidationError(f"At most {MAX_PRICE_AT_LOOKUPS} lookups per request.")
+        return value
@@ -1,3 +1,442 @@
-from django.test import TestCase
+import math
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+from django.urls import reverse
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from appback.conditional import versioned_validators
+from appback.versioning import get_last_modified
+from inventory.models import Inventory, FinishedStock
+from jobs.models import ServiceRate
+from products.catalog import catalog
+from products.models import Product, PriceHistory, ScheduledPriceChange
+from products.pricing import apply_due_price_changes, as_of_moment, prices_at
+from sync.models import ChangeEvent
+
+
+class ProductCatalogTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        catalog.clear()
+        self.product = Product.objects.create(
+            product_type='SITTING_ANIMAL',
+            animal_type='Elephant',
+            size_category='MEDIUM',
+            base_price=10.00,
+        )
+        ServiceRate.objects.create(product=self.product, service_category='CARVING', rate_per_unit=2.50)
+
+    def lookup(self, **overrides):
+        params = {
+            'product_type': 'SITTING_ANIMAL',
+            'animal_type': 'Elephant',
+            'size_category': 'MEDIUM',
+            'service_category': 'CARVING',
+        }
+        params.update(overrides)
+        return params
+
+    def test_get_price_served_from_catalog(self):
+        catalog.get('SITTING_ANIMAL', 'Elephant', 'MEDIUM')  # Warm the index
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('get_price'), self.lookup())
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['id'], self.product.id)
+        self.assertEqual(float(response.data['service_rate_per_unit']), 2.50)
+
+    def test_catalog_reloads_after_writes(self):
+        catalog.get('SITTING_ANIMAL', 'Elephant', 'MEDIUM')
+        with self.captureOnCommitCallbacks(execute=True):  # Stamps are bumped on commit
+            self.product.base_price = 12.00
+            self.product.save()
+            ServiceRate.objects.filter(product=self.product).get().delete()
+
+        price = catalog.resolve_price('SITTING_ANIMAL', 'Elephant', 'MEDIUM', 'CARVING')
+        self.assertEqual(float(price['price']), 12.00)
+        self.assertIsNone(price['service_rate_per_unit'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.is_active = False
+            self.product.save()
+        response = self.client.get(reverse('get_price'), self.lookup())
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_version_is_bumped_when_the_write_commits(self):
+        from appback.versioning import get_version
+
+        before = get_version('products.product')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.save()
+            self.assertEqual(get_version('products.product'), before)
+        self.assertNotEqual(get_version('products.product'), before)
+
+    def test_get_prices_batch(self):
+        response = self.client.post(reverse('get_prices'), {'items': [
+            self.lookup(),
+            self.lookup(animal_type='Giraffe'),
+            self.lookup(service_category=''),
+        ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        first, missing, invalid = response.data['results']
+        self.assertEqual(first['id'], self.product.id)
+        self.assertEqual(missing['error'], 'Product not found')
+        self.assertEqual(invalid['error'], 'Missing required parameters.')
+
+        response = self.client.post(reverse('get_prices'), {'items': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.product = Product.objects.create(
+            product_type='SITTING_ANIMAL',
+            animal_type='Elephant',
+            size_category='MEDIUM',
+            base_price=10.00,
+        )
+
+    def test_list_answers_304_until_products_change(self):
+        url = reverse('product-list')
+        response = self.client.get(url)
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.captureOnCommitCallbacks(execute=True):  # Stamps are bumped on commit
+            self.product.base_price = 11.00
+            self.product.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_last_modified_is_withheld_within_the_second_of_a_write(self):
+        url = reverse('product-list')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.save()
+        stamp = get_last_modified('products.product')
+        self.assertNotIn('Last-Modified', self.client.get(url))
+
+        with mock.patch('appback.conditional.time.time', return_value=stamp + 5):
+            response = self.client.get(url)
+        self.assertEqual(response['Last-Modified'], http_date(math.ceil(stamp)))
+
+    def test_etag_depends_on_the_negotiated_media_type(self):
+        request = RequestFactory().get(reverse('product-list'))
+        etags = set()
+        for media_type in ('application/json', 'application/msgpack'):
+            request.accepted_media_type = media_type
+            etags.add(versioned_validators(request, ('products.product',))[0])
+        self.assertEqual(len(etags), 2)
+
+    def test_static_metadata_is_served_from_cached_data(self):
+        url = reverse('product-product-metadata')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('product_types', response.json())
+
+        # Later responses come from the kept data, rendered by the negotiated renderer
+        cached = self.client.get(url)
+        self.assertEqual(cached['Content-Type'], response['Content-Type'])
+        self.assertEqual(cached.json(), response.json())
+        self.assertEqual(cached['ETag'], response['ETag'])
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class CatalogImportTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_authenticate(self.admin)
+        self.product = Product.objects.create(
+            product_type='SITTING_ANIMAL',
+            animal_type='Elephant',
+            size_category='MEDIUM',
+            base_price=10.00,
+        )
+
+    def upload(self, kind, text, dry_run=False, encoding='utf-8'):
+        upload = SimpleUploadedFile('catalog.csv', text.encode(encoding), content_type='text/csv')
+        return self.client.post(
+            reverse('product-bulk-import'), {'file': upload, 'kind': kind, 'dry_run': dry_run}, format='multipart'
+        )
+
+    PRODUCTS_CSV = (
+        "product_type,animal_type,size_category,base_price\n"
+        "SITTING_ANIMAL,Elephant,MEDIUM,12.50\n"
+        "SITTING_ANIMAL,Giraffe,LARGE,20\n"
+    )
+
+    def test_dry_run_reports_diff_without_writing(self):
+        response = self.upload('products', self.PRODUCTS_CSV, dry_run=True)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['created'], response.data['updated']), (1, 1))
+        self.assertFalse(response.data['committed'])
+        updated = next(change for change in response.data['changes'] if change['action'] == 'updated')
+        self.assertEqual(str(updated['changes']['base_price']['new']), '12.50')
+        self.assertEqual(Product.objects.count(), 1)
+        self.assertFalse(PriceHistory.objects.exists())
+
+    def test_import_upserts_products_and_price_history(self):
+        response = self.upload('products', self.PRODUCTS_CSV)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.product.refresh_from_db()
+        self.assertEqual(float(self.product.base_price), 12.50)
+        giraffe = Product.objects.get(animal_type='Giraffe')
+        self.assertEqual(
+            set(PriceHistory.objects.values_list('product_id', 'old_price', 'new_price')),
+            {(self.product.id, Decimal('10.00'), Decimal('12.50')), (giraffe.id, Decimal('0.00'), Decimal('20.00'))},
+        )
+
+        response = self.upload('products', self.PRODUCTS_CSV)
+        self.assertEqual(response.data['unchanged'], 2)
+        self.assertEqual(PriceHistory.objects.count(), 2)
+
+    def test_invalid_rows_abort_the_whole_import(self):
+        response = self.upload('products', self.PRODUCTS_CSV + "ROBOT,Bear,HUGE,-1\n")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['errors'][0]['line'], 4)
+        self.assertEqual(len(response.data['errors'][0]['errors']), 3)
+        self.assertEqual(Product.objects.count(), 1)
+
+    def test_duplicate_keys_are_rejected(self):
+        response = self.upload('products', self.PRODUCTS_CSV + "SITTING_ANIMAL,Elephant,MEDIUM,14\n")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['errors'], [{'line': 4, 'errors': ['Duplicate of line 2; each row must have its own key.']}])
+        self.assertFalse(PriceHistory.objects.exists())
+
+    def test_non_utf8_file_is_rejected(self):
+        response = self.upload('products', self.PRODUCTS_CSV + "SITTING_ANIMAL,Chèvre,MEDIUM,5\n", encoding='latin-1')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['errors'][0]['line'], 4)
+        self.assertIn('UTF-8', response.data['errors'][0]['errors'][0])
+        self.assertEqual(Product.objects.count(), 1)
+
+    def test_import_rates_and_inventory(self):
+        response = self.upload('rates', (
+            "product_type,animal_type,size_category,service_category,rate_per_unit\n"
+            "SITTING_ANIMAL,Elephant,MEDIUM,CARVING,3.00\n"
+        ))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(float(ServiceRate.objects.get(product=self.product, service_category='CARVING').rate_per_unit), 3.00)
+
+        response = self.upload('inventory', (
+            "product_type,animal_type,size_category,service_category,quantity,average_cost\n"
+            "SITTING_ANIMAL,Elephant,MEDIUM,SANDING,8,4.00\n"
+            "SITTING_ANIMAL,Elephant,MEDIUM,FINISHED,5,9.00\n"
+        ))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Inventory.objects.get(product=self.product, service_category='SANDING').quantity, 8)
+        self.assertEqual(FinishedStock.objects.get(product=self.product).quantity, 5)
+
+        response = self.upload('rates', (
+            "product_type,animal_type,size_category,service_category,rate_per_unit\n"
+            "SITTING_ANIMAL,Zebra,MEDIUM,CARVING,3.00\n"
+        ))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('does not exist', response.data['errors'][0]['errors'][0])
+
+    def test_import_requires_admin(self):
+        self.client.force_authenticate(None)
+        response = self.upload('products', self.PRODUCTS_CSV)
+        self.assertIn(response.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
+
+
+class BulkRepriceTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        self.bowls = [
+            Product.objects.create(product_type='YOGA_BOWLS', animal_type=animal, size_category='SMALL', base_price=price)
+            for animal, price in (('Cat', '10.00'), ('Dog', '12.50'))
+        ]
+        self.elephant = Product.objects.create(
+            product_type='SITTING_ANIMAL', animal_type='Elephant', size_category='MEDIUM', base_price='20.00'
+        )
+        self.url = reverse('product-bulk-reprice')
+
+    def test_percentage_by_filter(self):
+        response = self.client.post(self.url, {
+            'filters': {'product_type': 'YOGA_BOWLS'}, 'percentage': '8', 'reason': 'Season',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['updated'], 2)
+        prices = dict(Product.objects.values_list('animal_type', 'base_price'))
+        self.assertEqual(prices, {'Cat': Decimal('10.80'), 'Dog': Decimal('13.50'), 'Elephant': Decimal('20.00')})
+        self.assertEqual(
+            set(PriceHistory.objects.values_list('old_price', 'new_price', 'reason', 'changed_by')),
+            {(Decimal('10.00'), Decimal('10.80'), 'Season', 'admin'), (Decimal('12.50'), Decimal('13.50'), 'Season', 'admin')},
+        )
+
+    def test_reprice_is_published_as_change_events(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.url, {'product_ids': [bowl.id for bowl in self.bowls], 'amount': '1'}, format='json')
+        self.assertEqual(
+            set(ChangeEvent.objects.filter(entity_type='product').values_list('object_id', flat=True)),
+            {bowl.id for bowl in self.bowls},
+        )
+
+    def test_explicit_items_skip_unchanged_prices(self):
+        response = self.client.post(self.url, {'items': [
+            {'product_id': self.elephant.id, 'new_price': '25.00'},
+            {'product_id': self.bowls[0].id, 'new_price': '10.00'},
+        ]}, format='json')
+        self.assertEqual((response.data['updated'], response.data['unchanged']), (1, 1))
+        self.assertEqual(PriceHistory.objects.count(), 1)
+
+        response = self.client.post(self.url, {'items': [{'product_id': 999, 'new_price': '1.00'}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_rejects_ambiguous_or_negative_requests(self):
+        response = self.client.post(self.url, {'product_ids': [self.elephant.id]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(self.url, {'product_ids': [self.elephant.id], 'amount': '-25'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(PriceHistory.objects.exists())
+
+    def test_future_revision_is_scheduled_then_applied(self):
+        effective = timezone.now() + timedelta(days=7)
+        response = self.client.post(self.url, {
+            'product_ids': [self.elephant.id], 'amount': '5', 'effective_date': effective.isoformat(),
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.elephant.refresh_from_db()
+        self.assertEqual(self.elephant.base_price, Decimal('20.00'))
+
+        self.assertEqual(apply_due_price_changes(), 0)
+        self.assertEqual(apply_due_price_changes(now=effective + timedelta(minutes=1)), 1)
+        self.elephant.refresh_from_db()
+        self.assertEqual(self.elephant.base_price, Decimal('25.00'))
+        self.assertTrue(ScheduledPriceChange.objects.get().applied_at)
+        self.assertEqual(apply_due_price_changes(now=effective + timedelta(minutes=1)), 0)
+
+    def test_scheduled_percentage_builds_on_later_manual_changes(self):
+        effective = timezone.now() + timedelta(days=7)
+        self.client.post(self.url, {
+            'product_ids': [self.elephant.id], 'percentage': '10', 'effective_date': effective.isoformat(),
+        }, format='json')
+        self.assertEqual(ScheduledPriceChange.objects.get().percentage, Decimal('10.00'))
+
+        # A manual change before the effective date is not overwritten
+        self.client.post(self.url, {'items': [{'product_id': self.elephant.id, 'new_price': '30.00'}]}, format='json')
+        apply_due_price_changes(now=effective + timedelta(minutes=1))
+        self.elephant.refresh_from_db()
+        self.assertEqual(self.elephant.base_price, Decimal('33.00'))
+
+
+class PriceAtTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('clerk', password='password'))
+        self.elephant = Product.objects.create(
+            product_type='SITTING_ANIMAL', animal_type='Elephant', size_category='MEDIUM', base_price='14.00'
+        )
+        self.giraffe = Product.objects.create(
+            product_type='SITTING_ANIMAL', animal_type='Giraffe', size_category='MEDIUM', base_price='9.00'
+        )
+        for old, new, day in (('10.00', '12.00', 1), ('12.00', '14.00', 20)):
+            entry = PriceHistory.objects.create(product=self.elephant, old_price=old, new_price=new, changed_by='admin')
+            # effective_date is auto_now_add, so backdate it afterwards
+            PriceHistory.objects.filter(pk=entry.pk).update(
+                effective_date=timezone.make_aware(datetime(2025, 3, day, 12, 0))
+            )
+
+    def test_price_at_date(self):
+        url = reverse('product-price-at', args=[self.elephant.id])
+        expected = {'2025-02-28': ('10.00', 'before_history'), '2025-03-01': ('12.00', 'history'),
+                    '2025-03-19': ('12.00', 'history'), '2025-06-01': ('14.00', 'history')}
+        for day, (price, source) in expected.items():
+            response = self.client.get(url, {'date': day})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual((response.data['price'], response.data['source']), (Decimal(price), source), day)
+
+        response = self.client.get(url, {'date': '2025-03-01T11:59:00Z'})
+        self.assertEqual(response.data['price'], Decimal('10.00'))
+        response = self.client.get(url, {'date': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse('product-price-at', args=[999]), {'date': '2025-03-01'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_batch_resolves_in_one_query(self):
+        items = [
+            {'product_id': self.elephant.id, 'date': '2025-03-05'},
+            {'product_id': self.giraffe.id, 'date': '2025-03-05'},
+            {'product_id': 999, 'date': '2025-03-05'},
+            {'product_id': self.elephant.id, 'date': '2025-01-01'},
+        ]
+        with self.assertNumQueries(1):
+            results = prices_at([(item['product_id'], as_of_moment(item['date'])) for item in items])
+        self.assertEqual(
+            [(result['price'], result['source']) for result in results],
+            [(Decimal('12.00'), 'history'), (Decimal('9.00'), 'current'), (None, None), (Decimal('10.00'), 'before_history')],
+        )
+
+        response = self.client.post(reverse('product-prices-at'), {'items': items}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['price'], Decimal('12.00'))
+        response = self.client.post(reverse('product-prices-at'), {'items': [{'product_id': 1, 'date': 'x'}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BatchFetchTest(TestCase):
+    def setUp(self):
+        from artisans.models import Artisan
+        from customers.models import Customer
+        from jobs.models import Job
+
+        self.client = APIClient()
+        self.products = [
+            Product.objects.create(product_type='SITTING_ANIMAL', animal_type=animal, size_category='MEDIUM', base_price=10)
+            for animal in ('Elephant', 'Giraffe', 'Lion')
+        ]
+        Product.objects.filter(pk=self.products[2].pk).update(is_active=False)
+        self.artisan = Artisan.objects.create(name='Amani')
+        self.customers = [Customer.objects.create(name=name, is_active=name != 'Baraka') for name in ('Wanjiru', 'Baraka')]
+        self.job = Job.objects.create(created_by='planner', service_category='CARVING')
+
+    def test_ids_keep_requested_order_and_report_missing(self):
+        ids = [self.products[2].id, self.products[0].id, 999, self.products[0].id]
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/products/', {'ids': ','.join(map(str, ids))})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([product['id'] for product in response.data['results']], [self.products[2].id, self.products[0].id])
+        self.assertEqual(response.data['missing'], [999])
+
+    def test_post_batch_on_each_endpoint(self):
+        cases = [
+            ('/api/products/_batch/', [self.products[1].id]),
+            ('/api/artisans/_batch/', [self.artisan.id]),
+            ('/api/customers/_batch/', [customer.id for customer in reversed(self.customers)]),
+            ('/api/jobs/_batch/', [self.job.job_id]),
+            ('/api/orders/_batch/', []),
+        ]
+        for url, ids in cases:
+            response = self.client.post(url, {'ids': ids + [999]}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+            self.assertEqual([row.get('id', row.get('job_id')) for row in response.data['results']], ids, url)
+            self.assertEqual(response.data['missing'], [999], url)
+
+    def test_ids_on_function_view_and_sparse_fields(self):
+        response = self.client.get('/api/customers/', {'ids': f'{self.customers[1].id},{self.customers[0].id}', 'fields': 'id,name'})
+        self.assertEqual(response.data['results'], [
+            {'id': self.customers[1].id, 'name': 'Baraka'}, {'id': self.customers[0].id, 'name': 'Wanjiru'},
+        ])
+
+    def test_invalid_ids(self):
+        self.assertEqual(self.client.get('/api/artisans/', {'ids': '1,x'}).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get('/api/jobs/', {'ids': ','.join(str(pk) for pk in range(1, 102))})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('_batch/', response.data['error'])
+        self.assertEqual(self.client.post('/api/orders/_batch/', {'ids': 'all'}, format='json').status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ProductViewSet, PriceHistoryViewSet, get_price  # <- import the view
+from .views import ProductViewSet, PriceHistoryViewSet, get_price, get_prices  # <- import the view
 
 router = DefaultRouter()
 router.register(r'', ProductViewSet, basename='product')
@@ -8,5 +8,6 @@ router.register(r'price-history', PriceHistoryViewSet, basename='pricehistory')
 
 urlpatterns = [
     path('get_price/', get_price, name='get_price'),  # <- add this line
+    path('get_prices/', get_prices, name='get_prices'),
     path('', include(router.urls)),
 ]
@@ -20,9 +20,17 @@ from .serializers import (
     ProductCreateUpdateSerializer,
     PriceHistoryListSerializer,
     PriceHistoryCreateUpdateSerializer,
-    ProductLiteSerializer # Used by PriceHistoryListSerializer
+    ProductLiteSerializer, # Used by PriceHistoryListSerializer
+    BulkRepriceSerializer,
+    PriceAtBatchSerializer,
 )
 from .filters import ProductFilter, PriceHistoryFilter # Import both filters
+from .importing import IMPORT_KINDS, run_import
+from .pricing import as_of_moment, prices_at, revised_price, apply_price_changes, schedule_price_changes
+from appback.conditional import ConditionalGetMixin, static_etag
+from appback.response_cache import CachedResponseMixin
+from appback.batch import BatchMixin
+from sync.filters import UpdatedSinceFilter
 
 
 class ProductPagination(PageNumberPagination):
@@ -38,7 +46,7 @@ class PriceHistoryPagination(PageNumberPagination):
     max_page_size = 100
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(ConditionalGetMixin, CachedResponseMixin, BatchMixin, viewsets.ModelViewSet):
     """
     ViewSet for Product CRUD operations with additional functionality.
 
@@ -53,12 +61,13 @@ class ProductViewSet(viewsets.ModelViewSet):
 
     queryset = Product.objects.all()
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter, UpdatedSinceFilter]
     filterset_class = ProductFilter
     search_fields = ['animal_type', 'product_type']
     ordering_fields = ['base_price', 'last_price_update', 'product_type', 'created_at']
     ordering = ['-last_price_update']
     pagination_class = ProductPagination
+    etag_version_labels = ('products.product',)
 
 
     def get_permissions(self):
@@ -67,7 +76,7 @@ class ProductViewSet(viewsets.ModelViewSet):
         GET operations are read-only for all.
         POST, PUT, PATCH, DELETE are restricted to IsAdminUser.
         """
-        if self.action in ['list', 'retrieve', 'get_product_price_history', 'product_metadata']:
+        if self.action in ['list', 'retrieve', 'batch', 'get_product_price_history', 'product_metadata', 'price_at', 'prices_at']:
             permission_classes = [IsAuthenticatedOrReadOnly]
         else: # create, update, partial_update, destroy
             permission_classes = [IsAuthenticated, IsAdminUser]
@@ -91,6 +100,10 @@ class ProductViewSet(viewsets.ModelViewSet):
 
         return queryset
 
+    def get_batch_queryset(self):
+        # Ids usually come from order lines and job items, which may point at inactive products
+        return Product.objects.all()
+
 
     @transaction.atomic
     def create(self, request, *args, **kwargs):
@@ -216,7 +229,36 @@ class ProductViewSet(viewsets.ModelViewSet):
         serializer = PriceHistoryListSerializer(queryset, many=True, context={'request': request})
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'], url_path='price-at')
+    def price_at(self, request, pk=None):
+        """
+        GET /api/products/{product_id}/price-at/?date=YYYY-MM-DD
+        The product's base price as it stood at the end of `date` (or at an ISO datetime).
+        Discontinued products are included, since historical costs may refer to them.
+        """
+        moment = as_of_moment(request.query_params.get('date', ''))
+        if moment is None:
+            return Response({'error': 'Invalid or missing date. Use YYYY-MM-DD or an ISO datetime.'}, status=status.HTTP_400_BAD_REQUEST)
+        result = prices_at([(int(pk) if str(pk).isdigit() else 0, moment)])[0]
+        if result['source'] is None:
+            return Response({'error': 'Product not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(result)
+
+    @action(detail=False, methods=['post'], url_path='price-at')
+    def prices_at(self, request):
+        """
+        POST /api/products/price-at/
+        Batch form of price-at, resolved in one query. Body:
+            {"items": [{"product_id": 1, "date": "2025-03-01"}, ...]}
+        Returns one result per item, in request order; unknown products have a null price.
+        """
+        serializer = PriceAtBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        pairs = [(item['product_id'], item['date']) for item in serializer.validated_data['items']]
+        return Response({'results': prices_at(pairs)})
+
     @action(detail=False, methods=['get'], url_path='metadata')
+    @static_etag
     def product_metadata(self, request):
         """
         GET /api/products/metadata/
@@ -235,8 +277,93 @@ class ProductViewSet(viewsets.ModelViewSet):
 
         return Response(data)
 
+    @action(detail=False, methods=['post'], url_path='import')
+    def bulk_import(self, request):
+        """
+        POST /api/products/import/
+        Multipart upload of a catalogue CSV: `file`, `kind` (products, rates or
+        inventory) and optional `dry_run`. See products/importing.py for the columns.
+        Returns 200 with the diff report, or 400 (nothing written) if any row is invalid.
+        """
+        upload = request.FILES.get('file')
+        kind = request.data.get('kind')
+        if upload is None:
+            return Response({'error': 'A CSV file is required in the "file" field.'}, status=status.HTTP_400_BAD_REQUEST)
+        if kind not in IMPORT_KINDS:
+            return Response({'error': f"kind must be one of: {', '.join(IMPORT_KINDS)}."}, status=status.HTTP_400_BAD_REQUEST)
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+
+        # Decoded line by line, so an encoding error is reported against the line it is on
+        lines = (line.decode('utf-8-sig') for line in upload)
+        report = run_import(kind, lines, dry_run=dry_run, changed_by=request.user.username)
+        return Response(
+            report.as_dict(),
+            status=status.HTTP_400_BAD_REQUEST if report.errors else status.HTTP_200_OK,
+        )
+
+    @action(detail=False, methods=['post'], url_path='bulk-reprice')
+    def bulk_reprice(self, request):
+        """
+        POST /api/products/bulk-reprice/
+        Revise many base prices at once, e.g.
+            {"filters": {"product_type": "YOGA_BOWLS"}, "percentage": "8", "reason": "Season 2027"}
+            {"items": [{"product_id": 1, "new_price": "12.00"}, ...]}
+        With a future `effective_date` the revision is scheduled instead of applied (202).
+        """
+        serializer = BulkRepriceSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        if 'items' in data:
+            requested = {item['product_id']: item['new_price'] for item in data['items']}
+            current = dict(Product.objects.filter(id__in=requested.keys()).values_list('id', 'base_price'))
+            missing = sorted(set(requested) - set(current))
+            if missing:
+                return Response({'error': f'Products not found: {missing}'}, status=status.HTTP_404_NOT_FOUND)
+            new_prices = requested
+            revisions = {product_id: {'new_price': price} for product_id, price in requested.items()}
+        else:
+            if 'product_ids' in data:
+                products = Product.objects.filter(id__in=data['product_ids'])
+            else:
+                product_filter = ProductFilter(data['filters'], queryset=Product.objects.filter(is_active=True))
+                if not product_filter.is_valid():
+                    return Response({'error': product_filter.errors}, status=status.HTTP_400_BAD_REQUEST)
+                products = product_filter.qs
+            current = dict(products.values_list('id', 'base_price'))
+            new_prices = {
+                product_id: revised_price(price, data.get('percentage'), data.get('amount'))
+                for product_id, price in current.items()
+            }
+            # Scheduled revisions keep the percentage or amount and are priced when applied
+            revision = {key: data[key] for key in ('percentage', 'amount') if data.get(key) is not None}
+            revisions = dict.fromkeys(current, revision)
+            negative = sorted(product_id for product_id, price in new_prices.items() if price < 0)
+            if negative:
+                return Response(
+                    {'error': f'The change would make these prices negative: {negative}'},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        changed_by = request.user.username
+        if data.get('effective_date'):
+            scheduled = schedule_price_changes(revisions, data['effective_date'], changed_by, data['reason'])
+            return Response(
+                {'status': 'scheduled', 'scheduled': scheduled, 'effective_date': data['effective_date']},
+                status=status.HTTP_202_ACCEPTED,
+            )
+
+        changed = apply_price_changes(new_prices, changed_by, data['reason'])
+        return Response({
+            'status': 'applied',
+            'matched': len(new_prices),
+            'updated': len(changed),
+            'unchanged': len(new_prices) - len(changed),
+            'changes': changed,
+        })
 
-class PriceHistoryViewSet(viewsets.ModelViewSet):
+
+class PriceHistoryViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing PriceHistory records.
     Provides read-only access for most users, with create/update/delete restricted to admins.
@@ -244,13 +371,14 @@ class PriceHistoryViewSet(viewsets.ModelViewSet):
     """
     queryset = PriceHistory.objects.all().select_related('product')
     pagination_class = PriceHistoryPagination
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter, UpdatedSinceFilter]
     filterset_class = PriceHistoryFilter
     search_fields = [
         'product__animal_type', 'product__product_type', 'reason', 'changed_by'
     ]
     ordering_fields = ['effective_date', 'new_price', 'old_price', 'product__product_type', 'product__animal_type']
     ordering = ['-effective_date'] # Default sorting
+    etag_version_labels = ('products.pricehistory', 'products.product')
 
     def get_permissions(self):
         """
@@ -366,6 +494,7 @@ class PriceHistoryViewSet(viewsets.ModelViewSet):
 
 
     @action(detail=False, methods=['get'])
+    @static_etag
     def metadata(self, request):
         """
         GET /api/price-history/metadata/
@@ -385,15 +514,18 @@ class PriceHistoryViewSet(viewsets.ModelViewSet):
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
-from .models import Product
-from jobs.models import ServiceRate # Import ServiceRate
-from django.core.exceptions import ObjectDoesNotExist # Import ObjectDoesNotExist
+from .catalog import catalog
+
+PRICE_LOOKUP_FIELDS = ['product_type', 'animal_type', 'size_category', 'service_category']
+MAX_BATCH_PRICE_LOOKUPS = 500
+
 
 @api_view(['GET'])
 def get_price(request):
     """
     GET /api/products/get_price/?product_type=...&animal_type=...&size_category=...&service_category=...
     Returns the base price for a matching product and its service rate for the given service category.
+    Served from the in-process product catalog (products/catalog.py).
     """
     product_type = request.GET.get("product_type")
     animal_type = request.GET.get("animal_type")
@@ -404,22 +536,39 @@ def get_price(request):
         return Response({"error": "Missing required parameters."},
                         status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        product = Product.objects.get(
-            product_type=product_type,
-            animal_type=animal_type,
-            size_category=size_category,
-            is_active=True
-        )
-        
-        service_rate_per_unit = None
-        try:
-            service_rate = ServiceRate.objects.get(product=product, service_category=service_category)
-            service_rate_per_unit = service_rate.rate_per_unit
-        except ObjectDoesNotExist:
-            # If no specific service rate is found, service_rate_per_unit remains None
-            pass
-
-        return Response({"id": product.id, "price": product.base_price, "service_rate_per_unit": service_rate_per_unit}, status=status.HTTP_200_OK)
-    except Product.DoesNotExist:
+    price = catalog.resolve_price(product_type, animal_type, size_category, service_category)
+    if price is None:
         return Response({"error": "Product not found"}, status=status.HTTP_404_NOT_FOUND)
+    return Response(price, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+def get_prices(request):
+    """
+    POST /api/products/get_prices/
+    Batch variant of get_price. Body:
+        {"items": [{"product_type": ..., "animal_type": ..., "size_category": ..., "service_category": ...}, ...]}
+    Returns one result per requested item, in request order. Items that cannot be
+    resolved carry an "error" key instead of a price.
+    """
+    items = request.data.get('items') if isinstance(request.data, dict) else None
+    if not isinstance(items, list) or not items:
+        return Response({"error": "'items' must be a non-empty list."}, status=status.HTTP_400_BAD_REQUEST)
+    if len(items) > MAX_BATCH_PRICE_LOOKUPS:
+        return Response(
+            {"error": f"Too many items. At most {MAX_BATCH_PRICE_LOOKUPS} lookups per request."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    results = []
+    for item in items:
+        if not isinstance(item, dict) or not all(item.get(field) for field in PRICE_LOOKUP_FIELDS):
+            results.append({"request": item, "error": "Missing required parameters."})
+            continue
+        price = catalog.resolve_price(*(item[field] for field in PRICE_LOOKUP_FIELDS))
+        if price is None:
+            results.append({"request": item, "error": "Product not found"})
+        else:
+            results.append({"request": item, **price})
+
+    return Response({"results": results}, status=status.HTTP_200_OK)
@@ -0,0 +1,195 @@
+# search/indexing.py
+import unicodedata
+
+from django.db import transaction
+from django.db.models import Case, When, Value, F, IntegerField
+
+from .models import SearchDocument
+
+
+def normalize(*parts):
+    """
+    Build the searchable text for a document or query: lower-case, accents stripped,
+    choice codes like 'SITTING_ANIMAL' split into words, whitespace collapsed.
+    """
+    text = ' '.join(str(part) for part in parts if part not in (None, ''))
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    text = text.replace('_', ' ').lower()
+    return ' '.join(text.split())
+
+
+# --- Document builders (one per entity type) ---
+
+def _product_document(product):
+    if not product.is_active:
+        return None
+    return {
+        'title': f"{product.get_product_type_display()} - {product.animal_type}",
+        'subtitle': product.get_size_category_display(),
+        'text': normalize(
+            product.product_type, product.get_product_type_display(),
+            product.animal_type, product.size_category
+        ),
+        'weight': 4,
+    }
+
+
+def _artisan_document(artisan):
+    if not artisan.is_active:
+        return None
+    return {
+        'title': artisan.name,
+        'subtitle': artisan.phone or '',
+        'text': normalize(artisan.name, artisan.phone),
+        'weight': 3,
+    }
+
+
+def _customer_document(customer):
+    if not customer.is_active:
+        return None
+    return {
+        'title': customer.name,
+        'subtitle': customer.email or '',
+        'text': normalize(customer.name, customer.email, customer.phone, customer.address),
+        'weight': 3,
+    }
+
+
+def _job_document(job):
+    return {
+        'title': f"Job #{job.job_id}",
+        'subtitle': f"{job.get_service_category_display()} - {job.get_status_display()}",
+        'text': normalize('job', job.job_id, job.created_by, job.service_category, job.status, job.notes),
+        'weight': 2,
+    }
+
+
+def _order_document(order):
+    customer = order.customer
+    return {
+        'title': f"Order #{order.order_id}",
+        'subtitle': f"{customer.name} - {order.get_status_display()}",
+        'text': normalize('order', order.order_id, customer.name, customer.email, order.status, order.notes),
+        'weight': 2,
+    }
+
+
+def _registry():
+    """
+    Map of entity_type -> (model, queryset used for rebuilds, document builder).
+    Resolved lazily so this module can be imported while apps are loading.
+    """
+    from products.models import Product
+    from artisans.models import Artisan
+    from customers.models import Customer
+    from jobs.models import Job
+    from orders.models import Order
+
+    return {
+        'product': (Product, Product.objects.filter(is_active=True), _product_document),
+        'artisan': (Artisan, Artisan.objects.filter(is_active=True), _artisan_document),
+        'customer': (Customer, Customer.objects.filter(is_active=True), _customer_document),
+        'job': (Job, Job.objects.all(), _job_document),
+        'order': (Order, Order.objects.select_related('customer'), _order_document),
+    }
+
+
+def entity_type_for(model):
+    """Return the entity_type registered for a model class, or None if it is not indexed."""
+    for entity_type, (registered_model, _, _) in _registry().items():
+        if registered_model is model:
+            return entity_type
+    return None
+
+
+# --- Index maintenance ---
+
+def index_instance(entity_type, instance):
+    """Create, refresh or drop the SearchDocument for a single instance."""
+    _, _, build = _registry()[entity_type]
+    fields = build(instance)
+    if fields is None:
+        remove_instance(entity_type, instance.pk)
+        return None
+    document, _ = SearchDocument.objects.update_or_create(
+        entity_type=entity_type, object_id=instance.pk, defaults=fields
+    )
+    return document
+
+
+def remove_instance(entity_type, object_id):
+    SearchDocument.objects.filter(entity_type=entity_type, object_id=object_id).delete()
+
+
+def index_queryset(entity_type, queryset, chunk_size=500):
+    """
+    Re-index every row of `queryset` with one delete and batched inserts.
+    Used after bulk `.update()` calls, which bypass post_save.
+    """
+    _, _, build = _registry()[entity_type]
+    with transaction.atomic():
+        SearchDocument.objects.filter(entity_type=entity_type, object_id__in=queryset.values('pk')).delete()
+        batch = []
+        indexed = 0
+        for instance in queryset.iterator(chunk_size=chunk_size):
+            fields = build(instance)
+            if fields is None:
+                continue
+            batch.append(SearchDocument(entity_type=entity_type, object_id=instance.pk, **fields))
+            if len(batch) >= chunk_size:
+                SearchDocument.objects.bulk_create(batch)
+                indexed += len(batch)
+                batch = []
+        if batch:
+            SearchDocument.objects.bulk_create(batch)
+            indexed += len(batch)
+    return indexed
+
+
+def rebuild_index(entity_types=None, chunk_size=500):
+    """
+    Drop and rebuild the documents for the given entity types (all by default).
+    Returns a dict of entity_type -> number of documents written.
+    """
+    registry = _registry()
+    counts = {}
+    for entity_type in entity_types or registry.keys():
+        _, queryset, _ = registry[entity_type]
+        with transaction.atomic():
+            SearchDocument.objects.filter(entity_type=entity_type).delete()
+            counts[entity_type] = index_queryset(entity_type, queryset, chunk_size=chunk_size)
+    return counts
+
+
+# --- Querying ---
+
+def search(query, entity_types=None, limit=20):
+    """
+    Return SearchDocuments matching every term of `query`, best matches first.
+    Rank is the entity weight scaled by how well the title matches the full query.
+    """
+    terms = normalize(query).split()
+    if not terms:
+        return SearchDocument.objects.none()
+
+    queryset = SearchDocument.objects.all()
+    if entity_types:
+        queryset = queryset.filter(entity_type__in=entity_types)
+    for term in terms:
+        queryset = queryset.filter(text__contains=term)
+
+    phrase = ' '.join(terms)
+    queryset = queryset.annotate(
+        match_score=Case(
+            When(title__iexact=phrase, then=Value(3)),
+            When(title__istartswith=phrase, then=Value(2)),
+            default=Value(1),
+            output_field=IntegerField(),
+        )
+    ).annotate(
+        rank=F('weight') * F('match_score')
+    ).order_by('-rank', 'title')
+
+    return queryset[:limit]
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from search.models import SearchDocument
+from search.indexing import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the SearchDocument index used by /api/search/.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--type', action='append', dest='entity_types',
+            choices=[choice[0] for choice in SearchDocument.ENTITY_TYPES],
+            help='Only rebuild this entity type (can be repeated). Defaults to all types.'
+        )
+        parser.add_argument('--chunk-size', type=int, default=500, help='Rows fetched and inserted per batch.')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be a positive integer.')
+
+        self.stdout.write(self.style.SUCCESS('Rebuilding search index...'))
+        counts = rebuild_index(options['entity_types'], chunk_size=options['chunk_size'])
+        for entity_type, count in counts.items():
+            self.stdout.write(self.style.SUCCESS(f'Indexed {count} {entity_type} documents'))
+        self.stdout.write(self.style.SUCCESS('Search index rebuild complete.'))
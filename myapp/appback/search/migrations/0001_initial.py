@@ -0,0 +1,50 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:37
+
+from django.db import migrations, models
+
+
+def create_trigram_index(apps, schema_editor):
+    # On PostgreSQL, back the `text__contains` lookups with a pg_trgm GIN index.
+    # Other backends fall back to the plain scan of the (small) index table.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS search_searchdocument_text_trgm '
+        'ON search_searchdocument USING gin (text gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS search_searchdocument_text_trgm')
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity_type', models.CharField(choices=[('product', 'Product'), ('artisan', 'Artisan'), ('customer', 'Customer'), ('job', 'Job'), ('order', 'Order')], max_length=20)),
+                ('object_id', models.PositiveIntegerField()),
+                ('title', models.CharField(max_length=255)),
+                ('subtitle', models.CharField(blank=True, default='', max_length=255)),
+                ('text', models.TextField(help_text='Lower-cased, accent-stripped text the search query is matched against.')),
+                ('weight', models.PositiveSmallIntegerField(default=1, help_text='Relative importance of this entity type in mixed results.')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['entity_type', '-weight'], name='search_sear_entity__3a5d42_idx')],
+                'unique_together': {('entity_type', 'object_id')},
+            },
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,34 @@
+# search/models.py
+from django.db import models
+
+
+class SearchDocument(models.Model):
+    """
+    Denormalized search index row for a single entity (product, artisan, customer, job or order).
+    Kept in sync by the handlers in search/signals.py and rebuildable with
+    `python manage.py rebuild_search_index`.
+    """
+    ENTITY_TYPES = [
+        ('product', 'Product'),
+        ('artisan', 'Artisan'),
+        ('customer', 'Customer'),
+        ('job', 'Job'),
+        ('order', 'Order'),
+    ]
+
+    entity_type = models.CharField(max_length=20, choices=ENTITY_TYPES)
+    object_id = models.PositiveIntegerField()
+    title = models.CharField(max_length=255)
+    subtitle = models.CharField(max_length=255, blank=True, default='')
+    text = models.TextField(help_text="Lower-cased, accent-stripped text the search query is matched against.")
+    weight = models.PositiveSmallIntegerField(default=1, help_text="Relative importance of this entity type in mixed results.")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('entity_type', 'object_id')
+        indexes = [
+            models.Index(fields=['entity_type', '-weight']),
+        ]
+
+    def __str__(self):
+        return f"{self.entity_type} #{self.object_id}: {self.title}"
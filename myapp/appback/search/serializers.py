@@ -0,0 +1,13 @@
+# search/serializers.py
+from rest_framework import serializers
+from .models import SearchDocument
+
+
+class SearchResultSerializer(serializers.ModelSerializer):
+    """Serializer for a single ranked search hit."""
+    id = serializers.IntegerField(source='object_id', read_only=True)
+    rank = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = SearchDocument
+        fields = ['entity_type', 'id', 'title', 'subtitle', 'rank']
@@ -0,0 +1,35 @@
+# search/signals.py
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from products.models import Product
+from artisans.models import Artisan
+from customers.models import Customer
+from jobs.models import Job
+from orders.models import Order
+
+from .indexing import index_instance, index_queryset, remove_instance, entity_type_for
+
+
+@receiver(post_save, sender=Product, dispatch_uid='search_index_product')
+@receiver(post_save, sender=Artisan, dispatch_uid='search_index_artisan')
+@receiver(post_save, sender=Customer, dispatch_uid='search_index_customer')
+@receiver(post_save, sender=Job, dispatch_uid='search_index_job')
+@receiver(post_save, sender=Order, dispatch_uid='search_index_order')
+def update_search_document(sender, instance, raw=False, **kwargs):
+    if raw:  # Skip fixture loading; rebuild_search_index covers it
+        return
+    index_instance(entity_type_for(sender), instance)
+
+    if sender is Customer:
+        # Order documents embed the customer's name and email
+        index_queryset('order', Order.objects.filter(customer=instance).select_related('customer'))
+
+
+@receiver(post_delete, sender=Product, dispatch_uid='search_unindex_product')
+@receiver(post_delete, sender=Artisan, dispatch_uid='search_unindex_artisan')
+@receiver(post_delete, sender=Customer, dispatch_uid='search_unindex_customer')
+@receiver(post_delete, sender=Job, dispatch_uid='search_unindex_job')
+@receiver(post_delete, sender=Order, dispatch_uid='search_unindex_order')
+def delete_search_document(sender, instance, **kwargs):
+    remove_instance(entity_type_for(sender), instance.pk)
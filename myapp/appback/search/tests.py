@@ -0,0 +1,69 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from artisans.models import Artisan
+from customers.models import Customer
+from orders.models import Order
+from products.models import Product
+from search.models import SearchDocument
+
+
+class SearchIndexTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.product = Product.objects.create(
+            product_type='SITTING_ANIMAL',
+            animal_type='Elephant',
+            size_category='MEDIUM',
+            base_price=10.00,
+        )
+        self.artisan = Artisan.objects.create(name='Elephant Carvers Co')
+        self.customer = Customer.objects.create(name='Jane Doe', email='jane@example.com')
+
+    def test_documents_follow_saves_and_deletes(self):
+        self.assertTrue(SearchDocument.objects.filter(entity_type='product', object_id=self.product.id).exists())
+
+        self.artisan.is_active = False
+        self.artisan.save()
+        self.assertFalse(SearchDocument.objects.filter(entity_type='artisan', object_id=self.artisan.id).exists())
+
+        customer_id = self.customer.id
+        self.customer.delete()
+        self.assertFalse(SearchDocument.objects.filter(entity_type='customer', object_id=customer_id).exists())
+
+    def test_order_document_tracks_customer_rename(self):
+        order = Order.objects.create(customer=self.customer)
+        self.customer.name = 'Janet Doe'
+        self.customer.save()
+        document = SearchDocument.objects.get(entity_type='order', object_id=order.order_id)
+        self.assertIn('janet', document.text)
+
+    def test_search_returns_mixed_ranked_results(self):
+        response = self.client.get(reverse('global-search'), {'q': 'elephant'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual({r['entity_type'] for r in results}, {'product', 'artisan'})
+        # The artisan's name starts with the query, which outranks the product's heavier weight
+        self.assertEqual(results[0]['entity_type'], 'artisan')
+        self.assertGreater(results[0]['rank'], results[1]['rank'])
+
+    def test_search_filters_by_type_and_requires_query(self):
+        response = self.client.get(reverse('global-search'), {'q': 'elephant', 'types': 'artisan'})
+        self.assertEqual([r['id'] for r in response.data['results']], [self.artisan.id])
+
+        response = self.client.get(reverse('global-search'))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        for limit in ('-5', '0', 'ten'):
+            response = self.client.get(reverse('global-search'), {'q': 'elephant', 'limit': limit})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rebuild_command(self):
+        SearchDocument.objects.all().delete()
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(SearchDocument.objects.count(), 3)
@@ -0,0 +1,49 @@
+# search/views.py
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.response import Response
+
+from .indexing import search
+from .models import SearchDocument
+from .serializers import SearchResultSerializer
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticatedOrReadOnly])
+def global_search(request):
+    """
+    GET /api/search/?q=...&types=product,customer&limit=20
+
+    Search products, artisans, customers, jobs and orders in one query against the
+    SearchDocument index. Results are mixed across entity types and ranked.
+    """
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response({'error': "Query parameter 'q' is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+    entity_types = None
+    types_param = request.query_params.get('types')
+    if types_param:
+        entity_types = [t.strip() for t in types_param.split(',') if t.strip()]
+        valid_types = {choice[0] for choice in SearchDocument.ENTITY_TYPES}
+        invalid = [t for t in entity_types if t not in valid_types]
+        if invalid:
+            return Response(
+                {'error': f"Invalid types: {', '.join(invalid)}. Use any of: {', '.join(sorted(valid_types))}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+    try:
+        limit = int(request.query_params.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        return Response({'error': "Invalid limit. Must be a positive integer."}, status=status.HTTP_400_BAD_REQUEST)
+    limit = min(limit, MAX_LIMIT)
+
+    results = SearchResultSerializer(search(query, entity_types=entity_types, limit=limit), many=True).data
+    return Response({'query': query, 'count': len(results), 'results': results})
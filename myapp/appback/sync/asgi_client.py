@@ -0,0 +1,90 @@
+# sync/asgi_client.py
+"""
+In-process client for the /api/events/ stream, used by the tests and by the
+loadtest_events command. It drives the ASGI application directly, with no
+server or socket involved, and reads the response body as it streams.
+
+    async with EventStreamClient(ASGIHandler(), '/api/events/', last_event_id=10) as stream:
+        event = await stream.next_event()
+"""
+import asyncio
+import json
+from urllib.parse import urlencode
+
+
+class EventStreamClient:
+    def __init__(self, application, path, params=None, last_event_id=None, timeout=5):
+        headers = [(b'host', b'localhost'), (b'accept', b'text/event-stream')]
+        if last_event_id is not None:
+            headers.append((b'last-event-id', str(last_event_id).encode()))
+        self.application = application
+        self.timeout = timeout
+        self.scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': urlencode(params or {}).encode(),
+            'root_path': '',
+            'headers': headers,
+            'client': ('127.0.0.1', 0),
+            'server': ('localhost', 80),
+        }
+        self.status = None
+        self.headers = {}
+        self.body = b''
+        self._messages = asyncio.Queue()
+        self._request_sent = False
+        self._disconnected = asyncio.Event()
+        self._task = None
+
+    async def _receive(self):
+        if not self._request_sent:
+            self._request_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await self._disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def __aenter__(self):
+        self._task = asyncio.ensure_future(self.application(self.scope, self._receive, self._messages.put))
+        start = await asyncio.wait_for(self._messages.get(), self.timeout)
+        self.status = start['status']
+        self.headers = {name.decode().lower(): value.decode() for name, value in start['headers']}
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._disconnected.set()
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+    async def read_body(self):
+        """The whole body of a response that is not a stream (e.g. an error)."""
+        while True:
+            message = await asyncio.wait_for(self._messages.get(), self.timeout)
+            self.body += message.get('body', b'')
+            if not message.get('more_body'):
+                return self.body
+
+    async def next_frame(self):
+        """The next SSE frame as {field: value}; comments come back as {'comment': text}."""
+        while b'\n\n' not in self.body:
+            message = await asyncio.wait_for(self._messages.get(), self.timeout)
+            if not message.get('more_body', False) and not message.get('body'):
+                raise EOFError('The event stream ended.')
+            self.body += message.get('body', b'')
+        frame, self.body = self.body.split(b'\n\n', 1)
+        fields = {}
+        for line in frame.decode().splitlines():
+            name, _, value = line.partition(':')
+            fields[name or 'comment'] = value[1:] if value.startswith(' ') else value
+        return fields
+
+    async def next_event(self):
+        """The next change event's data, skipping retry hints and keepalives."""
+        while True:
+            frame = await self.next_frame()
+            if 'data' in frame:
+                return json.loads(frame['data'])
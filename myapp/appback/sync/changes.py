@@ -0,0 +1,30 @@
+# sync/changes.py
+"""
+Writes ChangeEvent rows once the changing transaction commits.
+
+Model signals (sync/signals.py) call `record_change` per row. Code that changes
+rows with queryset `.update()` or `bulk_create` must call `record_changes`
+itself, next to its `bump_version()` call; pass the ids when they are at hand,
+or none to log a single "reload this entity" event.
+"""
+from django.db import transaction
+
+from .models import ChangeEvent
+
+
+def _write(events):
+    ChangeEvent.objects.bulk_create(events)
+
+
+def record_changes(entity_type, ids=None, operation='update'):
+    if ids is None:
+        events = [ChangeEvent(entity_type=entity_type, operation=operation)]
+    else:
+        events = [ChangeEvent(entity_type=entity_type, object_id=pk, operation=operation) for pk in ids]
+    if events:
+        # Outside an atomic block on_commit runs the write immediately
+        transaction.on_commit(lambda: _write(events))
+
+
+def record_change(entity_type, object_id, operation):
+    record_changes(entity_type, [object_id], operation)
@@ -0,0 +1,170 @@
+# sync/feed.py
+"""
+Fan-out of the change log (ChangeEvent) to /api/events/ streams.
+
+While at least one stream is open, each event loop runs a single poller that
+reads new ChangeEvent rows every EVENTS_POLL_INTERVAL seconds and keeps the most
+recent ones in memory. Idle streams just wait to be woken, so hundreds of them
+cost one query per interval in total, not one each. A stream resuming from an
+id older than the buffer first catches up from the database.
+
+Sequence numbers are taken when a row is inserted, so two concurrent writes can
+commit out of order. Rows are only read once they are EVENTS_SETTLE_SECONDS old,
+which gives the lower number time to become visible before the poller moves past it.
+"""
+import asyncio
+import logging
+import weakref
+from bisect import bisect_right
+from contextlib import asynccontextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from appback.concurrency import run_in_worker
+from appback.renderers import render_json
+
+from .models import ChangeEvent
+
+logger = logging.getLogger(__name__)
+
+BUFFER_SIZE = 1000
+DEFAULT_POLL_INTERVAL = 1.0
+DEFAULT_SETTLE_SECONDS = 0.5
+DEFAULT_STREAM_SECONDS = 300
+HEARTBEAT_SECONDS = 15
+RETRY_MILLISECONDS = 2000
+
+_feeds = weakref.WeakKeyDictionary()  # One feed per event loop
+
+
+def _settled_before():
+    return timezone.now() - timedelta(seconds=getattr(settings, 'EVENTS_SETTLE_SECONDS', DEFAULT_SETTLE_SECONDS))
+
+
+def latest_event_id():
+    return ChangeEvent.objects.filter(created_at__lte=_settled_before()).order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def events_after(last_id, limit=BUFFER_SIZE):
+    """Up to `limit` settled events after `last_id`, oldest first, as payload dicts."""
+    events = ChangeEvent.objects.filter(id__gt=last_id, created_at__lte=_settled_before()).order_by('id')[:limit]
+    return [event.as_payload() for event in events]
+
+
+async def _query(function, *args):
+    return await run_in_worker(lambda: function(*args))
+
+
+def format_event(event):
+    """One server-sent event frame; the sequence number is the SSE id."""
+    return f"id: {event['id']}\nevent: change\ndata: {render_json(event).decode()}\n\n"
+
+
+class ChangeFeed:
+    def __init__(self):
+        self.polls = 0
+        self._listeners = 0
+        self._poller = None
+        self._reset(None)
+
+    def _reset(self, last_id):
+        self.last_id = last_id  # Newest event seen by the poller
+        self._floor = last_id  # Every event after this id is buffered
+        self._ids = []
+        self._events = []
+        self.changed = asyncio.Event()
+
+    def events_after(self, last_id):
+        """Buffered events after `last_id`, or None if the buffer does not reach back that far."""
+        if last_id < self._floor:
+            return None
+        return self._events[bisect_right(self._ids, last_id):]
+
+    def _append(self, events):
+        self._ids.extend(event['id'] for event in events)
+        self._events.extend(events)
+        if len(self._events) > 2 * BUFFER_SIZE:
+            drop = len(self._events) - BUFFER_SIZE
+            self._floor = self._ids[drop - 1]
+            del self._ids[:drop], self._events[:drop]
+        self.last_id = self._ids[-1]
+        # Wake every waiting stream; later waiters get the fresh Event
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+    async def _poll(self):
+        interval = getattr(settings, 'EVENTS_POLL_INTERVAL', DEFAULT_POLL_INTERVAL)
+        while self._listeners:
+            try:
+                self.polls += 1
+                events = await _query(events_after, self.last_id)
+            except Exception:
+                logger.exception("Polling the change log failed")
+                events = []
+            if events:
+                self._append(events)
+            if len(events) < BUFFER_SIZE:
+                await asyncio.sleep(interval)
+        # Nobody is listening; start from the newest event again next time
+        self._poller = None
+        self._reset(None)
+
+    @asynccontextmanager
+    async def listen(self):
+        self._listeners += 1
+        try:
+            if self.last_id is None:
+                latest = await _query(latest_event_id)
+                if self.last_id is None:  # Another stream may have started the feed meanwhile
+                    self._reset(latest)
+            if self._poller is None:
+                self._poller = asyncio.ensure_future(self._poll())
+            yield self
+        finally:
+            self._listeners -= 1
+
+
+def get_feed():
+    loop = asyncio.get_running_loop()
+    if loop not in _feeds:
+        _feeds[loop] = ChangeFeed()
+    return _feeds[loop]
+
+
+async def event_stream(last_id=None, entities=()):
+    """
+    Server-sent event frames for changes after `last_id` (or from now), limited
+    to `entities` if given. Ends after EVENTS_STREAM_SECONDS; the browser's
+    EventSource then reconnects with Last-Event-ID. Django 4.2 does not notice
+    a client going away mid-stream, so this bounds how long a dead one is kept.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + getattr(settings, 'EVENTS_STREAM_SECONDS', DEFAULT_STREAM_SECONDS)
+    feed = get_feed()
+    async with feed.listen():
+        if last_id is None:
+            last_id = feed.last_id
+        yield f"retry: {RETRY_MILLISECONDS}\n\n"
+        while True:
+            changed = feed.changed  # Taken before reading, so a change in between still wakes us
+            events = feed.events_after(last_id)
+            caught_up = events is not None
+            if not caught_up:
+                events = await _query(events_after, last_id)
+                caught_up = len(events) < BUFFER_SIZE
+            for event in events:
+                last_id = event['id']
+                if not entities or event['entity'] in entities:
+                    yield format_event(event)
+            if not caught_up:
+                continue
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=min(HEARTBEAT_SECONDS, remaining))
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
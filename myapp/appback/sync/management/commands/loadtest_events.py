@@ -0,0 +1,82 @@
+import asyncio
+import statistics
+import time
+import tracemalloc
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management.base import BaseCommand, CommandError
+
+from sync.asgi_client import EventStreamClient
+from sync.feed import get_feed
+from sync.models import ChangeEvent
+
+
+class Command(BaseCommand):
+    help = (
+        'Opens many idle /api/events/ streams in-process, then times how long each change takes to reach all of them. '
+        'Writes (and afterwards deletes) synthetic "product" change-log rows.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connections', type=int, default=300, help='Concurrent idle streams.')
+        parser.add_argument('--changes', type=int, default=10, help='Changes to broadcast once the streams are idle.')
+        parser.add_argument('--idle-seconds', type=float, default=5.0, help='How long the streams sit idle first.')
+
+    def handle(self, *args, **options):
+        if options['connections'] < 1 or options['changes'] < 1 or options['idle_seconds'] < 0:
+            raise CommandError('--connections and --changes must be positive, --idle-seconds not negative.')
+        self.stdout.write(
+            f"Poll interval {settings.EVENTS_POLL_INTERVAL}s; opening {options['connections']} streams in-process."
+        )
+        asyncio.run(self._run(options['connections'], options['changes'], options['idle_seconds']))
+
+    async def _run(self, connections, changes, idle_seconds):
+        application = ASGIHandler()
+        streams = [EventStreamClient(application, '/api/events/', timeout=30) for _ in range(connections)]
+        written = []
+        tracemalloc.start()
+        try:
+            started = time.perf_counter()
+            await asyncio.gather(*(stream.__aenter__() for stream in streams))
+            await asyncio.gather(*(stream.next_frame() for stream in streams))  # The retry hint
+            opened = time.perf_counter() - started
+            memory, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            if any(stream.status != 200 for stream in streams):
+                raise CommandError('Some streams were refused; is the ASGI handler reachable?')
+            self.stdout.write(
+                f"Opened {connections} streams in {opened:.2f}s, about {memory / connections / 1024:.1f} KiB each."
+            )
+
+            feed = get_feed()
+            polls = feed.polls
+            await asyncio.sleep(idle_seconds)
+            self.stdout.write(
+                f"Idle for {idle_seconds:.1f}s: {feed.polls - polls} change-log queries in total, "
+                f"independent of the number of streams."
+            )
+
+            latencies = []
+            for _ in range(changes):
+                event = await sync_to_async(ChangeEvent.objects.create)(entity_type='product', operation='update')
+                written.append(event.id)
+                committed = time.perf_counter()
+                latencies.extend(await asyncio.gather(*(self._latency(stream, event.id, committed) for stream in streams)))
+        finally:
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+            await asyncio.gather(*(stream.__aexit__(None, None, None) for stream in streams if stream._task))
+            await sync_to_async(ChangeEvent.objects.filter(id__in=written).delete)()
+
+        latencies.sort()
+        self.stdout.write(self.style.SUCCESS(
+            f"{connections} streams received {changes} changes: latency p50 {statistics.median(latencies) * 1000:.0f} ms, "
+            f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.0f} ms, max {latencies[-1] * 1000:.0f} ms."
+        ))
+
+    async def _latency(self, stream, event_id, committed):
+        while (await stream.next_event())['id'] < event_id:
+            pass
+        return time.perf_counter() - committed
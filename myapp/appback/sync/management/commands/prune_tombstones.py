@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from sync.models import ChangeEvent, Tombstone
+
+
+class Command(BaseCommand):
+    help = (
+        'Deletes tombstones older than --days and change-log events older than --event-days. '
+        'Clients that last synced before the cutoff must do a full reload.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=90, help='Keep tombstones from the last N days.')
+        parser.add_argument('--event-days', type=int, default=7, help='Keep /api/events/ change-log rows from the last N days.')
+
+    def handle(self, *args, **options):
+        if options['days'] < 1 or options['event_days'] < 1:
+            raise CommandError('--days and --event-days must be positive integers.')
+        now = timezone.now()
+        for model, days in ((Tombstone, options['days']), (ChangeEvent, options['event_days'])):
+            cutoff = now - timedelta(days=days)
+            field = 'deleted_at' if model is Tombstone else 'created_at'
+            deleted, _ = model.objects.filter(**{f'{field}__lt': cutoff}).delete()
+            self.stdout.write(self.style.SUCCESS(
+                f"Deleted {deleted} {model._meta.verbose_name_plural} older than {cutoff:%Y-%m-%d %H:%M}."
+            ))
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity_type', models.CharField(choices=[('product', 'Product'), ('artisan', 'Artisan'), ('customer', 'Customer'), ('job', 'Job'), ('job_item', 'Job Item'), ('order', 'Order')], max_length=20)),
+                ('object_id', models.PositiveIntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'ordering': ['deleted_at', 'id'],
+                'indexes': [models.Index(fields=['entity_type', 'deleted_at'], name='sync_tombst_entity__ab89b8_idx')],
+            },
+        ),
+    ]
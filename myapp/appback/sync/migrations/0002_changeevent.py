@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('entity_type', models.CharField(choices=[('product', 'Product'), ('artisan', 'Artisan'), ('customer', 'Customer'), ('job', 'Job'), ('job_item', 'Job Item'), ('order', 'Order'), ('inventory', 'Inventory'), ('finished_stock', 'Finished Stock')], max_length=20)),
+                ('object_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('operation', models.CharField(choices=[('create', 'Create'), ('update', 'Update'), ('delete', 'Delete')], max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,69 @@
+# sync/models.py
+from django.db import models
+
+
+class Tombstone(models.Model):
+    """
+    Record of a deleted row, so clients syncing with ?updated_since= can drop it too.
+    Written by the post_delete handlers in sync/signals.py, in the deleting transaction.
+    Old rows are removed with `python manage.py prune_tombstones`.
+    """
+    ENTITY_TYPES = [
+        ('product', 'Product'),
+        ('artisan', 'Artisan'),
+        ('customer', 'Customer'),
+        ('job', 'Job'),
+        ('job_item', 'Job Item'),
+        ('order', 'Order'),
+    ]
+
+    entity_type = models.CharField(max_length=20, choices=ENTITY_TYPES)
+    object_id = models.PositiveIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['deleted_at', 'id']
+        indexes = [
+            models.Index(fields=['entity_type', 'deleted_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.entity_type} #{self.object_id} deleted {self.deleted_at:%Y-%m-%d %H:%M}"
+
+
+class ChangeEvent(models.Model):
+    """
+    Change log behind the /api/events/ stream. The primary key is the sequence
+    number clients resume from (Last-Event-ID). Rows are written after the
+    changing transaction commits (sync/changes.py), so a listener never sees a
+    change that was rolled back. Bulk updates that do not enumerate their rows
+    log one event with a null object_id, meaning "reload this entity".
+    Old rows are removed with `python manage.py prune_tombstones`.
+    """
+    OPERATIONS = [
+        ('create', 'Create'),
+        ('update', 'Update'),
+        ('delete', 'Delete'),
+    ]
+    ENTITY_TYPES = Tombstone.ENTITY_TYPES + [
+        ('inventory', 'Inventory'),
+        ('finished_stock', 'Finished Stock'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)  # The sequence number
+    entity_type = models.CharField(max_length=20, choices=ENTITY_TYPES)
+    object_id = models.PositiveIntegerField(null=True, blank=True)
+    operation = models.CharField(max_length=10, choices=OPERATIONS)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"#{self.id} {self.operation} {self.entity_type} #{self.object_id}"
+
+    def as_payload(self):
+        return {
+            'id': self.id,
+            'entity': self.entity_type,
+            'object_id': self.object_id,
+            'operation': self.operation,
+            'at': self.created_at,
+        }
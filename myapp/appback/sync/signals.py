@@ -0,0 +1,50 @@
+# sync/signals.py
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from products.models import Product
+from artisans.models import Artisan
+from customers.models import Customer
+from jobs.models import Job, JobItem
+from orders.models import Order
+from inventory.models import Inventory, FinishedStock
+
+from .changes import record_change
+from .models import Tombstone
+
+ENTITY_TYPES = {
+    Product: 'product',
+    Artisan: 'artisan',
+    Customer: 'customer',
+    Job: 'job',
+    JobItem: 'job_item',
+    Order: 'order',
+    Inventory: 'inventory',
+    FinishedStock: 'finished_stock',
+}
+
+
+@receiver(post_delete, sender=Product, dispatch_uid='tombstone_product')
+@receiver(post_delete, sender=Artisan, dispatch_uid='tombstone_artisan')
+@receiver(post_delete, sender=Customer, dispatch_uid='tombstone_customer')
+@receiver(post_delete, sender=Job, dispatch_uid='tombstone_job')
+@receiver(post_delete, sender=JobItem, dispatch_uid='tombstone_job_item')
+@receiver(post_delete, sender=Order, dispatch_uid='tombstone_order')
+def record_tombstone(sender, instance, **kwargs):
+    # Queryset deletes and cascades send post_delete per row too, so this covers them
+    Tombstone.objects.create(entity_type=ENTITY_TYPES[sender], object_id=instance.pk)
+
+
+def log_save(sender, instance, created, raw=False, **kwargs):
+    if raw:  # Skip fixture loading
+        return
+    record_change(ENTITY_TYPES[sender], instance.pk, 'create' if created else 'update')
+
+
+def log_delete(sender, instance, **kwargs):
+    record_change(ENTITY_TYPES[sender], instance.pk, 'delete')
+
+
+for model, entity_type in ENTITY_TYPES.items():
+    post_save.connect(log_save, sender=model, dispatch_uid=f'change_log_save_{entity_type}')
+    post_delete.connect(log_delete, sender=model, dispatch_uid=f'change_log_delete_{entity_type}')
@@ -0,0 +1,196 @@
+import asyncio
+from datetime import timedelta
+from io import StringIO
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from artisans.models import Artisan
+from customers.models import Customer
+from jobs.models import Job, JobItem
+from products.models import Product
+from sync.changes import record_changes
+from sync.models import ChangeEvent, Tombstone
+
+
+class UpdatedSinceTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.cutoff = timezone.now()
+        self.old_job = Job.objects.create(created_by='planner', service_category='CARVING')
+        self.new_job = Job.objects.create(created_by='planner', service_category='CARVING')
+        Job.objects.filter(pk=self.old_job.pk).update(updated_at=self.cutoff - timedelta(hours=1))
+
+    def test_list_returns_only_rows_changed_since(self):
+        response = self.client.get('/api/jobs/', {'updated_since': self.cutoff.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([job['job_id'] for job in response.json()['results']], [self.new_job.job_id])
+
+    def test_save_moves_row_into_the_window(self):
+        self.old_job.notes = 'rush'
+        self.old_job.save()
+        response = self.client.get('/api/jobs/', {'updated_since': self.cutoff.isoformat()})
+        self.assertEqual(len(response.json()['results']), 2)
+
+    def test_invalid_or_unsupported_timestamp_is_rejected(self):
+        response = self.client.get('/api/jobs/', {'updated_since': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('ISO 8601', response.json()['error'])
+        response = self.client.get('/api/service-rates/', {'updated_since': self.cutoff.isoformat()})
+        self.assertEqual(response.status_code, 400)
+
+    def test_customer_list_and_bulk_update(self):
+        customer = Customer.objects.create(name='Wanjiru')
+        Customer.objects.filter(pk=customer.pk).update(updated_at=self.cutoff - timedelta(hours=1))
+        params = {'updated_since': self.cutoff.isoformat(), 'is_active': 'all'}
+        self.assertEqual(self.client.get('/api/customers/', params).json()['results'], [])
+
+        # .update() skips auto_now, so the bulk endpoint stamps updated_at itself
+        self.client.force_authenticate(User.objects.create_user('clerk'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/customers/bulk-update/', {'customer_ids': [customer.id], 'action': 'deactivate'}, format='json')
+        results = self.client.get('/api/customers/', params).json()['results']
+        self.assertEqual([(row['id'], row['is_active']) for row in results], [(customer.id, False)])
+
+
+class TombstoneTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.since = timezone.now()
+        product = Product.objects.create(
+            product_type='SITTING_ANIMAL', animal_type='Elephant', size_category='MEDIUM', base_price=10
+        )
+        self.job = Job.objects.create(created_by='planner', service_category='CARVING')
+        self.item = JobItem.objects.create(
+            job=self.job, artisan=Artisan.objects.create(name='Amani'), product=product, quantity_ordered=5
+        )
+
+    def test_delete_records_tombstones_for_cascades(self):
+        job_id, item_id = self.job.job_id, self.item.id
+        self.job.delete()
+        response = self.client.get('/api/sync/deleted/', {'since': self.since.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        deleted = {(row['entity'], row['id']) for row in response.json()['deleted']}
+        self.assertEqual(deleted, {('job', job_id), ('job_item', item_id)})
+
+        response = self.client.get('/api/sync/deleted/', {'since': self.since.isoformat(), 'entity': 'job'})
+        self.assertEqual([row['id'] for row in response.json()['deleted']], [job_id])
+
+    def test_deleted_endpoint_validates_parameters(self):
+        self.assertEqual(self.client.get('/api/sync/deleted/').status_code, 400)
+        response = self.client.get('/api/sync/deleted/', {'since': self.since.isoformat(), 'entity': 'widget'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_server_time_is_the_next_cursor(self):
+        from django.utils.dateparse import parse_datetime
+
+        response = self.client.get('/api/sync/deleted/', {'since': self.since.isoformat()})
+        cursor = response.json()['server_time']
+        # Lags the clock, so rows saved just before it but committed after are not skipped
+        self.assertLessEqual(parse_datetime(cursor), timezone.now() - timedelta(seconds=settings.SYNC_SAFETY_SECONDS))
+        self.item.delete()
+        response = self.client.get('/api/sync/deleted/', {'since': cursor})
+        self.assertEqual([row['entity'] for row in response.json()['deleted']], ['job_item'])
+
+    def test_prune_tombstones(self):
+        self.job.delete()
+        Tombstone.objects.filter(entity_type='job').update(deleted_at=timezone.now() - timedelta(days=120))
+        out = StringIO()
+        call_command('prune_tombstones', '--days', '90', stdout=out)
+        self.assertIn('Deleted 1 tombstones', out.getvalue())
+        self.assertIn('change events', out.getvalue())
+        self.assertEqual(list(Tombstone.objects.values_list('entity_type', flat=True)), ['job_item'])
+
+
+@override_settings(EVENTS_POLL_INTERVAL=0.05, EVENTS_SETTLE_SECONDS=0)
+class ChangeEventStreamTest(TransactionTestCase):
+    """/api/events/ driven in-process through the ASGI handler."""
+
+    def stream(self, **kwargs):
+        from django.core.handlers.asgi import ASGIHandler
+        from sync.asgi_client import EventStreamClient
+        return EventStreamClient(ASGIHandler(), '/api/events/', **kwargs)
+
+    def test_committed_changes_are_streamed(self):
+        async def scenario():
+            async with self.stream() as stream:
+                self.assertEqual(stream.status, 200)
+                self.assertEqual(stream.headers['content-type'], 'text/event-stream')
+                self.assertIn('retry', await stream.next_frame())
+                customer = await sync_to_async(Customer.objects.create)(name='Wanjiru')
+                pk, created = customer.pk, await stream.next_event()
+                customer.name = 'Wanjiru K.'
+                await sync_to_async(customer.save)()
+                await sync_to_async(customer.delete)()
+                updated, deleted = await stream.next_event(), await stream.next_event()
+            return pk, created, updated, deleted
+
+        pk, created, updated, deleted = async_to_sync(scenario)()
+        self.assertEqual((created['entity'], created['object_id'], created['operation']), ('customer', pk, 'create'))
+        self.assertEqual([updated['operation'], deleted['operation']], ['update', 'delete'])
+        self.assertLess(created['id'], updated['id'])
+
+    def test_rolled_back_changes_are_not_logged(self):
+        from django.db import transaction
+
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Customer.objects.create(name='Ghost')
+            raise RuntimeError()
+        self.assertFalse(ChangeEvent.objects.exists())
+
+    def test_resume_after_last_event_id_with_entity_filter(self):
+        artisan = Artisan.objects.create(name='Amani')
+        customer = Customer.objects.create(name='Wanjiru')
+        first = ChangeEvent.objects.get(entity_type='artisan').id
+        Artisan.objects.filter(pk=artisan.pk).update(name='Amani M.')
+        record_changes('artisan', [artisan.pk])
+
+        async def scenario():
+            async with self.stream(last_event_id=first, params={'entity': 'customer,artisan'}) as stream:
+                return [await stream.next_event(), await stream.next_event()]
+
+        events = async_to_sync(scenario)()
+        self.assertEqual([(event['entity'], event['object_id']) for event in events],
+                         [('customer', customer.pk), ('artisan', artisan.pk)])
+
+    def test_invalid_requests(self):
+        async def scenario():
+            async with self.stream(last_event_id='abc') as stream:
+                bad_id = stream.status
+            async with self.stream(params={'entity': 'widget'}) as stream:
+                bad_entity = stream.status
+            return bad_id, bad_entity
+
+        self.assertEqual(async_to_sync(scenario)(), (400, 400))
+        # Under WSGI a stream would pin a worker thread
+        self.assertEqual(self.client.get('/api/events/').status_code, 503)
+
+    def test_idle_streams_share_one_poller(self):
+        from sync.feed import get_feed
+
+        async def scenario():
+            streams = [self.stream() for _ in range(50)]
+            for stream in streams:
+                await stream.__aenter__()
+            await asyncio.sleep(0.3)
+            polls = get_feed().polls
+            await sync_to_async(Customer.objects.create)(name='Wanjiru')
+            events = await asyncio.gather(*(stream.next_event() for stream in streams))
+            for stream in streams:
+                await stream.__aexit__(None, None, None)
+            return polls, events
+
+        polls, events = async_to_sync(scenario)()
+        self.assertLess(polls, 20)  # About one per 50 ms interval, not one per stream
+        self.assertEqual({event['entity'] for event in events}, {'customer'})
+
+    def test_load_test_command(self):
+        out = StringIO()
+        call_command('loadtest_events', '--connections', '20', '--changes', '3', '--idle-seconds', '0.2', stdout=out)
+        self.assertIn('20 streams received 3 changes', out.getvalue())
+        self.assertFalse(ChangeEvent.objects.exists())
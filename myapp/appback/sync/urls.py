@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import deleted_objects
+
+urlpatterns = [
+    path('deleted/', deleted_objects, name='sync-deleted'),
+]
@@ -0,0 +1,74 @@
+# sync/views.py
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+
+from .feed import event_stream
+from .filters import parse_since, sync_cursor
+from .models import ChangeEvent, Tombstone
+
+
+@api_view(['GET'])
+def deleted_objects(request):
+    """
+    GET /api/sync/deleted/?since=2025-07-08T09:30:00Z&entity=job,job_item
+
+    Rows deleted at or after `since`, oldest first. `server_time` is the value to
+    send as `since` here and as `updated_since` to the list endpoints next time;
+    it lags the clock by SYNC_SAFETY_SECONDS (see sync/filters.py).
+    """
+    server_time = sync_cursor()  # Taken before the query so nothing deleted meanwhile is skipped next time
+    if not request.query_params.get('since'):
+        return Response({'error': 'since is required.'}, status=400)
+    tombstones = Tombstone.objects.filter(deleted_at__gte=parse_since(request.query_params['since'], 'since'))
+
+    entities = [entity for entity in request.query_params.get('entity', '').split(',') if entity]
+    if entities:
+        unknown = sorted(set(entities) - {entity for entity, _ in Tombstone.ENTITY_TYPES})
+        if unknown:
+            return Response({'error': f"Unknown entity: {', '.join(unknown)}."}, status=400)
+        tombstones = tombstones.filter(entity_type__in=entities)
+
+    return Response({
+        'server_time': server_time,
+        'deleted': [
+            {'entity': entity, 'id': object_id, 'deleted_at': deleted_at}
+            for entity, object_id, deleted_at in tombstones.values_list('entity_type', 'object_id', 'deleted_at')
+        ],
+    })
+
+
+async def change_events(request):
+    """
+    GET /api/events/?entity=job,order
+
+    Server-sent events, one per change-log row:
+        id: 1042
+        event: change
+        data: {"id": 1042, "entity": "job", "object_id": 7, "operation": "update", "at": "..."}
+
+    Resumes after the Last-Event-ID header (sent by EventSource on reconnect) or
+    ?last_event_id=; otherwise starts from now. Needs the ASGI server.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    if not isinstance(request, ASGIRequest):
+        # Under WSGI the stream would hold a worker thread for its whole life
+        return JsonResponse({'error': 'The event stream needs the ASGI server (appback.asgi:application).'}, status=503)
+
+    last_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    if last_id is not None:
+        if not last_id.isdigit():
+            return JsonResponse({'error': 'Last-Event-ID must be a change sequence number.'}, status=400)
+        last_id = int(last_id)
+
+    entities = {entity for entity in request.GET.get('entity', '').split(',') if entity}
+    unknown = sorted(entities - {entity for entity, _ in ChangeEvent.ENTITY_TYPES})
+    if unknown:
+        return JsonResponse({'error': f"Unknown entity: {', '.join(unknown)}."}, status=400)
+
+    response = StreamingHttpResponse(event_stream(last_id, entities), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Stop nginx from buffering the stream
+    return response
@@ -45,4 +45,24 @@ export function useProduct(id: number, options?: { immediate?: boolean }) {
 
 export function useOrder(id: number, options?: { immediate?: boolean }) {
   return useApi(() => api.orders.get(id), [id], options)
-}
\ No newline at end of file
+}
+// Batch hooks: many resources by id in one request, e.g. the products of an order's lines
+export function useProductsByIds(ids: number[], options?: { immediate?: boolean }) {
+  return useApi(() => api.products.getMany(ids), [ids.join(",")], options)
+}
+
+export function useArtisansByIds(ids: number[], options?: { immediate?: boolean }) {
+  return useApi(() => api.artisans.getMany(ids), [ids.join(",")], options)
+}
+
+export function useCustomersByIds(ids: number[], options?: { immediate?: boolean }) {
+  return useApi(() => api.customers.getMany(ids), [ids.join(",")], options)
+}
+
+export function useJobsByIds(ids: number[], options?: { immediate?: boolean }) {
+  return useApi(() => api.jobs.getMany(ids), [ids.join(",")], options)
+}
+
+export function useOrdersByIds(ids: number[], options?: { immediate?: boolean }) {
+  return useApi(() => api.orders.getMany(ids), [ids.join(",")], options)
+}
@@ -78,6 +78,28 @@ export interface Job {
   artisans_involved?: string[]
 }
 
+// GET /jobs/{id}/sheet/: everything the job screen renders, in one request
+export interface JobSheetItem extends JobItem {
+  deliveries: JobDelivery[]
+  service_rate_per_unit: number | null
+  remaining_quantity: number
+  upstream_stock: Record<string, number> // Quantity on hand at each upstream stage
+}
+
+export interface JobSheet {
+  job: Omit<Job, "items">
+  upstream_stages: string[]
+  items: JobSheetItem[]
+  totals: {
+    items: number
+    deliveries: number
+    quantity_ordered: number
+    quantity_received: number
+    quantity_accepted: number
+    remaining_quantity: number
+  }
+}
+
 export interface Order {
   order_id: number
   customer: number
@@ -142,6 +164,12 @@ export interface PriceHistory {
 }
 
 // Delivery creation payload
+// Rows deleted since a sync cursor (GET /sync/deleted/)
+export interface DeletedSince {
+  server_time: string; // Next cursor for `since` here and `updated_since` on list endpoints (lags the clock by SYNC_SAFETY_SECONDS)
+  deleted: { entity: "product" | "artisan" | "customer" | "job" | "job_item" | "order"; id: number; deleted_at: string }[];
+}
+
 export interface CreateDeliveryPayload {
   quantity_received: number
   quantity_accepted: number
@@ -229,12 +257,48 @@ function getCsrfToken(): string | null {
   return null
 }
 
+// Live change feed (GET /events/, server-sent events). EventSource reconnects by itself and
+// resumes after the last event it saw. Returns a function that closes the stream.
+export interface ChangeEvent {
+  id: number;
+  entity: DeletedSince["deleted"][number]["entity"] | "inventory" | "finished_stock";
+  object_id: number | null; // null: several rows changed at once, reload the entity
+  operation: "create" | "update" | "delete";
+  at: string;
+}
+
+export function subscribeToChanges(entities: ChangeEvent["entity"][], onChange: (event: ChangeEvent) => void): () => void {
+  const baseUrl = API_BASE_URL?.endsWith('/') ? API_BASE_URL.slice(0, -1) : API_BASE_URL;
+  const source = new EventSource(`${baseUrl}/events/?entity=${entities.join(",")}`);
+  source.addEventListener("change", (message) => onChange(JSON.parse((message as MessageEvent).data)));
+  return () => source.close();
+}
+
+// Resolve many ids with one request (?ids= or POST _batch/ for large sets); results keep the order of `ids`
+export interface BatchResponse<T> {
+  results: T[];
+  missing: number[];
+}
+
+const MAX_QUERY_IDS = 100;
+
+function fetchByIds<T>(resource: string, ids: number[]): Promise<BatchResponse<T>> {
+  if (ids.length <= MAX_QUERY_IDS) {
+    return apiRequest<BatchResponse<T>>(`/${resource}/?ids=${ids.join(",")}`);
+  }
+  return apiRequest<BatchResponse<T>>(`/${resource}/_batch/`, {
+    method: "POST",
+    body: JSON.stringify({ ids }),
+  });
+}
+
 // API functions for each model
 export const api = {
   // Products
   products: {
     list: (params?: URLSearchParams) => apiRequest<{ results: Product[] }>(`/products/?${params?.toString() || ''}`).then(res => res.results),
     get: (id: number) => apiRequest<Product>(`/products/${id}/`),
+    getMany: (ids: number[]) => fetchByIds<Product>("products", ids),
     create: (data: Partial<Product>) =>
       apiRequest<Product>("/products/", {
         method: "POST",
@@ -261,6 +325,7 @@ export const api = {
   artisans: {
     list: () => apiRequest<PaginatedResponse<Artisan>>("/artisans/"),
     get: (id: number) => apiRequest<Artisan>(`/artisans/${id}/`),
+    getMany: (ids: number[]) => fetchByIds<Artisan>("artisans", ids),
     create: (data: Partial<Artisan>) =>
       apiRequest<Artisan>("/artisans/", {
         method: "POST",
@@ -281,6 +346,7 @@ export const api = {
   customers: {
     list: () => apiRequest<Customer[]>("/customers/"),
     get: (id: number) => apiRequest<Customer>(`/customers/${id}/`),
+    getMany: (ids: number[]) => fetchByIds<Customer>("customers", ids),
     create: (data: Partial<Customer>) =>
       apiRequest<Customer>("/customers/", {
         method: "POST",
@@ -300,7 +366,10 @@ export const api = {
   // Jobs
   jobs: {
     list: (params?: URLSearchParams) => apiRequest<PaginatedResponse<JobListEntry>>(`/jobs/?${params?.toString() || ''}`),
-    get: (id: number) => apiRequest<Job>(`/jobs/${id}/`),
+    // Deliveries and rates are only included on request (?expand=)
+    get: (id: number) => apiRequest<Job>(`/jobs/${id}/?expand=items.deliveries,items.service_rate_per_unit`),
+    getMany: (ids: number[]) => fetchByIds<JobListEntry>("jobs", ids),
+    sheet: (id: number) => apiRequest<JobSheet>(`/jobs/${id}/sheet/`),
     create: (data: Partial<Job>) =>
       apiRequest<Job>("/jobs/", {
         method: "POST",
@@ -357,6 +426,7 @@ export const api = {
   orders: {
     list: (params?: URLSearchParams) => apiRequest<Order[]>(`/orders/?${params?.toString() || ''}`),
     get: (id: number) => apiRequest<Order>(`/orders/${id}/`),
+    getMany: (ids: number[]) => fetchByIds<Order>("orders", ids),
     create: (data: Partial<Order>) =>
       apiRequest<Order>("/orders/", {
         method: "POST",
@@ -541,4 +611,10 @@ export const api = {
         method: "DELETE",
       }),
   },
+
+  // Delta sync: pass `updated_since` to list endpoints, then drop these rows
+  sync: {
+    deleted: (since: string, entities?: string[]) =>
+      apiRequest<DeletedSince>(`/sync/deleted/?${new URLSearchParams({ since, ...(entities ? { entity: entities.join(",") } : {}) })}`),
+  },
 };
\ No newline at end of file